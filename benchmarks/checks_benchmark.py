@@ -0,0 +1,125 @@
+"""
+Measures the overhead of the precondition checks on a player button press.
+
+Run from the repository root:
+
+    python benchmarks/checks_benchmark.py
+
+Compares the former three decorators stacked on a button callback, each scanning the arguments for the
+interaction and re-reading the voice client, with a single `checks` chain resolving them once.
+The former cooldown is a per-process `CooldownMapping`, the chain's goes through the default in-process
+shared state backend.
+"""
+
+import asyncio
+import functools
+import os
+import sys
+import time
+from types import SimpleNamespace
+from typing import cast
+
+from discord.ext import commands
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from audio_player import AudioPlayer  # noqa: E402
+from utils.decorators import button_cooldown, checked, checks, is_playing, same_voice_channel  # noqa: E402
+
+PRESSES = 200_000
+COOLDOWN = 0.001  # Every channel is pressed again well after its cooldown
+
+
+class FakeInteraction:
+    def __init__(self, channel_id: int) -> None:
+        channel = SimpleNamespace(id=1)
+        self.guild = SimpleNamespace(voice_client=SimpleNamespace(channel=channel, playing=True))
+        self.user = SimpleNamespace(voice=SimpleNamespace(channel=channel))
+        self.message = SimpleNamespace(id=2, channel=SimpleNamespace(id=channel_id))
+        self.channel_id = channel_id
+        self.extras: dict = {}
+
+
+def find_interaction(args) -> FakeInteraction:
+    interaction = next((arg for arg in args if isinstance(arg, FakeInteraction)), None)
+    if interaction is None:
+        raise ValueError("No interaction found in arguments.")
+    return interaction
+
+
+def legacy_same_channel(func):
+    @functools.wraps(func)
+    async def decorator(*args, **kwargs):
+        interaction = find_interaction(args)
+        player = cast(AudioPlayer, interaction.guild.voice_client)
+        user_voice = interaction.user.voice
+        if not (player and user_voice and player.channel.id == user_voice.channel.id):
+            return
+        await func(*args, **kwargs)
+
+    return decorator
+
+
+def legacy_playing(func):
+    @functools.wraps(func)
+    async def decorator(*args, **kwargs):
+        interaction = find_interaction(args)
+        player = cast(AudioPlayer, interaction.guild.voice_client)
+        if not player or not player.playing:
+            return
+        await func(*args, **kwargs)
+
+    return decorator
+
+
+def legacy_cooldown(func):
+    @functools.wraps(func)
+    async def decorator(self, *args, **kwargs):
+        interaction = find_interaction(args)
+        if not hasattr(self, "_cooldown"):
+            raise ValueError("The object does not have a `_cooldown` property.")
+        if self._cooldown.get_bucket(interaction.message).update_rate_limit():
+            return
+        await func(self, *args, **kwargs)
+
+    return decorator
+
+
+class FakeView:
+    def __init__(self) -> None:
+        self._cooldown = commands.CooldownMapping.from_cooldown(rate=1, per=COOLDOWN, type=commands.BucketType.channel)
+        self.cooldown = COOLDOWN
+        self.presses = 0
+
+    @legacy_same_channel
+    @legacy_playing
+    @legacy_cooldown
+    async def legacy_callback(self, interaction: FakeInteraction):
+        player = cast(AudioPlayer, interaction.guild.voice_client)
+        self.presses += player.playing
+
+    @checks(same_voice_channel, is_playing, button_cooldown)
+    async def callback(self, interaction: FakeInteraction):
+        self.presses += checked(interaction).player.playing
+
+
+async def measure(callback) -> float:
+    interactions = [FakeInteraction(channel_id) for channel_id in range(1000)]
+    started = time.perf_counter()
+    for i in range(PRESSES):
+        await callback(interactions[i % 1000])
+    return (time.perf_counter() - started) / PRESSES * 1e9
+
+
+async def main() -> None:
+    view = FakeView()
+    legacy = await measure(view.legacy_callback)
+    chained = await measure(view.callback)
+    assert view.presses == 2 * PRESSES
+    print(f"{PRESSES} presses through same channel, playing and cooldown checks")
+    print(f"stacked decorators: {legacy:6.0f} ns per press")
+    print(f"checks chain:       {chained:6.0f} ns per press ({legacy / chained:.2f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,421 @@
+"""
+Stand-ins for Discord, Lavalink and the soundboard server, for running the bot without any of them.
+
+Every call to a fake backend waits for a simulated latency. Discord objects implement the part of their API the
+audio commands and the player view use. The Lavalink node keeps the state of its players like Lavalink does and
+sends track start and end events for it. The soundboard server is a real HTTP server on localhost, so the
+requests made by `Endpoints` are real ones.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional
+from urllib.parse import unquote
+
+import discord
+import wavelink
+
+SNOWFLAKE_BASE = 10**17
+
+
+@dataclass
+class Latencies:
+    """Seconds every call to a fake backend takes, varied by up to half in both directions"""
+
+    discord: float = 0.08
+    lavalink: float = 0.02
+    soundboard: float = 0.03
+
+    async def wait(self, backend: str) -> None:
+        await asyncio.sleep(getattr(self, backend) * random.uniform(0.5, 1.5))
+
+
+class FakeMessage:
+    def __init__(self, channel: "FakeTextChannel") -> None:
+        self.id = channel.guild.next_id()
+        self.channel = channel
+
+    async def edit(self, **kwargs: Any) -> "FakeMessage":
+        await self.channel.guild.latencies.wait("discord")
+        return self
+
+    async def delete(self) -> None:
+        await self.channel.guild.latencies.wait("discord")
+
+
+class FakeTextChannel:
+    def __init__(self, guild: "FakeGuild") -> None:
+        self.id = guild.next_id()
+        self.guild = guild
+        self.name = "music"
+        self.mention = f"<#{self.id}>"
+
+    async def send(self, content: Optional[str] = None, **kwargs: Any) -> FakeMessage:
+        await self.guild.latencies.wait("discord")
+        return FakeMessage(self)
+
+
+class FakeVoiceState:
+    def __init__(self, channel: Optional["FakeVoiceChannel"]) -> None:
+        self.channel = channel
+        self.self_deaf = False
+        self.self_mute = False
+
+
+class FakeMember:
+    def __init__(self, guild: "FakeGuild", member_id: int, bot: bool = False) -> None:
+        self.id = member_id
+        self.guild = guild
+        self.bot = bot
+        self.name = self.display_name = f"user-{member_id}"
+        self.mention = f"<@{member_id}>"
+        self.voice: Optional[FakeVoiceState] = None
+
+    def move_to(self, channel: Optional["FakeVoiceChannel"]) -> FakeVoiceState:
+        """Moves the member between voice channels, returns the voice state before the move"""
+        before = self.voice or FakeVoiceState(None)
+        if before.channel:
+            before.channel.members.remove(self)
+        self.voice = FakeVoiceState(channel) if channel else None
+        if channel:
+            channel.members.append(self)
+        return before
+
+
+class FakeVoiceChannel:
+    def __init__(self, guild: "FakeGuild") -> None:
+        self.id = guild.next_id()
+        self.guild = guild
+        self.name = f"voice-{self.id}"
+        self.members: list[FakeMember] = []
+
+    def _get_voice_client_key(self) -> tuple[int, str]:
+        return self.guild.id, "guild_id"
+
+    async def connect(self, *, cls: type, timeout: float = 60.0, reconnect: bool = True, **kwargs: Any):
+        # Same steps as discord.VoiceChannel.connect
+        state = self.guild.bot._connection
+        if state._get_voice_client(self.guild.id):
+            raise discord.ClientException("Already connected to a voice channel.")
+        voice = cls(self.guild.bot, self)
+        state._add_voice_client(self.guild.id, voice)
+        try:
+            await voice.connect(timeout=timeout, reconnect=reconnect, self_deaf=False, self_mute=False)
+        except asyncio.TimeoutError:
+            await voice.disconnect(force=True)
+            raise
+        return voice
+
+
+class FakeGuild:
+    _ids = 0
+
+    def __init__(self, bot: discord.Client, latencies: Latencies) -> None:
+        self.bot = bot
+        self.latencies = latencies
+        self.id = self.next_id()
+        self.name = f"guild-{self.id}"
+        self.text_channel = FakeTextChannel(self)
+        self.voice_channels: dict[int, FakeVoiceChannel] = {}
+        self.members: dict[int, FakeMember] = {}
+        self.me = FakeMember(self, self.next_id(), bot=True)
+
+    @classmethod
+    def next_id(cls) -> int:
+        cls._ids += 1
+        return SNOWFLAKE_BASE + cls._ids
+
+    @property
+    def voice_client(self):
+        return self.bot._connection._get_voice_client(self.id)
+
+    def get_channel(self, channel_id: int):
+        if channel_id == self.text_channel.id:
+            return self.text_channel
+        return next((channel for channel in self.voice_channels.values() if channel.id == channel_id), None)
+
+    def member(self, alias: int) -> FakeMember:
+        if alias not in self.members:
+            self.members[alias] = FakeMember(self, self.next_id())
+        return self.members[alias]
+
+    def voice_channel(self, alias: int) -> FakeVoiceChannel:
+        if alias not in self.voice_channels:
+            self.voice_channels[alias] = FakeVoiceChannel(self)
+        return self.voice_channels[alias]
+
+    async def change_voice_state(self, *, channel: Optional[FakeVoiceChannel], **kwargs: Any) -> None:
+        # The gateway round trip, then the voice server update the player forwards to Lavalink
+        await self.latencies.wait("discord")
+        self.me.move_to(channel)
+        player = self.voice_client
+        if channel and player:
+            player.channel = channel
+            await player.node._update_player(self.id, data={"voice": {"sessionId": "replay"}})
+            player._connected = True
+            player._connection_event.set()
+
+
+class FakeResponse:
+    def __init__(self, interaction: "FakeInteraction") -> None:
+        self.interaction = interaction
+        self.done = False
+
+    def is_done(self) -> bool:
+        return self.done
+
+    async def _respond(self) -> None:
+        if self.done:
+            raise discord.InteractionResponded(self.interaction)
+        self.done = True
+        await self.interaction.guild.latencies.wait("discord")
+
+    async def send_message(self, content: Optional[str] = None, **kwargs: Any) -> None:
+        await self._respond()
+
+    async def defer(self, **kwargs: Any) -> None:
+        await self._respond()
+
+    async def edit_message(self, **kwargs: Any) -> None:
+        await self._respond()
+
+    async def autocomplete(self, choices: list) -> None:
+        await self._respond()
+
+
+class FakeFollowup:
+    def __init__(self, interaction: "FakeInteraction") -> None:
+        self.interaction = interaction
+
+    async def send(self, content: Optional[str] = None, **kwargs: Any) -> FakeMessage:
+        return await self.interaction.guild.text_channel.send(content)
+
+
+class FakeInteraction(discord.Interaction):
+    """Interaction built from a trace event instead of a gateway payload"""
+
+    def __init__(
+        self,
+        bot: discord.Client,
+        guild: FakeGuild,
+        user: FakeMember,
+        interaction_type: discord.InteractionType,
+        data: dict,
+        message: Optional[FakeMessage] = None,
+    ) -> None:
+        # Created now, as far as the ack latency is concerned
+        self.id = discord.utils.time_snowflake(discord.utils.utcnow())
+        self.type = interaction_type
+        self.guild_id = guild.id
+        self.data = data
+        self.application_id = 0
+        self.message = message
+        self.user = user
+        self.token = "replay"
+        self.version = 1
+        self.locale = self.guild_locale = discord.Locale.american_english
+        self.extras = {}
+        self.command_failed = False
+        self.entitlement_sku_ids = []
+        self.entitlements = []
+        self.context = discord.AppCommandContext()
+        self._integration_owners = {}
+        self._permissions = 0
+        self._app_permissions = 0
+        self._state = bot._connection
+        self._client = bot
+        self._session = None
+        self._baton = None
+        self._original_response = None
+        self.channel = guild.text_channel
+        self._fake_guild = guild
+        self._fake_response = FakeResponse(self)
+        self._fake_followup = FakeFollowup(self)
+
+    @property
+    def guild(self) -> FakeGuild:
+        return self._fake_guild
+
+    @property
+    def response(self) -> FakeResponse:
+        return self._fake_response
+
+    @property
+    def followup(self) -> FakeFollowup:
+        return self._fake_followup
+
+    async def original_response(self) -> FakeMessage:
+        await self.guild.latencies.wait("discord")
+        return FakeMessage(self.guild.text_channel)
+
+    async def edit_original_response(self, **kwargs: Any) -> FakeMessage:
+        return await self.original_response()
+
+    async def delete_original_response(self) -> None:
+        await self.guild.latencies.wait("discord")
+
+
+def track_payload(identifier: str, title: str, source: str = "youtube") -> dict:
+    """Lavalink track payload, tracks last from 2 to 6 minutes depending on their identifier"""
+    digest = int(hashlib.sha1(identifier.encode()).hexdigest()[:8], 16)
+    info = {
+        "identifier": identifier,
+        "isSeekable": True,
+        "author": "Replay",
+        "length": 120_000 + digest % 240_000,
+        "isStream": False,
+        "position": 0,
+        "title": title,
+        "uri": f"https://www.youtube.com/watch?v={identifier}",
+        "artworkUrl": None,
+        "isrc": None,
+        "sourceName": source,
+    }
+    return {"encoded": f"encoded:{identifier}", "info": info, "pluginInfo": {}, "userData": {}}
+
+
+class FakeNode(wavelink.Node):
+    """
+    Lavalink node answering REST calls locally, it registers itself as the only node of the pool.
+    Like Lavalink it sends a track end when a track is replaced or stopped and a track start when one begins.
+    """
+
+    def __init__(self, bot: discord.Client, latencies: Latencies) -> None:
+        super().__init__(uri="http://replay.invalid", password="replay", client=bot, retries=0)
+        self.latencies = latencies
+        self._status = wavelink.NodeStatus.CONNECTED
+        self._session_id = "replay"
+        self._loaded: dict[str, dict] = {}
+        self._tracks: dict[int, dict] = {}
+        self._events: set[asyncio.Task] = set()
+        wavelink.Pool._Pool__nodes[self.identifier] = self
+
+    async def close_fake(self) -> None:
+        """Waits for the pending events and unregisters the node"""
+        while self._events:
+            await asyncio.gather(*self._events, return_exceptions=True)
+        wavelink.Pool._Pool__nodes.pop(self.identifier, None)
+        await self._session.close()
+
+    async def send(self, method: str = "GET", *, path: str, data: Any = None, params: Optional[dict] = None) -> Any:
+        if path.strip("/") == "v4/decodetrack":
+            await self.latencies.wait("lavalink")
+            return self._loaded[params["encodedTrack"]]
+        raise NotImplementedError(f"{method} {path} is not faked")
+
+    async def _fetch_tracks(self, query: str) -> dict:
+        await self.latencies.wait("lavalink")
+        response = self._load(unquote(query))
+        data = response["data"]
+        if response["loadType"] == "playlist":
+            data = data["tracks"]
+        for track in data if isinstance(data, list) else [data]:
+            self._loaded[track["encoded"]] = track
+        return response
+
+    def _load(self, query: str) -> dict:
+        if "playlist?list=" in query:
+            playlist_id = query.rsplit("=", 1)[-1]
+            tracks = [track_payload(f"{playlist_id}-{i}", f"Playlist {playlist_id} #{i}") for i in range(15)]
+            info = {"name": f"Playlist {playlist_id}", "selectedTrack": -1}
+            return {"loadType": "playlist", "data": {"info": info, "pluginInfo": {}, "tracks": tracks}}
+        if query.startswith("sounds/"):
+            return {"loadType": "track", "data": track_payload(query, query.rsplit("/", 1)[-1], "http")}
+        if "watch?v=" in query:
+            identifier = query.split("watch?v=", 1)[1]
+            return {"loadType": "track", "data": track_payload(identifier, f"Video {identifier}")}
+        phrase = query.split(":", 1)[-1]
+        return {"loadType": "search", "data": [track_payload(f"{phrase}-{i}", f"{phrase} #{i}") for i in range(5)]}
+
+    async def _update_player(self, guild_id: int, /, *, data: dict, replace: bool = False) -> dict:
+        await self.latencies.wait("lavalink")
+        if "track" in data:
+            encoded = data["track"].get("encoded")
+            playing = self._tracks.get(guild_id)
+            if encoded is None:
+                if playing:
+                    self._emit_end(guild_id, "stopped")
+            elif replace or not playing:
+                if playing:
+                    self._emit_end(guild_id, "replaced")
+                track = self._loaded.get(encoded) or track_payload(encoded.split(":", 1)[-1], "Unknown")
+                self._tracks[guild_id] = {**track, "userData": data["track"].get("userData", {})}
+                self._emit(self._track_start(guild_id))
+        return {}
+
+    async def _destroy_player(self, guild_id: int, /) -> None:
+        await self.latencies.wait("lavalink")
+        self._tracks.pop(guild_id, None)
+
+    def end_track(self, guild_id: int, reason: str) -> bool:
+        """Ends the guild's track as if it finished playing, False if nothing was playing"""
+        if guild_id not in self._tracks:
+            return False
+        self._emit_end(guild_id, reason)
+        return True
+
+    def _emit(self, coro) -> None:
+        task = asyncio.create_task(coro)
+        self._events.add(task)
+        task.add_done_callback(self._events.discard)
+
+    async def _track_start(self, guild_id: int) -> None:
+        await self.latencies.wait("lavalink")
+        payload = self._tracks.get(guild_id)
+        player = self._players.get(guild_id)
+        if payload is None:
+            return
+        start = wavelink.TrackStartEventPayload(player=player, track=wavelink.Playable(payload))
+        self.client.dispatch("wavelink_track_start", start)
+        if player:
+            self._emit(player._track_start(start))
+
+    def _emit_end(self, guild_id: int, reason: str) -> None:
+        # Same steps as the websocket handler of wavelink
+        payload = self._tracks.pop(guild_id)
+        player = self._players.get(guild_id)
+        if player and reason != "replaced":
+            player._current = None
+        end = wavelink.TrackEndEventPayload(player=player, track=wavelink.Playable(payload), reason=reason)
+        self.client.dispatch("wavelink_track_end", end)
+        if player:
+            self._emit(player._auto_play_event(end))
+
+
+class FakeSoundboardServer:
+    """Soundboard server on localhost serving the same listing to every guild"""
+
+    def __init__(self, latencies: Latencies, clips: int = 40) -> None:
+        listing = json.dumps({"files": [f"clip {i}.mp3" for i in range(1, clips + 1)]}).encode()
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                self._answer(listing)
+
+            def do_POST(self) -> None:
+                self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                self._answer(b"{}")
+
+            def _answer(self, body: bytes) -> None:
+                threading.Event().wait(latencies.soundboard * random.uniform(0.5, 1.5))
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args: Any) -> None:
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
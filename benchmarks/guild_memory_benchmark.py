@@ -0,0 +1,160 @@
+"""
+Measures the memory every guild with an active player costs, with queues of full tracks as wavelink keeps them
+and with the compact track references of TrackQueue, at 1k and 10k guilds.
+Also times a render of the player view, whose dropdown options are now reused between renders.
+
+    python benchmarks/guild_memory_benchmark.py [--queue 30] [--history 20] [guild counts...]
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import discord  # noqa: E402
+import wavelink  # noqa: E402
+from storage.guild_settings_store import GuildSettings  # noqa: E402
+from track_queue import TrackQueue  # noqa: E402
+from views.audio_player_view import AudioPlayerView  # noqa: E402
+
+DISTINCT_TRACKS = 5000
+RENDERS = 200
+
+
+def track_payload(number: int) -> str:
+    # Serialized like a Lavalink response, every search parses its own copy
+    identifier = f"{number:011d}"
+    info = {
+        "identifier": identifier,
+        "isSeekable": True,
+        "author": f"Channel {number % 300}",
+        "length": 120_000 + number % 240 * 1000,
+        "isStream": False,
+        "position": 0,
+        "title": f"Benchmark track number {number} (Official Music Video)",
+        "uri": f"https://www.youtube.com/watch?v={identifier}",
+        "artworkUrl": f"https://i.ytimg.com/vi/{identifier}/maxresdefault.jpg",
+        "isrc": None,
+        "sourceName": "youtube",
+    }
+    encoded = "QAAA" + f"{number:08d}" * 30  # Lavalink encodes YouTube tracks in about 250 characters
+    return json.dumps({"encoded": encoded, "info": info, "pluginInfo": {}, "userData": {"requester_id": number}})
+
+
+class LegacyHistory(wavelink.Queue):
+    """History holding every played track in a list, as the wavelink queue does"""
+
+    @property
+    def total(self) -> int:
+        return len(self)
+
+    async def page(self, start: int, stop: int) -> list[wavelink.Playable]:
+        return self[max(start, 0):stop]
+
+
+class LegacyQueue(wavelink.Queue):
+    """Queue holding full tracks in a list, as the wavelink queue does"""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._history = LegacyHistory(history=False)
+
+    def dedupe_needed(self, current: Optional[wavelink.Playable] = None) -> bool:
+        return False
+
+
+class FakePlayer:
+    def __init__(self, queue: wavelink.Queue, current: wavelink.Playable) -> None:
+        self.queue = queue
+        self.current = current
+        self.paused = False
+        self.playing = True
+        self.filters_applied = False
+        self.filter_preset = None
+
+
+class LegacyView(AudioPlayerView):
+    """Player view creating new dropdown options on every render, as it did before"""
+
+    @staticmethod
+    def _fill_options(select: discord.ui.Select, entries, default: Optional[str] = None):
+        select.options = [
+            discord.SelectOption(label=label, value=value, default=value == default) for label, value in entries
+        ]
+
+
+class FakeGuild:
+    def __init__(self, guild_id: int, player: FakePlayer) -> None:
+        self.id = guild_id
+        self.voice_client = player
+
+
+class FakeTextChannel:
+    def __init__(self, guild: FakeGuild) -> None:
+        self.id = guild.id
+        self.guild = guild
+
+
+class FakeBot:
+    class guild_settings:
+        get_cached = staticmethod(lambda guild_id: GuildSettings())
+
+
+async def make_guild(
+    guild_id: int, queue: wavelink.Queue, view_type: type, args: argparse.Namespace
+) -> AudioPlayerView:
+    tracks = [track_payload((guild_id * 7 + i) % DISTINCT_TRACKS) for i in range(args.history + args.queue)]
+    history = [wavelink.Playable(json.loads(data)) for data in tracks[:args.history]]
+    queue.history.put(history)
+    queue.put([wavelink.Playable(json.loads(data)) for data in tracks[args.history:]])
+    player = FakePlayer(queue, history[-1])
+    view = view_type(FakeBot(), FakeTextChannel(FakeGuild(guild_id, player)))
+    await view._update_ui_state()
+    return view
+
+
+async def measure(guilds: int, queue_type: type, view_type: type, args: argparse.Namespace) -> tuple[float, float]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    views = [await make_guild(guild_id, queue_type(), view_type, args) for guild_id in range(guilds)]
+    gc.collect()
+    per_guild = (tracemalloc.get_traced_memory()[0] - before) / guilds
+    tracemalloc.stop()
+
+    started = time.perf_counter()
+    for i in range(RENDERS):
+        await views[i % guilds]._update_ui_state()
+    render = (time.perf_counter() - started) / RENDERS
+    for view in views:
+        view.stop()
+    return per_guild, render
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("guilds", type=int, nargs="*", default=[1_000, 10_000])
+    parser.add_argument("--queue", type=int, default=30, help="queued tracks per guild")
+    parser.add_argument("--history", type=int, default=20, help="played tracks per guild")
+    args = parser.parse_args()
+
+    print(f"{args.queue} queued and {args.history} played tracks per guild")
+    print(f"{'guilds':>8} {'full tracks':>14} {'compact':>14} {'render before':>15} {'render now':>12}")
+    for guilds in args.guilds:
+        legacy, legacy_render = await measure(guilds, LegacyQueue, LegacyView, args)
+        compact, render = await measure(guilds, TrackQueue, AudioPlayerView, args)
+        print(
+            f"{guilds:8d} {legacy / 1024:11.1f} KiB {compact / 1024:11.1f} KiB "
+            f"{legacy_render * 1e6:12.1f} us {render * 1e6:9.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,102 @@
+"""
+Simulates the history of a 24/7 music channel: memory held by the history and the time to show a page of it,
+for the list of full tracks the history was, an unbounded TrackHistory and one spilling to SQLite.
+
+    python benchmarks/history_benchmark.py [--plays 50000] [--memory-limit 500]
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import wavelink  # noqa: E402
+from guild_memory_benchmark import track_payload  # noqa: E402
+from storage.database import Database  # noqa: E402
+from storage.history_segment_store import HistorySegmentStore  # noqa: E402
+from track_queue import TrackHistory  # noqa: E402
+
+PAGE = 25
+REPEAT = 200
+
+
+async def held_memory(
+    build: Callable[[], object], store: Optional[HistorySegmentStore] = None
+) -> tuple[object, float]:
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    history = build()
+    if store:
+        await store.flush()  # The store keeps segments in memory until they are written
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    return history, held
+
+
+async def page_time(show: Callable[[], Awaitable[object]], number: int = REPEAT) -> float:
+    started = time.perf_counter()
+    for _ in range(number):
+        await show()
+    return (time.perf_counter() - started) / number
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--plays", type=int, default=50_000)
+    parser.add_argument("--memory-limit", type=int, default=500)
+    args = parser.parse_args()
+    payloads = [track_payload(number) for number in range(args.plays)]
+
+    def played(history: wavelink.Queue) -> wavelink.Queue:
+        for data in payloads:
+            history.put(wavelink.Playable(json.loads(data)))
+        return history
+
+    async def legacy_page(history: wavelink.Queue, start: int) -> list:
+        # What rendering a history page did: copy and reverse the whole history
+        return list(history)[::-1][start:start + PAGE]
+
+    async def new_page(history: TrackHistory, start: int) -> list:
+        return await history.page(history.total - start - PAGE, history.total - start)
+
+    with tempfile.TemporaryDirectory() as directory:
+        database = Database(os.path.join(directory, "history.sqlite3"))
+        await database.connect()
+        store = HistorySegmentStore(database, memory_limit=args.memory_limit)
+        await store.start()
+
+        legacy, legacy_held = await held_memory(lambda: played(wavelink.Queue(history=False)))
+        unbounded, unbounded_held = await held_memory(lambda: played(TrackHistory()))
+        spilling, spilling_held = await held_memory(lambda: played(TrackHistory(store)), store)
+
+        middle = args.plays // 2
+        print(f"History of {args.plays} played tracks, {args.memory_limit} kept in memory when spilling")
+        print(f"{'':28} {'held':>10} {'newest page':>13} {'middle page':>13}")
+        for name, history, held, show in (
+            ("list of full tracks", legacy, legacy_held, legacy_page),
+            ("unbounded TrackHistory", unbounded, unbounded_held, new_page),
+            ("spilling TrackHistory", spilling, spilling_held, new_page),
+        ):
+            newest = await page_time(lambda: show(history, 0))
+            older = await page_time(lambda: show(history, middle))
+            print(f"{name:28} {held / 2**20:6.1f} MiB {newest * 1e6:10.1f} us {older * 1e6:10.1f} us")
+
+        store._read_cache.clear()
+        cold = await page_time(lambda: new_page(spilling, middle), number=1)
+        print(f"\nMiddle page read from SQLite: {cold * 1e6:.0f} us")
+        await store.close()
+        await database.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,131 @@
+"""
+Measures the cold-start time-to-first-audio of /play with fake voice, search and playback latencies.
+
+Run from the repository root:
+
+    python benchmarks/play_cold_start_benchmark.py
+
+Compares joining the channel before searching with doing both at once, and checks that a failed
+search leaves the channel while a failed connection keeps the search result cached for the retry.
+"""
+
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from utils.concurrency import resolve_while_connecting  # noqa: E402
+from utils.search_cache import SearchCache  # noqa: E402
+
+CONNECT_LATENCY = 0.35
+SEARCH_LATENCY = 0.25
+PLAY_LATENCY = 0.03
+RUNS = 20
+
+
+class FakeVoice:
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.connected = False
+        self.cancelled = False
+        self.rollbacks = 0
+
+    async def connect(self) -> "FakeVoice":
+        try:
+            await asyncio.sleep(CONNECT_LATENCY)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.fail:
+            raise TimeoutError("voice handshake timed out")
+        self.connected = True
+        return self
+
+    async def rollback(self) -> None:
+        self.rollbacks += 1
+        self.connected = False
+
+    async def play(self, track: str) -> None:
+        await asyncio.sleep(PLAY_LATENCY)
+
+
+class FakeSearch:
+    def __init__(self, fail: bool = False) -> None:
+        self.fail = fail
+        self.calls = 0
+        self.cache: SearchCache[str] = SearchCache()
+
+    async def resolve(self, search: str) -> str:
+        cached = self.cache.get(search)
+        if cached:
+            return cached
+        self.calls += 1
+        await asyncio.sleep(SEARCH_LATENCY)
+        if self.fail:
+            raise LookupError(search)
+        self.cache.put(search, f"track:{search}")
+        return f"track:{search}"
+
+
+async def sequential() -> float:
+    started = time.perf_counter()
+    voice, search = FakeVoice(), FakeSearch()
+    await voice.connect()
+    track = await search.resolve("song")
+    await voice.play(track)
+    return time.perf_counter() - started
+
+
+async def concurrent() -> float:
+    started = time.perf_counter()
+    voice, search = FakeVoice(), FakeSearch()
+    player, track = await resolve_while_connecting(search.resolve("song"), voice.connect(), voice.rollback)
+    await player.play(track)
+    return time.perf_counter() - started
+
+
+async def failed_search() -> float:
+    started = time.perf_counter()
+    voice, search = FakeVoice(), FakeSearch(fail=True)
+    try:
+        await resolve_while_connecting(search.resolve("song"), voice.connect(), voice.rollback)
+    except LookupError:
+        pass
+    assert voice.cancelled and not voice.connected and voice.rollbacks == 1
+    return time.perf_counter() - started
+
+
+async def retry_after_failed_connect() -> float:
+    search = FakeSearch()
+    voice = FakeVoice(fail=True)
+    try:
+        await resolve_while_connecting(search.resolve("song"), voice.connect(), voice.rollback)
+    except TimeoutError:
+        pass
+    assert voice.rollbacks == 1
+
+    started = time.perf_counter()
+    voice = FakeVoice()
+    player, track = await resolve_while_connecting(search.resolve("song"), voice.connect(), voice.rollback)
+    await player.play(track)
+    assert search.calls == 1
+    return time.perf_counter() - started
+
+
+async def measure(scenario) -> float:
+    return statistics.mean([await scenario() for _ in range(RUNS)]) * 1000
+
+
+async def main() -> None:
+    print(f"connect {CONNECT_LATENCY * 1000:.0f} ms, search {SEARCH_LATENCY * 1000:.0f} ms, {RUNS} runs each")
+    print(f"sequential time-to-first-audio:       {await measure(sequential):7.1f} ms")
+    print(f"concurrent time-to-first-audio:       {await measure(concurrent):7.1f} ms")
+    print(f"failed search, channel left after:    {await measure(failed_search):7.1f} ms")
+    print(f"retry after failed connect (cached):  {await measure(retry_after_failed_connect):7.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,95 @@
+"""
+Compares queue operations on 10k-track queues between the plain list wavelink uses and TrackList.
+
+    python benchmarks/queue_benchmark.py [queue size]
+"""
+
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import wavelink  # noqa: E402
+from track_queue import TrackList  # noqa: E402
+
+REPEAT = 2000
+
+
+def make_track(number: int) -> wavelink.Playable:
+    info = {
+        "identifier": f"track-{number}",
+        "isSeekable": True,
+        "author": "Benchmark",
+        "length": 180_000,
+        "isStream": False,
+        "position": 0,
+        "title": f"Track {number}",
+        "sourceName": "youtube",
+    }
+    return wavelink.Playable({"encoded": f"encoded-{number}", "info": info, "pluginInfo": {}})
+
+
+def list_dedupe(items: list) -> None:
+    seen = set()
+    items[:] = [track for track in items if not (track.identifier in seen or seen.add(track.identifier))]
+
+
+def bench_fresh(name: str, tracks: list, plain, blocked, number: int = 20) -> None:
+    # For operations that change the queue so much that every run needs a fresh copy
+    plain_time = blocked_time = 0.0
+    for _ in range(number):
+        items, track_list = list(tracks), TrackList(tracks)
+        plain_time += timeit.timeit(lambda: plain(items), number=1)
+        blocked_time += timeit.timeit(lambda: blocked(track_list), number=1)
+    print(f"{name:<28} {plain_time / number * 1e6:10.2f} us {blocked_time / number * 1e6:10.2f} us")
+
+
+def main() -> None:
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    tracks = [make_track(i) for i in range(size)]
+    extra = make_track(size)
+    rnd = random.Random(0)
+    positions = [rnd.randrange(size) for _ in range(REPEAT)]
+
+    def bench(name: str, plain, blocked, number: int = REPEAT) -> None:
+        items, track_list = list(tracks), TrackList(tracks)
+        plain_time = timeit.timeit(lambda: plain(items), number=number) / number
+        blocked_time = timeit.timeit(lambda: blocked(track_list), number=number) / number
+        print(f"{name:<28} {plain_time * 1e6:10.2f} us {blocked_time * 1e6:10.2f} us")
+
+    def cycle():
+        iterator = iter(positions * 1000)
+        return lambda: next(iterator)
+
+    print(f"Queue of {size} tracks, average per operation")
+    print(f"{'operation':<28} {'list':>13} {'TrackList':>13}")
+
+    nxt = cycle()
+    bench("insert at random position", lambda q: q.insert(nxt(), extra), lambda q: q.insert(nxt(), extra))
+    nxt = cycle()
+    bench("delete at random position", lambda q: (q.insert(0, extra), q.pop(nxt())),
+          lambda q: (q.insert(0, extra), q.pop(nxt())))
+    nxt = cycle()
+    bench("move front to random", lambda q: q.insert(nxt(), q.pop(0)), lambda q: q.insert(nxt(), q.pop(0)))
+    bench("get next track", lambda q: (q.append(extra), q.pop(0)), lambda q: (q.append(extra), q.pop(0)))
+    nxt = cycle()
+    bench("random access", lambda q: q[nxt()], lambda q: q[nxt()])
+    bench("page of 25 tracks", lambda q: q[size // 2:size // 2 + 25], lambda q: q[size // 2:size // 2 + 25])
+    bench("remove range of 100", lambda q: (q.extend(tracks[:100]), q.__delitem__(slice(100, 200))),
+          lambda q: (q.extend(tracks[:100]), q.__delitem__(slice(100, 200))), number=200)
+    bench("duplicate check", lambda q: len({track.identifier for track in q}) != len(q),
+          lambda q: q.has_duplicates, number=50)
+    bench("contains by identifier", lambda q: extra in q, lambda q: extra in q, number=50)
+    bench("shuffle", random.shuffle, TrackList.shuffle, number=20)
+
+    with_duplicates = tracks + rnd.sample(tracks, size // 10)
+    rnd.shuffle(with_duplicates)
+    bench_fresh("dedupe 10% duplicates", with_duplicates, list_dedupe, TrackList.dedupe)
+    bench_fresh("dedupe without duplicates", tracks, list_dedupe,
+                lambda q: q.dedupe() if q.has_duplicates else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,383 @@
+"""
+Replays a traffic trace against the bot running on fake Discord, Lavalink and soundboard backends.
+
+Traces are recorded by the bot when TRACE_PATH is set, a synthetic one can be generated instead.
+Run from the repository root:
+
+    python benchmarks/replay_load.py synthesize trace.jsonl.gz [--guilds 20] [--minutes 10]
+    python benchmarks/replay_load.py replay trace.jsonl.gz [--speed 10] [--memory]
+
+Events are replayed at their recorded times divided by the speed, each in a task of its own like the gateway
+does, against the real AudioCog and player views. The backends answer after the latencies given on the
+command line. The report shows the latency distribution of every command, component and listener,
+and the CPU time and memory used by every subsystem.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, defaultdict
+from typing import Any, Awaitable, Callable, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import discord  # noqa: E402
+from fake_backends import FakeGuild, FakeInteraction, FakeNode, FakeSoundboardServer, FakeVoiceState  # noqa: E402
+from fake_backends import Latencies  # noqa: E402
+from utils.metrics import metrics  # noqa: E402
+from utils.trace_recorder import TRACE_FORMAT, append_trace, read_trace  # noqa: E402
+
+SUBSYSTEM_FILES = {
+    os.path.join("cogs", "audio_cog.py"): "AudioCog",
+    os.path.join("views", "audio_player_view.py"): "AudioPlayerView",
+    os.path.join("utils", "endpoints.py"): "Endpoints",
+}
+LISTENERS = ("on_voice_state_update", "on_wavelink_track_start", "on_wavelink_track_end")
+BUTTONS = (
+    "pause_callback", "skip_callback", "previous_callback", "next_page_callback", "previous_page_callback",
+    "shuffle_callback", "dedupe_callback", "forward_callback", "rewind_callback", "filter_callback",
+)
+
+
+class Profiler:
+    """
+    Latencies of the measured coroutines and the CPU time of every subsystem.
+    CPU time is measured per step of a coroutine, a step of a measured coroutine awaited by another one
+    only counts towards its own subsystem.
+    """
+
+    def __init__(self) -> None:
+        self.latencies: defaultdict[str, list[float]] = defaultdict(list)
+        self.cpu: defaultdict[str, float] = defaultdict(float)
+        self._nested = 0.0
+
+    def wrap(self, subsystem: str, name: str, func: Callable[..., Awaitable]) -> Callable[..., Awaitable]:
+        async def measured(*args: Any, **kwargs: Any) -> Any:
+            return await self.measure(subsystem, name, func(*args, **kwargs))
+
+        return measured
+
+    async def measure(self, subsystem: str, name: str, coro: Awaitable) -> Any:
+        started = time.perf_counter()
+        try:
+            return await _Metered(self, subsystem, coro)
+        finally:
+            self.latencies[f"{subsystem}.{name}"].append(time.perf_counter() - started)
+
+
+class _Metered:
+    def __init__(self, profiler: Profiler, subsystem: str, coro: Awaitable) -> None:
+        self.profiler = profiler
+        self.subsystem = subsystem
+        self.coro = coro.__await__()
+
+    def __await__(self):
+        value, error = None, None
+        while True:
+            outer, self.profiler._nested = self.profiler._nested, 0.0
+            started = time.thread_time()
+            try:
+                future = self.coro.throw(error) if error else self.coro.send(value)
+            except StopIteration as stop:
+                return stop.value
+            finally:
+                elapsed = time.thread_time() - started
+                self.profiler.cpu[self.subsystem] += elapsed - self.profiler._nested
+                self.profiler._nested = outer + elapsed
+            try:
+                value, error = (yield future), None
+            except BaseException as err:
+                value, error = None, err
+
+
+class Replayer:
+    """Turns trace events into gateway traffic for a bot running on the fake backends"""
+
+    def __init__(self, bot: Any, cog: Any, node: FakeNode, profiler: Profiler, latencies: Latencies) -> None:
+        self.bot = bot
+        self.cog = cog
+        self.node = node
+        self.profiler = profiler
+        self.latencies = latencies
+        self.guilds: dict[int, FakeGuild] = {}
+        self.replayed = 0
+        self.skipped: Counter[str] = Counter()
+        self._tasks: set[asyncio.Task] = set()
+
+    async def run(self, events: list[list], speed: float) -> float:
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        for event in events:
+            delay = event[1] / 1000 / speed - (loop.time() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            handled = getattr(self, f"_replay_{event[0]}")(*event[2:])
+            if handled is None:
+                continue
+            self.replayed += 1
+            task = asyncio.create_task(handled)
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        while self._tasks:
+            await asyncio.gather(*self._tasks)
+        return loop.time() - started
+
+    def guild(self, alias: int) -> FakeGuild:
+        if alias not in self.guilds:
+            self.guilds[alias] = FakeGuild(self.bot, self.latencies)
+        return self.guilds[alias]
+
+    def _replay_c(self, guild: int, user: int, name: str, options: dict) -> Optional[Awaitable]:
+        return self._command(discord.InteractionType.application_command, guild, user, name, options)
+
+    def _replay_a(self, guild: int, user: int, name: str, options: dict) -> Optional[Awaitable]:
+        return self._command(discord.InteractionType.autocomplete, guild, user, name, options)
+
+    def _command(
+        self, interaction_type: discord.InteractionType, guild: int, user: int, name: str, options: dict
+    ) -> Optional[Awaitable]:
+        command = self.bot.tree.get_command(name)
+        if command is None or not hasattr(command, "_params"):
+            self.skipped[f"command {name}"] += 1
+            return None
+        payload = []
+        for parameter in command._params.values():
+            if parameter.name not in options:
+                if parameter.required:
+                    self.skipped[f"command {name}, {parameter.name} not replayable"] += 1
+                    return None
+                continue
+            option = {"name": parameter.name, "type": parameter.type.value, "value": options[parameter.name]}
+            if options.get("_focused") == parameter.name:
+                option["focused"] = True
+            payload.append(option)
+
+        fake_guild = self.guild(guild)
+        data = {"id": 0, "name": name, "type": 1, "options": payload}
+        interaction = FakeInteraction(self.bot, fake_guild, fake_guild.member(user), interaction_type, data)
+        kind = "autocomplete" if interaction_type is discord.InteractionType.autocomplete else "command"
+        subsystem = type(command.binding).__name__
+        return self.profiler.measure(subsystem, f"{kind} {name}", self.bot.tree._call(interaction))
+
+    def _replay_i(self, guild: int, user: int, callback: str, values: list) -> Optional[Awaitable]:
+        fake_guild = self.guild(guild)
+        view = self.cog.views.get(fake_guild.id)
+        item = view and next(
+            (item for item in view.children if getattr(item.callback, "__name__", None) == callback), None
+        )
+        if not item or item.disabled:
+            self.skipped[f"component {callback}, not on the player"] += 1
+            return None
+        if isinstance(item, discord.ui.Select) and not set(values) <= {option.value for option in item.options}:
+            # Discord only sends the options the select shows
+            self.skipped[f"component {callback}, option not shown"] += 1
+            return None
+        data = {"custom_id": item.custom_id, "component_type": item.type.value, "values": values}
+        interaction = FakeInteraction(
+            self.bot, fake_guild, fake_guild.member(user), discord.InteractionType.component, data, view.message_handle
+        )
+        # Dispatched to the persistent controls the way discord.py does, they pass it on to the guild's view
+        controls = self.cog.controls
+        control = discord.utils.get(controls.children, custom_id=item.custom_id)
+        return self.profiler.measure("AudioPlayerView", callback, controls._scheduled_task(control, interaction))
+
+    def _replay_v(self, guild: int, user: int, before: Optional[int], after: Optional[int]) -> None:
+        # The member moves right away, commands that follow see the new channel
+        fake_guild = self.guild(guild)
+        member = fake_guild.member(user)
+        before_state = member.move_to(fake_guild.voice_channel(after) if after else None)
+        self.bot.dispatch("voice_state_update", member, before_state, member.voice or FakeVoiceState(None))
+
+    def _replay_e(self, guild: int, reason: str) -> None:
+        # Other ends follow from commands, the fake node sends them itself
+        if reason in ("finished", "loadFailed") and not self.node.end_track(self.guild(guild).id, reason):
+            self.skipped["track end, nothing playing"] += 1
+
+
+async def replay(path: str, speed: float, latencies: Latencies, trace_memory: bool) -> None:
+    events = list(read_trace(path))
+    if trace_memory:
+        tracemalloc.start(25)
+
+    with tempfile.TemporaryDirectory() as directory:
+        soundboard = FakeSoundboardServer(latencies)
+        os.environ.update(
+            DATABASE_PATH=os.path.join(directory, "replay.sqlite3"),
+            SERVER_IP="127.0.0.1",
+            SERVER_PORT=str(soundboard.port),
+            SERVER_ENDPOINT="soundboard",
+        )
+        import discord_bot
+        from cogs.audio_cog import AudioCog
+        from utils.endpoints import Endpoints
+
+        bot = discord_bot.DiscordBot()
+        await bot._async_setup_hook()
+        await bot.database.connect()
+        await bot.play_history.start()
+        await bot.guild_settings.start()
+        await bot.state.start()
+        node = bot.node_supervisor.node = FakeNode(bot, latencies)
+        bot.node_supervisor.node_ready()
+
+        profiler = Profiler()
+        cog = AudioCog(bot)
+        for listener in LISTENERS:
+            setattr(cog, listener, profiler.wrap("AudioCog", listener.removeprefix("on_"), getattr(cog, listener)))
+        await bot.add_cog(cog)
+        endpoints = {name: getattr(Endpoints, name) for name in ("get_soundboard_listing", "upload_audio")}
+        for name, func in endpoints.items():
+            setattr(Endpoints, name, staticmethod(profiler.wrap("Endpoints", name, func)))
+
+        replayer = Replayer(bot, cog, node, profiler, latencies)
+        cpu_started = time.process_time()
+        try:
+            duration = await replayer.run(events, speed)
+            await node.close_fake()
+            cpu_total = time.process_time() - cpu_started
+            memory = subsystem_memory() if trace_memory else {}
+        finally:
+            for name, func in endpoints.items():
+                setattr(Endpoints, name, staticmethod(func))
+            await bot.close()
+            soundboard.close()
+
+    report(replayer, profiler, duration, speed, cpu_total, memory)
+
+
+def subsystem_memory() -> dict[str, int]:
+    # Allocations still alive are charged to the innermost frame of a subsystem that led to them
+    held: Counter[str] = Counter()
+    for stat in tracemalloc.take_snapshot().statistics("traceback"):
+        for frame in reversed(stat.traceback):
+            subsystem = next((name for file, name in SUBSYSTEM_FILES.items() if frame.filename.endswith(file)), None)
+            if subsystem:
+                held[subsystem] += stat.size
+                break
+    tracemalloc.stop()
+    return held
+
+
+def report(
+    replayer: Replayer, profiler: Profiler, duration: float, speed: float, cpu_total: float, memory: dict
+) -> None:
+    skipped = sum(replayer.skipped.values())
+    print(f"Replayed {replayer.replayed} events in {duration:.1f} s at {speed:g}x, {skipped} skipped")
+    for reason, count in replayer.skipped.most_common():
+        print(f"  skipped {count:5d}  {reason}")
+
+    print(f"\n{'Latency in ms':45} {'n':>6} {'p50':>7} {'p90':>7} {'p99':>7} {'max':>7}")
+    for name, samples in sorted(profiler.latencies.items()):
+        ordered = sorted(samples)
+        cuts = statistics.quantiles(ordered, n=100, method="inclusive") if len(ordered) > 1 else ordered * 99
+        print(
+            f"{name:45} {len(ordered):6d} {cuts[49] * 1000:7.1f} {cuts[89] * 1000:7.1f} "
+            f"{cuts[98] * 1000:7.1f} {ordered[-1] * 1000:7.1f}"
+        )
+
+    print(f"\n{'Subsystem':45} {'CPU ms':>8} {'share':>7} {'held KiB':>9}")
+    attributed = sum(profiler.cpu.values())
+    rows = [*sorted(profiler.cpu.items()), ("other (tasks, discord.py, wavelink)", cpu_total - attributed)]
+    for name, cpu in rows:
+        held = f"{memory[name] / 1024:9.0f}" if name in memory else f"{'-':>9}"
+        print(f"{name:45} {cpu * 1000:8.0f} {cpu / cpu_total:7.1%} {held}")
+    print(f"Peak RSS: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MiB")
+
+    print("\nBot metrics")
+    print(metrics.report())
+
+
+def synthesize(path: str, guilds: int, minutes: float, seed: int) -> None:
+    """Writes a trace of listening sessions, with search phrases repeating like popular tracks do"""
+    rng = random.Random(seed)
+    events: list[list] = []
+    end = minutes * 60_000
+    for guild in range(1, guilds + 1):
+        users = [guild * 1000 + i for i in range(rng.randint(1, 5))]
+        channel = guild * 1000
+        t = rng.uniform(0, 30_000)
+        for user in users:
+            t += rng.expovariate(1 / 2000)
+            events.append(["v", int(t), guild, user, None, channel])
+
+        playing_until = 0.0
+        while t < end:
+            t += rng.expovariate(1 / 20_000)
+            user = rng.choice(users)
+            if playing_until and t > playing_until:
+                events.append(["e", int(playing_until), guild, "finished"])
+                playing_until = 0.0
+            roll = rng.random()
+            if roll < 0.35:
+                search = synthetic_search(rng)
+                for typed in range(3, min(len(search), 9), 2):
+                    events.append(["a", int(t), guild, user, "play", {"search": search[:typed], "_focused": "search"}])
+                    t += rng.uniform(150, 400)
+                events.append(["c", int(t), guild, user, "play", {"search": search}])
+                playing_until = playing_until or t + rng.uniform(120_000, 360_000)
+            elif roll < 0.8:
+                events.append(["i", int(t), guild, user, rng.choice(BUTTONS), []])
+            elif roll < 0.85:
+                events.append(["i", int(t), guild, user, "queue_select_callback", [str(rng.randint(0, 3))]])
+            elif roll < 0.9:
+                events.append(["c", int(t), guild, user, "seek", {"position": f"+{rng.randint(5, 60)}"}])
+            elif roll < 0.95:
+                events.append(["c", int(t), guild, user, "volume", {"value": rng.randint(20, 100)}])
+            else:
+                events.append(["c", int(t), guild, user, rng.choice(["soundboard", "shuffle", "dedupe"]), {}])
+
+        for user in users:
+            t += rng.expovariate(1 / 2000)
+            events.append(["v", int(t), guild, user, channel, None])
+
+    events.sort(key=lambda event: event[1])
+    if os.path.exists(path):
+        os.remove(path)
+    append_trace(path, [{"format": TRACE_FORMAT, "started": time.time()}, *events])
+    print(f"Wrote {len(events)} events of {guilds} guilds over {minutes:g} minutes to {path}")
+
+
+def synthetic_search(rng: random.Random) -> str:
+    roll = rng.random()
+    if roll < 0.1:
+        return str(rng.randint(1, 40))  # Soundboard number
+    if roll < 0.15:
+        return f"https://www.youtube.com/playlist?list={rng.randint(1, 20)}"
+    if roll < 0.35:
+        return f"https://www.youtube.com/watch?v={int(rng.paretovariate(1.2))}"
+    return f"search {int(rng.paretovariate(1.2))}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="action", required=True)
+    synthesize_parser = commands.add_parser("synthesize", help="write a synthetic trace")
+    synthesize_parser.add_argument("trace")
+    synthesize_parser.add_argument("--guilds", type=int, default=20)
+    synthesize_parser.add_argument("--minutes", type=float, default=10)
+    synthesize_parser.add_argument("--seed", type=int, default=2137)
+    replay_parser = commands.add_parser("replay", help="replay a trace")
+    replay_parser.add_argument("trace")
+    replay_parser.add_argument("--speed", type=float, default=1, help="replay speed, 10 replays 10x faster")
+    replay_parser.add_argument("--discord-latency", type=float, default=Latencies.discord)
+    replay_parser.add_argument("--lavalink-latency", type=float, default=Latencies.lavalink)
+    replay_parser.add_argument("--soundboard-latency", type=float, default=Latencies.soundboard)
+    replay_parser.add_argument("--memory", action="store_true", help="attribute held memory, slows the replay")
+    args = parser.parse_args()
+
+    if args.action == "synthesize":
+        synthesize(args.trace, args.guilds, args.minutes, args.seed)
+        return
+    latencies = Latencies(args.discord_latency, args.lavalink_latency, args.soundboard_latency)
+    asyncio.run(replay(args.trace, args.speed, latencies, args.memory))
+
+
+if __name__ == "__main__":
+    main()
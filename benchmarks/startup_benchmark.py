@@ -0,0 +1,72 @@
+"""
+Measures the startup phases of the bot without connecting to Discord or Lavalink.
+
+Run from the repository root in a fresh interpreter, module imports are only cold once:
+
+    python benchmarks/startup_benchmark.py
+
+The report compares the staged startup, where only the core imports, the environment and
+the database block going online, with the total time the old eager startup spent before login.
+"""
+
+import asyncio
+import importlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from utils.startup_profiler import StartupProfiler  # noqa: E402
+
+COGS = ("cogs.admin_cog", "cogs.user_cog", "cogs.audio_cog", "cogs.badura_cog", "cogs.stats_cog")
+
+
+async def run(profiler: StartupProfiler) -> float:
+    with profiler.phase("core imports"):
+        import discord_bot
+        from dotenv import load_dotenv
+
+    with profiler.phase("environment"):
+        load_dotenv()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["DATABASE_PATH"] = os.path.join(directory, "benchmark.sqlite3")
+        bot = discord_bot.DiscordBot(profiler=profiler)
+        with profiler.phase("database"):
+            await bot.database.connect()
+            await bot.play_history.start()
+            await bot.guild_settings.start()
+            await bot.state.start()
+        online_at = profiler.elapsed()
+
+        async def import_cogs():
+            with profiler.phase("cogs"):
+                for module_name in COGS:
+                    await asyncio.sleep(0)  # Imports block the loop, yield between them like add_cog does
+                    importlib.import_module(module_name)
+
+        await asyncio.gather(import_cogs(), bot._load_native_libraries())
+        await bot.play_history.close()
+        await bot.guild_settings.close()
+        await bot.state.close()
+        await bot.database.close()
+    return online_at
+
+
+def main() -> None:
+    profiler = StartupProfiler()
+    online_at = asyncio.run(run(profiler))
+    profiler.mark_ready()
+    print(profiler.report())
+
+    eager = sum(end - start for start, end in profiler.phases.values() if end is not None)
+    print(f"\nBlocking before login (staged): {online_at * 1000:8.1f} ms")
+    print(f"Blocking before login (eager):  {eager * 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    start = time.perf_counter()
+    main()
+    print(f"Benchmark wall time:            {(time.perf_counter() - start) * 1000:8.1f} ms")
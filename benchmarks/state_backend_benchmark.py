@@ -0,0 +1,106 @@
+"""
+Measures the round trips saved by pipelining shared state operations.
+
+Run from the repository root:
+
+    python benchmarks/state_backend_benchmark.py
+
+Starts a fake Redis-protocol server backed by the in-memory backend, answering every read after a simulated
+network delay, and counts a button press against the shared rate limit with one command per round trip
+and with the single pipelined round trip `SharedState.hit_rate_limit` uses.
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from storage.shared_state import SharedState  # noqa: E402
+from storage.state_backend import InMemoryBackend, RespBackend, StateBackendError  # noqa: E402
+
+PRESSES = 500
+NETWORK_DELAY = 0.001  # Seconds added to every round trip
+
+
+def encode_reply(reply) -> bytes:
+    if reply is None:
+        return b"$-1\r\n"
+    if isinstance(reply, StateBackendError):
+        return b"-ERR %b\r\n" % str(reply).encode()
+    if isinstance(reply, str):
+        return b"+%b\r\n" % reply.encode()
+    if isinstance(reply, int):
+        return b":%d\r\n" % reply
+    if isinstance(reply, list):
+        return b"*%d\r\n" % len(reply) + b"".join(encode_reply(item) for item in reply)
+    return b"$%d\r\n%b\r\n" % (len(reply), reply)
+
+
+async def read_command(reader: asyncio.StreamReader) -> list[str]:
+    count = int((await reader.readuntil(b"\r\n"))[1:-2])
+    command = []
+    for _ in range(count):
+        length = int((await reader.readuntil(b"\r\n"))[1:-2])
+        command.append((await reader.readexactly(length + 2))[:-2].decode())
+    return command
+
+
+async def fake_server(backend: InMemoryBackend, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+    try:
+        while True:
+            commands = [await read_command(reader)]
+            # Commands that arrived together are a pipeline and share one delay
+            while reader._buffer:
+                commands.append(await read_command(reader))
+            await asyncio.sleep(NETWORK_DELAY)
+            replies = []
+            for command in commands:
+                try:
+                    replies.append(backend.apply(command))
+                except StateBackendError as err:
+                    replies.append(err)
+            writer.write(b"".join(encode_reply(reply) for reply in replies))
+            await writer.drain()
+    except asyncio.IncompleteReadError:
+        writer.close()
+
+
+async def unpipelined_hit(backend: RespBackend, bucket: str) -> float:
+    key = f"wkk:ratelimit:{bucket}"
+    await backend.execute([("SET", key, 0, "PX", 1000, "NX")])
+    count = (await backend.execute([("INCRBY", key, 1)]))[0]
+    ttl_ms = (await backend.execute([("PTTL", key)]))[0]
+    return max(ttl_ms, 0) / 1000 if count > 1 else 0
+
+
+async def measure(hit) -> float:
+    started = time.perf_counter()
+    for i in range(PRESSES):
+        assert await hit(f"buttons:{i}") == 0
+    return (time.perf_counter() - started) / PRESSES * 1000
+
+
+async def main() -> None:
+    server = await asyncio.start_server(
+        lambda reader, writer: fake_server(InMemoryBackend(), reader, writer), "127.0.0.1", 0
+    )
+    port = server.sockets[0].getsockname()[1]
+
+    backend = RespBackend("127.0.0.1", port)
+    shared = SharedState(RespBackend("127.0.0.1", port))
+    unpipelined = await measure(lambda bucket: unpipelined_hit(backend, bucket))
+    pipelined = await measure(lambda bucket: shared.hit_rate_limit(bucket, 1, 1.0))
+    assert await shared.hit_rate_limit("buttons:0", 1, 1.0) > 0
+
+    await backend.close()
+    await shared.close()
+    server.close()
+    print(f"{PRESSES} rate limited presses, {NETWORK_DELAY * 1000:.0f} ms per round trip")
+    print(f"one command per round trip: {unpipelined:5.2f} ms per press")
+    print(f"pipelined:                  {pipelined:5.2f} ms per press ({unpipelined / pipelined:.2f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import functools
+from typing import Optional
+
+import wavelink
+
+NIGHTCORE_PRESET = "nightcore"
+MAX_CUSTOM_PRESETS = 10
+
+
+class PresetFilters(wavelink.Filters):
+    """
+    Immutable set of filters whose Lavalink payload is built once and shared by every player.
+    Do not modify the individual filters of a preset after it was created.
+    """
+
+    def __init__(self, name: str) -> None:
+        super().__init__()
+        self.name = name
+        self._payload: Optional[dict] = None
+
+    def freeze(self) -> PresetFilters:
+        """
+        Builds and caches the payload sent to Lavalink.
+        """
+        self._payload = super().__call__()
+        return self
+
+    def __call__(self) -> dict:
+        return self._payload if self._payload is not None else super().__call__()
+
+
+def _nightcore() -> PresetFilters:
+    filters = PresetFilters(NIGHTCORE_PRESET)
+    filters.timescale.set(pitch=1.2, speed=1.1, rate=1.0)
+    return filters.freeze()
+
+
+def _vaporwave() -> PresetFilters:
+    filters = PresetFilters("vaporwave")
+    filters.timescale.set(pitch=0.8, speed=0.85, rate=1.0)
+    filters.equalizer.set(bands=[{"band": 0, "gain": 0.3}, {"band": 1, "gain": 0.3}])
+    return filters.freeze()
+
+
+def _bass_boost() -> PresetFilters:
+    filters = PresetFilters("bass boost")
+    gains = (0.3, 0.25, 0.2, 0.1, 0.05)
+    filters.equalizer.set(bands=[{"band": band, "gain": gain} for band, gain in enumerate(gains)])
+    return filters.freeze()
+
+
+def _eight_d() -> PresetFilters:
+    filters = PresetFilters("8d")
+    filters.rotation.set(rotation_hz=0.2)
+    return filters.freeze()
+
+
+def _karaoke() -> PresetFilters:
+    filters = PresetFilters("karaoke")
+    filters.karaoke.set(level=1.0, mono_level=1.0, filter_band=220.0, filter_width=100.0)
+    return filters.freeze()
+
+
+NO_FILTERS = PresetFilters("off").freeze()
+BUILTIN_PRESETS: dict[str, PresetFilters] = {
+    preset.name: preset for preset in (_nightcore(), _vaporwave(), _bass_boost(), _eight_d(), _karaoke())
+}
+
+
+@functools.lru_cache(maxsize=128)
+def build_custom_preset(name: str, speed: float, pitch: float, bass: float, rotation: float) -> PresetFilters:
+    """
+    Builds a user-defined preset, identical definitions share a single cached instance.
+
+    Args:
+        name (str): The preset name.
+        speed (float): Playback speed multiplier.
+        pitch (float): Pitch multiplier.
+        bass (float): Gain added to the lowest equalizer bands (-0.25 to 1.0).
+        rotation (float): Stereo rotation frequency in Hz, 0 disables it.
+
+    Returns:
+        PresetFilters: The frozen preset.
+    """
+    filters = PresetFilters(name)
+    if speed != 1.0 or pitch != 1.0:
+        filters.timescale.set(speed=speed, pitch=pitch, rate=1.0)
+    if bass:
+        filters.equalizer.set(bands=[{"band": band, "gain": bass} for band in range(3)])
+    if rotation:
+        filters.rotation.set(rotation_hz=rotation)
+    return filters.freeze()
+
+
+def normalize_preset_name(name: str) -> str:
+    """
+    Form preset names are stored and looked up in, names are not case-sensitive.
+    """
+    return " ".join(name.split()).lower()
+
+
+def resolve_preset(name: Optional[str], custom_presets: Optional[dict[str, dict[str, float]]] = None) -> PresetFilters:
+    """
+    Finds a preset by name among the built-in and the guild's custom presets, ignoring case.
+
+    Args:
+        name (Optional[str]): The preset name, None or "off" for no filters.
+        custom_presets (Optional[dict[str, dict[str, float]]]): The guild's user-defined preset definitions.
+
+    Returns:
+        PresetFilters: The matching preset.
+
+    Raises:
+        KeyError: No preset with the given name exists.
+    """
+    if not name:
+        return NO_FILTERS
+    key = normalize_preset_name(name)
+    if key == NO_FILTERS.name:
+        return NO_FILTERS
+    if key in BUILTIN_PRESETS:
+        return BUILTIN_PRESETS[key]
+    if custom_presets and key in custom_presets:
+        return build_custom_preset(key, **custom_presets[key])
+    raise KeyError(name)
+
+
+def preset_names(custom_presets: Optional[dict[str, dict[str, float]]] = None) -> list[str]:
+    """
+    Lists every preset available to a guild, starting with "off".
+    """
+    return [NO_FILTERS.name, *BUILTIN_PRESETS, *(custom_presets or {})]
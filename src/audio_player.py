@@ -1,7 +1,14 @@
+import time
+from typing import Any, Optional
+
 import wavelink
 import discord
 from discord.abc import Connectable
 from discord.utils import MISSING
+from audio_filters import BUILTIN_PRESETS, NIGHTCORE_PRESET, NO_FILTERS, PresetFilters, resolve_preset
+from storage.guild_settings_store import GuildSettings
+from track_queue import Track, TrackHistory, TrackQueue, TrackRef, track_store
+from utils.wavelink_internals import adopt_player_state, last_position, set_position
 
 
 class AudioPlayer(wavelink.Player):
@@ -17,28 +24,188 @@ class AudioPlayer(wavelink.Player):
         nodes: list[wavelink.Node] | None = None,
     ):
         super().__init__(client=client, channel=channel, nodes=nodes)
-        self._filters_applied = False
+        # Old history is spilled to the bot's store, a client without one keeps it all in memory
+        self.queue: TrackQueue = TrackQueue(history=TrackHistory(getattr(client, "history_segments", None)))
+        self._filter_preset: Optional[str] = None
+        self._playback_rate = 1.0
+        self._start_offset = 0
+        self.track_started_at: Optional[float] = None
+        self._suspended = False
+
+    @property
+    def position(self) -> int:
+        """
+        Position in the current track in milliseconds, extrapolated locally from the last known position.
+        Unlike the wavelink implementation it is corrected right after seeking, pausing and
+        changing the playback speed, instead of waiting for the next update from Lavalink.
+        """
+        position, updated_at = last_position(self)
+        if self.current is None or not self.connected or updated_at is None:
+            return 0
+        if self.paused:
+            return position
+
+        elapsed = (time.monotonic_ns() - updated_at) / 1_000_000 * self._playback_rate
+        return min(int(position + elapsed), self.current.length)
+
+    def sync_position(self, position: int) -> None:
+        """
+        Sets the last known position, the local clock extrapolates from here on.
+        """
+        set_position(self, position)
+
+    def track_started(self) -> None:
+        """
+        Called when Lavalink reports that a track started playing.
+        """
+        self.track_started_at = time.monotonic()
+        self.sync_position(self._start_offset)
+        self._start_offset = 0
 
     @property
     def filters_applied(self) -> bool:
         """
         Indicates whether audio filters are currently applied.
         """
-        return self._filters_applied
+        return self._filter_preset is not None
+
+    @property
+    def filter_preset(self) -> Optional[str]:
+        """
+        Name of the currently applied filter preset, if any.
+        """
+        return self._filter_preset
+
+    @property
+    def suspended(self) -> bool:
+        """
+        Indicates whether the player is left running for the next process.
+        """
+        return self._suspended
+
+    async def apply_settings(self, settings: GuildSettings) -> None:
+        """
+        Applies stored guild settings to a freshly connected player.
+
+        Args:
+            settings (GuildSettings): The guild's settings.
+        """
+        if settings.volume != self.volume:
+            await self.set_volume(settings.volume)
+        if settings.filter_preset and settings.filter_preset != self._filter_preset:
+            try:
+                await self.apply_filter_preset(resolve_preset(settings.filter_preset, settings.custom_filters))
+            except KeyError:
+                pass
+
+    def snapshot(self) -> dict[str, Any]:
+        """
+        State a restarted bot needs to take the player over, the current track itself stays on Lavalink.
+        """
+        return {
+            "channel_id": self.channel.id,
+            "queue": [track.payload() for track in self.queue],
+            "filter_preset": self._filter_preset,
+            "playback_rate": self._playback_rate,
+            "autoplay": self.autoplay.value,
+        }
+
+    def resume(self, snapshot: dict[str, Any], info: wavelink.PlayerResponsePayload) -> None:
+        """
+        Takes over a player Lavalink kept running for a previous process, without restarting its track.
+
+        Args:
+            snapshot (dict[str, Any]): The state saved by `snapshot` before the restart.
+            info (wavelink.PlayerResponsePayload): The player as Lavalink reports it.
+        """
+        adopt_player_state(self, info)
+        self._filter_preset = snapshot.get("filter_preset")
+        self._playback_rate = snapshot.get("playback_rate", 1.0)
+        self.autoplay = wavelink.AutoPlayMode(snapshot.get("autoplay", wavelink.AutoPlayMode.partial.value))
+        self.queue.put([TrackRef.from_payload(data) for data in snapshot.get("queue", [])])
+        self.track_started_at = time.monotonic()
+        self.sync_position(info.state.position)
+
+    def suspend(self) -> None:
+        """
+        Keeps the Lavalink player and the voice connection running after the bot shuts down.
+        """
+        self._suspended = True
+
+    def cleanup(self) -> None:
+        """
+        Forgets the history along with the voice client, its spilled tracks included.
+        """
+        self.queue.history.clear()
+        super().cleanup()
 
-    async def play_track(self, playable: wavelink.Search, start_time: int = 0) -> None:
+    async def disconnect(self, **kwargs: Any) -> None:
+        """
+        Disconnects the player, a suspended player is only forgotten locally so the next process can resume it.
+        """
+        if self._suspended:
+            self.cleanup()
+            return
+        await super().disconnect(**kwargs)
+
+    async def play(self, track: Track, **kwargs: Any) -> wavelink.Playable:
+        """
+        Plays a track, a `TrackRef` from the queue is loaded in full first. See `wavelink.Player.play`.
+        """
+        if isinstance(track, TrackRef):
+            track = await track_store.load(track, self.node)
+        return await super().play(track, **kwargs)
+
+    async def play_track(self, playable: wavelink.Search, start_time: int = 0, play_next: bool = False) -> None:
         """
         Plays a track, starting at a specific time.
 
         Args:
             playable (wavelink.Search): The track to be played.
             start_time (int): The time (in seconds) to start playback. Defaults to 0.
+            play_next (bool): Put the track at the front of the queue instead of the end. Defaults to False.
         """
         self.autoplay = wavelink.AutoPlayMode.partial
-        await self.queue.put_wait(playable)
+        if play_next:
+            self.queue.put_next(playable)
+        else:
+            await self.queue.put_wait(playable)
         if not self.playing:
+            self._start_offset = start_time
             await self.play(self.queue.get(), start=start_time)
 
+    async def seek_to(self, position: int) -> int:
+        """
+        Seeks within the current track.
+
+        Args:
+            position (int): The target position in milliseconds, clamped to the track length.
+
+        Returns:
+            int: The position that was seeked to.
+        """
+        position = max(0, min(position, self.current.length))
+        await self.seek(position)
+        self.sync_position(position)
+        return position
+
+    async def seek_by(self, offset: int) -> int:
+        """
+        Seeks relative to the current position.
+
+        Args:
+            offset (int): Milliseconds to move forward, negative to move back.
+
+        Returns:
+            int: The position that was seeked to.
+        """
+        return await self.seek_to(self.position + offset)
+
+    async def pause(self, value: bool, /) -> None:
+        # Freeze the extrapolated position when pausing and restart the clock from it when resuming
+        self.sync_position(self.position)
+        await super().pause(value)
+
     async def play_previous_track(self) -> None:
         """
         Plays the previously played track from the queue history.
@@ -49,8 +216,8 @@ class AudioPlayer(wavelink.Player):
         if self.playing:
             current_track = history[-1]
             previous_track = history[-2]
-            queue._queue.appendleft(current_track)  # Moves the current track back to the queue
-            await history.delete(-1)  # Removes the current track from history
+            queue.put_at(0, current_track)  # Moves the current track back to the queue
+            history.delete(-1)  # Removes the current track from history
         else:
             previous_track = history[-1]
 
@@ -63,39 +230,41 @@ class AudioPlayer(wavelink.Player):
         Args:
             index (int): The index of the track in the queue.
         """
-        track = self.queue[index]
-        await self.queue.delete(index)
-        await self.play(track)
+        await self.play(self.queue.get_at(index))
 
     async def play_track_from_history(self, index: int) -> None:
         """
         Plays a specific track from the queue history by index.
 
         Args:
-            index (int): The index of the track in the history.
+            index (int): The index of the track in the whole history, see `TrackHistory.take`.
         """
-        history = self.queue.history
-        track = history[index]
-        await history.delete(index)
-        await self.play(track)
+        await self.play(await self.queue.history.take(index))
+
+    async def apply_filter_preset(self, preset: PresetFilters) -> None:
+        """
+        Replaces the currently applied filters with a preset in a single Lavalink update.
+
+        Args:
+            preset (PresetFilters): The preset to apply, `NO_FILTERS` to disable filters.
+        """
+        if preset is self.filters:
+            return
+
+        await self.set_filters(preset)
+        self.sync_position(self.position)
+        timescale = preset.timescale.payload
+        self._playback_rate = timescale.get("speed", 1.0) * timescale.get("rate", 1.0)
+        self._filter_preset = None if preset is NO_FILTERS else preset.name
 
     async def disable_filters(self) -> None:
         """
         Disables all currently applied audio filters.
         """
-        await self.set_filters()
-        self._filters_applied = False
+        await self.apply_filter_preset(NO_FILTERS)
 
     async def toggle_nightcore_filter(self) -> None:
         """
         Toggles the Nightcore audio filter on or off.
         """
-        if self._filters_applied:
-            await self.set_filters()  # Resets filters to default
-        else:
-            filters = wavelink.Filters()
-            filters.timescale.set(pitch=1.2, speed=1.1, rate=1.0)
-            filters.equalizer.reset()
-            await self.set_filters(filters)
-
-        self._filters_applied = not self._filters_applied
+        await self.apply_filter_preset(NO_FILTERS if self.filters_applied else BUILTIN_PRESETS[NIGHTCORE_PRESET])
@@ -9,6 +9,7 @@ from discord import app_commands
 from discord.ext import commands
 from discord.ext.commands import Context, Greedy
 from discord_bot import DiscordBot
+from utils.metrics import metrics
 
 
 class AdminCog(commands.Cog):
@@ -83,3 +84,64 @@ class AdminCog(commands.Cog):
         await interaction.response.send_message(content="BRB")
         logging.warning("Restart called from guild: %d", interaction.guild.id)
         sys.exit()
+
+    @commands.guild_only()
+    @app_commands.command(name="settings")
+    @app_commands.default_permissions(manage_guild=True)
+    @app_commands.describe(
+        volume="Volume applied when the bot joins a voice channel (0-100)",
+        idle_disconnect_delay="Seconds to wait before leaving an empty voice channel",
+        embed_channel="Channel the player controls are posted to",
+        reset_embed_channel="Post the player controls in the channel of /play again",
+        embed_thread="Post the player controls in a thread the bot creates in the player channel",
+        button_cooldown="Seconds between player button presses",
+    )
+    async def settings(
+        self,
+        interaction: discord.Interaction,
+        volume: Optional[app_commands.Range[int, 0, 100]] = None,
+        idle_disconnect_delay: Optional[app_commands.Range[int, 2, 600]] = None,
+        embed_channel: Optional[discord.TextChannel] = None,
+        reset_embed_channel: Optional[bool] = None,
+        embed_thread: Optional[bool] = None,
+        button_cooldown: Optional[app_commands.Range[float, 0, 10]] = None,
+    ) -> None:
+        """
+        Shows or changes the bot settings of this server.
+        """
+        changes = {
+            key: value
+            for key, value in {
+                "volume": volume,
+                "idle_disconnect_delay": idle_disconnect_delay,
+                "embed_channel_id": embed_channel.id if embed_channel else None,
+                "embed_thread": embed_thread,
+                "button_cooldown": button_cooldown,
+            }.items()
+            if value is not None
+        }
+        if reset_embed_channel:
+            changes["embed_channel_id"] = None
+        settings = await self.bot.guild_settings.update(interaction.guild_id, **changes)
+
+        channel = f"<#{settings.embed_channel_id}>" if settings.embed_channel_id else "channel of /play"
+        if settings.embed_thread:
+            channel = f"thread in {channel}"
+        await interaction.response.send_message(
+            f"Volume: {settings.volume}\n"
+            f"Filter: {settings.filter_preset or 'none'}\n"
+            f"Idle disconnect delay: {settings.idle_disconnect_delay} s\n"
+            f"Player channel: {channel}\n"
+            f"Button cooldown: {settings.button_cooldown} s",
+            ephemeral=True,
+        )
+
+    @commands.guild_only()
+    @app_commands.command(name="metrics")
+    @app_commands.default_permissions(manage_guild=True)
+    async def show_metrics(self, interaction: discord.Interaction) -> None:
+        """
+        Shows the bot's counters and latencies since it started.
+        """
+        report = metrics.report() or "No metrics recorded yet."
+        await interaction.response.send_message(f"```\n{report[:1900]}\n```", ephemeral=True)
@@ -1,22 +1,45 @@
 from __future__ import annotations
 
 import asyncio
+import copy
 from io import BytesIO
+import logging
 import re
+import time
 from typing import cast
 
 import discord
 import wavelink
 from discord import app_commands
 from discord.ext import commands
-from utils.decorators import user_is_in_voice_channel_check
-from utils.endpoints import Endpoints
-from views.audio_player_view import AudioPlayerView
-from exceptions.wavelink_exceptions import YoutubeTrackNotFound, UnexpectedPlayableType
+from utils.concurrency import resolve_while_connecting
+from utils.decorators import (
+    bot_in_voice_channel,
+    checked,
+    checks,
+    is_playing,
+    same_voice_channel,
+    user_in_voice_channel,
+)
+from utils.endpoints import UPLOAD_SUCCESSFUL, Endpoints
+from utils.interactions import acknowledge
+from utils.recent_tracks_index import MAX_CHOICE_LENGTH, RecentTracksIndex
+from utils.search_cache import SearchCache
+from utils.soundboard_index import SOUNDBOARD_PREFIX, SoundboardIndex, display_name
+from utils.timestamps import format_timestamp, parse_timestamp
+from views.audio_player_view import PLAYER_MESSAGE_KEY, AudioPlayerView, PlayerControls
+from exceptions.wavelink_exceptions import LavalinkUnavailable, YoutubeTrackNotFound, UnexpectedPlayableType
+from exceptions.soundboard_exceptions import SoundboardUnavailable
 from exceptions.user_exceptions import SoundboardTrackNotFound
-from exceptions.exception_handler import ExceptionHandler
+from exceptions.exception_handler import LAVALINK_ERRORS
+from audio_filters import MAX_CUSTOM_PRESETS, normalize_preset_name, preset_names, resolve_preset
 from audio_player import AudioPlayer
 from discord_bot import DiscordBot
+from storage.guild_settings_store import GuildSettings
+from storage.play_history_store import PlayRecord
+
+PLAYER_THREAD_KEY = "player_thread"
+PLAYER_THREAD_NAME = "The Boi"
 
 
 class AudioCog(commands.Cog):
@@ -28,61 +51,255 @@ class AudioCog(commands.Cog):
     def __init__(self, bot: DiscordBot) -> None:
         self.bot = bot
         self.views: dict[int, AudioPlayerView] = {}
-        self.exception_handler = ExceptionHandler()
+        self.soundboard_index = SoundboardIndex()
+        self.recent_tracks = RecentTracksIndex()
+        self._pending_soundboard_loads: set[int] = set()
+        self._connecting: dict[int, asyncio.Future[AudioPlayer]] = {}
+        self.search_cache: SearchCache[tuple[wavelink.Playable | wavelink.Playlist, int]] = SearchCache()
+        self.controls = PlayerControls(bot, self.views)
+
+    async def cog_load(self) -> None:
+        """
+        Register the player controls, presses on messages sent before a restart reach the guild's view.
+        """
+        self.bot.add_view(self.controls)
 
-    def __del__(self):
-        for view in self.views.values():
-            if hasattr(view, '__del__'):
-                view.__del__()
+    async def cog_unload(self) -> None:
+        """
+        Remove the player messages while the bot can still reach Discord.
+        Messages of suspended players are left for the next process to take over.
+        """
+        self.controls.stop()
+        for guild_id, view in self.views.items():
+            player = view.text_channel.guild.voice_client
+            try:
+                await view.remove_view(delete_message=not (isinstance(player, AudioPlayer) and player.suspended))
+            except discord.HTTPException as err:
+                logging.warning("Could not remove the player message in guild %s: %s", guild_id, err)
+        self.views.clear()
 
     @commands.cooldown(rate=1, per=1)
     @commands.guild_only()
     @app_commands.command(name="play")
-    @user_is_in_voice_channel_check
-    async def play(self, interaction: discord.Interaction, search: str) -> None:
+    @app_commands.describe(
+        search=f"Search phrase, URL, soundboard number or {SOUNDBOARD_PREFIX}<clip name>",
+        play_next="Put the track at the front of the queue",
+    )
+    @checks(user_in_voice_channel)
+    async def play(self, interaction: discord.Interaction, search: str, play_next: bool = False) -> None:
         """
         Play audio from soundboard or YouTube. Supports search phrases or URLs.
         """
-        await interaction.response.send_message(f"Searching for: {search}...")
-        guild_id = interaction.guild_id
-        user_channel = interaction.user.voice.channel
-
-        player = cast(AudioPlayer, interaction.guild.voice_client)
-        if not player or not player.connected:
-            player = await user_channel.connect(cls=AudioPlayer, timeout=20)
-        elif player.channel != user_channel:
-            await player.move_to(user_channel)
-
-        view = self.views.get(guild_id)
-        if not view:
-            view = AudioPlayerView(self.bot, interaction.channel)
-            self.views[guild_id] = view
+        await acknowledge(interaction, f"Searching for: {search}...")
+        breaker = self.bot.lavalink_breaker
+        if not breaker.allow():
+            await interaction.edit_original_response(content="Audio server is having trouble, try again in a moment!")
+            return
+        if not self.bot.node_supervisor.ready:
+            await interaction.edit_original_response(content="Waiting for the audio server to come back...")
+            try:
+                await self.bot.node_supervisor.wait_until_ready()
+            except LavalinkUnavailable as err:
+                breaker.record_failure()
+                await interaction.edit_original_response(content=self.bot.exception_handler.handle(err, "play"))
+                return
+            await interaction.edit_original_response(content=f"Searching for: {search}...")
 
+        guild_id = interaction.guild_id
+        settings = await self.bot.guild_settings.get(guild_id)
+
+        # Joining the voice channel and resolving the search do not depend on each other,
+        # the bot only stays in the channel if the search succeeds
+        guild = interaction.guild
+        # A connection still being made belongs to an earlier /play, which rolls it back if needed
+        was_connected = guild.voice_client is not None
+        previous_channel = guild.voice_client.channel if was_connected else None
         try:
-            result, start_time = await self.__search_tracks(search, guild_id)
-            response = f"Found: \"{result.name if isinstance(result, wavelink.Playlist) else result.title}\"."
+            player, (result, start_time) = await resolve_while_connecting(
+                self.__resolve_search(search, guild_id),
+                self.__connect_player(guild, checked(interaction).user_channel, settings),
+                lambda: self.__rollback_connect(guild, was_connected, previous_channel),
+            )
+            if isinstance(result, wavelink.Playlist):
+                # Playlists only have extras once they are set, their tracks get a copy
+                result.extras = {"requester_id": interaction.user.id}
+                self.recent_tracks.record(guild_id, result.name, result.url, weight=0.5)
+                response = f"Found: \"{result.name}\"."
+            else:
+                result.extras = {**dict(result.extras), "requester_id": interaction.user.id}
+                self.recent_tracks.record(guild_id, result.title, result.uri, weight=0.5)
+                response = f"Found: \"{result.title}\"."
             await interaction.edit_original_response(content=response)
-            await player.play_track(result, start_time)
+
+            view = self.views.get(guild_id)
+            if not view:
+                text_channel = await self.__player_channel(guild, settings, interaction.channel)
+                view = AudioPlayerView(
+                    self.bot, text_channel or interaction.channel, settings.button_cooldown, repost=not text_channel
+                )
+                # A message left behind in the same channel is edited or replaced, not kept next to a new one
+                stored = await self.bot.state.get(guild_id, PLAYER_MESSAGE_KEY)
+                if stored and stored[0] == view.text_channel.id:
+                    view.reattach(stored[1])
+                self.views[guild_id] = view
+            await player.play_track(result, start_time, play_next)
+            breaker.record_success()
             await view.send_embed()
         except Exception as err:
-            message = self.exception_handler.handle(err)
+            # Only failures of the audio server count towards the breaker, a track that was not found does not
+            if isinstance(err, LAVALINK_ERRORS):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            message = self.bot.exception_handler.handle(err, "play")
             await interaction.edit_original_response(content=message)
 
+    async def __connect_player(
+        self, guild: discord.Guild, channel: discord.VoiceChannel, settings: GuildSettings
+    ) -> AudioPlayer:
+        """
+        Join the user's voice channel, or move there if the bot is connected elsewhere.
+        """
+        player = cast(AudioPlayer, guild.voice_client)
+        connecting = self._connecting.get(guild.id)
+        if connecting:
+            # A second connect would fail while the first one is in progress, wait for it instead
+            return await asyncio.shield(connecting)
+        if not player or not player.connected:
+            connecting = self._connecting[guild.id] = asyncio.ensure_future(
+                channel.connect(cls=AudioPlayer, timeout=20)
+            )
+            try:
+                player = await connecting
+            finally:
+                del self._connecting[guild.id]
+            await player.apply_settings(settings)
+        elif player.channel != channel:
+            await player.move_to(channel)
+        return player
+
+    async def __player_channel(
+        self, guild: discord.Guild, settings: GuildSettings, origin: discord.abc.GuildChannel | None = None
+    ) -> discord.TextChannel | discord.Thread | None:
+        """
+        The channel the guild routes its player to: the configured channel, or a thread of the bot
+        in the configured channel or in the channel of /play. Returns None when the player follows /play.
+        """
+        configured = guild.get_channel(settings.embed_channel_id or 0)
+        configured = configured if isinstance(configured, discord.TextChannel) else None
+        channel = configured or origin
+        if not settings.embed_thread or not isinstance(channel, discord.TextChannel):
+            return configured
+
+        # The thread is reused for as long as it exists, archived threads are not cached
+        thread_id = await self.bot.state.get(guild.id, PLAYER_THREAD_KEY)
+        thread = guild.get_thread(thread_id or 0)
+        try:
+            if not thread and thread_id:
+                thread = await guild.fetch_channel(thread_id)
+            if isinstance(thread, discord.Thread) and thread.parent_id == channel.id:
+                return await thread.edit(archived=False) if thread.archived else thread
+        except discord.NotFound:
+            pass
+        except discord.HTTPException as err:
+            logging.warning("Could not reopen the player thread in guild %s: %s", guild.id, err)
+            return configured
+
+        try:
+            thread = await channel.create_thread(
+                name=PLAYER_THREAD_NAME, type=discord.ChannelType.public_thread, auto_archive_duration=10080
+            )
+        except discord.HTTPException as err:
+            logging.warning("Could not create the player thread in guild %s: %s", guild.id, err)
+            return configured
+        self.bot.state.set(guild.id, PLAYER_THREAD_KEY, thread.id)
+        return thread
+
+    async def __rollback_connect(
+        self, guild: discord.Guild, was_connected: bool, previous_channel: discord.abc.Connectable | None
+    ) -> None:
+        """
+        Leave the voice channel joined by a /play that failed, or go back to the channel it moved the bot from.
+        A connection that was interrupted or timed out also leaves a voice client behind, it is cleaned up here.
+        """
+        player = cast(AudioPlayer, guild.voice_client)
+        if not player:
+            return
+        try:
+            if was_connected and player.connected:
+                if previous_channel and player.channel != previous_channel:
+                    await player.move_to(previous_channel)
+                return
+            await player.disconnect(force=True)
+        except Exception as err:
+            logging.warning("Could not undo joining the voice channel in guild %s: %s", guild.id, err)
+
+    async def __resolve_search(self, search: str, guild_id: int) -> tuple[wavelink.Playable | wavelink.Playlist, int]:
+        """
+        Search for tracks, answering repeated searches from the cache.
+        Soundboard numbers are not cached, they shift whenever a clip is uploaded.
+        Callers get a copy of the cached result, setting its extras does not leak the requester to later hits.
+        """
+        key = (guild_id, search.strip())
+        cached = self.search_cache.get(key)
+        if cached:
+            return _copy_result(cached[0]), cached[1]
+        found = await self.__search_tracks(search, guild_id)
+        if not search.isdigit():
+            self.search_cache.put(key, found)
+        return _copy_result(found[0]), found[1]
+
+    @play.autocomplete("search")
+    async def play_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ) -> list[app_commands.Choice[str]]:
+        """
+        Suggest recently played tracks and soundboard clips matching the partially typed phrase.
+        Answers from local indexes only, the soundboard listing is fetched in the background when missing.
+        """
+        guild_id = interaction.guild_id
+        if not self.soundboard_index.is_loaded(guild_id) and guild_id not in self._pending_soundboard_loads:
+            self._pending_soundboard_loads.add(guild_id)
+            # Not tied to the voice connection, the index is kept while the bot is away
+            self.bot.tasks.spawn(self.__load_soundboard_index(guild_id), name="soundboard-index")
+
+        choices: dict[str, str] = {}
+        for entry in self.recent_tracks.suggest(guild_id, current):
+            choices.setdefault(entry.value, entry.title)
+        for file_name in self.soundboard_index.search(guild_id, current):
+            # Discord rejects the whole response for one value that is too long, such clips are played by number
+            if len(file_name) <= MAX_CHOICE_LENGTH:
+                choices.setdefault(file_name, display_name(file_name)[:MAX_CHOICE_LENGTH])
+
+        return [app_commands.Choice(name=name, value=value) for value, name in list(choices.items())[:25]]
+
+    async def __load_soundboard_index(self, guild_id: int) -> None:
+        """
+        Fetch the guild's soundboard listing off the event loop and index it.
+        """
+        try:
+            soundboard = await Endpoints.get_soundboard(guild_id)
+            if soundboard is not None:
+                self.soundboard_index.load(guild_id, soundboard)
+        finally:
+            self._pending_soundboard_loads.discard(guild_id)
+
     @commands.cooldown(rate=1, per=1)
     @commands.guild_only()
     @app_commands.command(name="skip")
-    @user_is_in_voice_channel_check
+    @checks(user_in_voice_channel, bot_in_voice_channel)
     async def skip(self, interaction: discord.Interaction) -> None:
         """
         Skip the current track.
         """
-        player = cast(AudioPlayer, interaction.guild.voice_client)
+        player = checked(interaction).player
+        await acknowledge(interaction, "Skipping...")
         await player.skip()
 
         if player.queue:
-            await interaction.response.send_message(f"Skipped to: \"{player.current.title}\".")
+            await interaction.edit_original_response(content=f"Skipped to: \"{player.current.title}\".")
         else:
-            await interaction.response.send_message("Track skipped.")
+            await interaction.edit_original_response(content="Track skipped.")
 
     @commands.cooldown(rate=1, per=1)
     @commands.guild_only()
@@ -98,8 +315,100 @@ class AudioCog(commands.Cog):
             )
             return
 
+        await acknowledge(interaction, "Bot disconnected.", ephemeral=True, delete_after=3)
         await self.__remove_view_and_disconnect_player(player)
-        await interaction.response.send_message("Bot disconnected.", ephemeral=True, delete_after=3)
+
+    @commands.guild_only()
+    @app_commands.command(name="seek")
+    @app_commands.describe(position="Time like 1:23 or 83, prefix with + or - to seek from the current position")
+    @checks(same_voice_channel, is_playing)
+    async def seek(self, interaction: discord.Interaction, position: str) -> None:
+        """
+        Seek to a position in the current track.
+        """
+        player = checked(interaction).player
+        if not player.current.is_seekable:
+            await interaction.response.send_message("This track can't be seeked.", ephemeral=True, delete_after=3)
+            return
+
+        try:
+            milliseconds = parse_timestamp(position.lstrip("+-"))
+        except ValueError:
+            await interaction.response.send_message(
+                "Invalid time, use a format like 1:23.", ephemeral=True, delete_after=3
+            )
+            return
+
+        await acknowledge(interaction, "Seeking...", delete_after=15)
+        if position.startswith(("+", "-")):
+            target = await player.seek_by(-milliseconds if position.startswith("-") else milliseconds)
+        else:
+            target = await player.seek_to(milliseconds)
+        await interaction.edit_original_response(content=f"Seeked to {format_timestamp(target)}.")
+        await self.__update_view(interaction.guild_id)
+
+    @commands.guild_only()
+    @app_commands.command(name="move")
+    @app_commands.describe(position="Position of the track in the queue", destination="New position of the track")
+    @checks(same_voice_channel)
+    async def move_track(self, interaction: discord.Interaction, position: int, destination: int) -> None:
+        """
+        Move a queued track to another position.
+        """
+        player = checked(interaction).player
+        if not 1 <= position <= len(player.queue) or destination < 1:
+            await interaction.response.send_message("No such position in the queue.", ephemeral=True, delete_after=3)
+            return
+
+        track = player.queue.move(position - 1, destination - 1)
+        destination = min(destination, len(player.queue))
+        await interaction.response.send_message(f"Moved \"{track.title}\" to position {destination}.", delete_after=15)
+        await self.__update_view(interaction.guild_id)
+
+    @commands.guild_only()
+    @app_commands.command(name="remove")
+    @app_commands.describe(
+        start="Position of the first track to remove",
+        end="Position of the last track to remove, defaults to the first one",
+    )
+    @checks(same_voice_channel)
+    async def remove_tracks(self, interaction: discord.Interaction, start: int, end: int = 0) -> None:
+        """
+        Remove a track or a range of tracks from the queue.
+        """
+        player = checked(interaction).player
+        removed = player.queue.remove_range(start - 1, max(start, end)) if start >= 1 else 0
+        if not removed:
+            await interaction.response.send_message("No such position in the queue.", ephemeral=True, delete_after=3)
+            return
+
+        await interaction.response.send_message(f"Removed {removed} track(s) from the queue.", delete_after=15)
+        await self.__update_view(interaction.guild_id)
+
+    @commands.guild_only()
+    @app_commands.command(name="dedupe")
+    @checks(same_voice_channel)
+    async def dedupe_queue(self, interaction: discord.Interaction) -> None:
+        """
+        Remove repeated tracks from the queue.
+        """
+        player = checked(interaction).player
+        removed = player.queue.dedupe(player.current)
+        await interaction.response.send_message(f"Removed {removed} duplicate track(s).", delete_after=15)
+        if removed:
+            await self.__update_view(interaction.guild_id)
+
+    @commands.guild_only()
+    @app_commands.command(name="shuffle")
+    @checks(same_voice_channel)
+    async def shuffle_queue(self, interaction: discord.Interaction) -> None:
+        """
+        Shuffle the queue, the current track keeps playing.
+        """
+        player = checked(interaction).player
+        player.queue.shuffle()
+        await interaction.response.send_message("Queue shuffled.", delete_after=15)
+        await self.__update_view(interaction.guild_id)
 
     @commands.guild_only()
     @app_commands.command(name="soundboard")
@@ -107,19 +416,23 @@ class AudioCog(commands.Cog):
         """
         List all audio files uploaded to the soundboard.
         """
-        await interaction.response.send_message("Preparing soundboard list...")
-        soundboard = Endpoints.get_soundboard(interaction.guild_id)
+        await acknowledge(interaction, "Preparing soundboard list...")
+        soundboard, fresh = await Endpoints.get_soundboard_listing(interaction.guild_id)
+        status = ""
+        if not fresh:
+            if soundboard is None:
+                await interaction.edit_original_response(content="Soundboard server is unavailable, try again later!")
+                return
+            status = "Soundboard server is unavailable, showing the last known list."
         if not soundboard:
             await interaction.edit_original_response(content="No files uploaded!")
             return
 
-        content = "SOUNDBOARD\n" + "\n".join(
-            f"{i + 1}. {entry.replace('_', ' - ', 1).replace('_', ' ').capitalize().split('.mp3')[0]}"
-            for i, entry in enumerate(soundboard)
-        )
+        self.soundboard_index.load(interaction.guild_id, soundboard)
+        content = "SOUNDBOARD\n" + "\n".join(f"{i + 1}. {display_name(entry)}" for i, entry in enumerate(soundboard))
 
         file = discord.File(BytesIO(content.encode("utf-8")), filename="soundboard.txt")
-        await interaction.edit_original_response(content="", attachments=[file])
+        await interaction.edit_original_response(content=status, attachments=[file])
 
     @commands.guild_only()
     @app_commands.command(name="volume")
@@ -133,12 +446,88 @@ class AudioCog(commands.Cog):
             )
             return
 
+        await self.bot.guild_settings.update(interaction.guild_id, volume=value)
         player = cast(AudioPlayer, interaction.guild.voice_client)
-        if player.connected:
+        if player and player.connected:
+            await acknowledge(interaction, f"Volume set to {value}.", delete_after=15)
             await player.set_volume(value)
-            await interaction.response.send_message(f"Volume set to {value}.", delete_after=15)
         else:
-            await interaction.response.send_message("Bot must be in a voice channel.", ephemeral=True, delete_after=3)
+            await interaction.response.send_message(
+                f"Volume set to {value}, it will be applied when the bot joins a voice channel.", delete_after=15
+            )
+
+    @commands.guild_only()
+    @app_commands.command(name="filter")
+    @app_commands.describe(preset="Filter preset to apply, \"off\" disables filters")
+    @checks(same_voice_channel)
+    async def set_filter(self, interaction: discord.Interaction, preset: str):
+        """
+        Apply an audio filter preset.
+        """
+        settings = await self.bot.guild_settings.get(interaction.guild_id)
+        try:
+            filters = resolve_preset(preset, settings.custom_filters)
+        except KeyError:
+            await interaction.response.send_message("Unknown filter preset.", ephemeral=True, delete_after=3)
+            return
+
+        player = checked(interaction).player
+        await acknowledge(interaction, f"Filter set to {filters.name}.", delete_after=15)
+        await player.apply_filter_preset(filters)
+        await self.bot.guild_settings.update(interaction.guild_id, filter_preset=player.filter_preset)
+        await self.__update_view(interaction.guild_id)
+
+    @set_filter.autocomplete("preset")
+    async def set_filter_autocomplete(
+        self, interaction: discord.Interaction, current: str
+    ) -> list[app_commands.Choice[str]]:
+        """
+        Suggest built-in and custom filter presets.
+        """
+        settings = await self.bot.guild_settings.get(interaction.guild_id)
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in preset_names(settings.custom_filters)
+            if normalize_preset_name(current) in name
+        ][:25]
+
+    @commands.guild_only()
+    @app_commands.command(name="filter_create")
+    @app_commands.describe(
+        speed="Playback speed multiplier",
+        pitch="Pitch multiplier",
+        bass="Gain added to the lowest frequencies",
+        rotation="Stereo rotation speed in Hz, 0 disables it",
+    )
+    async def create_filter(
+        self,
+        interaction: discord.Interaction,
+        name: app_commands.Range[str, 1, 25],
+        speed: app_commands.Range[float, 0.5, 2.0] = 1.0,
+        pitch: app_commands.Range[float, 0.5, 2.0] = 1.0,
+        bass: app_commands.Range[float, -0.25, 1.0] = 0.0,
+        rotation: app_commands.Range[float, 0.0, 5.0] = 0.0,
+    ):
+        """
+        Create or overwrite a custom filter preset for this server.
+        """
+        name = normalize_preset_name(name)
+        settings = await self.bot.guild_settings.get(interaction.guild_id)
+        if name in preset_names():
+            await interaction.response.send_message("This name is reserved.", ephemeral=True, delete_after=3)
+            return
+        if name not in settings.custom_filters and len(settings.custom_filters) >= MAX_CUSTOM_PRESETS:
+            await interaction.response.send_message(
+                f"A server can have at most {MAX_CUSTOM_PRESETS} custom presets.", ephemeral=True, delete_after=3
+            )
+            return
+
+        custom_filters = {
+            **settings.custom_filters,
+            name: {"speed": speed, "pitch": pitch, "bass": bass, "rotation": rotation},
+        }
+        await self.bot.guild_settings.update(interaction.guild_id, custom_filters=custom_filters)
+        await interaction.response.send_message(f"Filter preset \"{name}\" saved.", delete_after=15)
 
     @commands.cooldown(rate=1, per=1)
     @commands.guild_only()
@@ -147,14 +536,16 @@ class AudioCog(commands.Cog):
         """
         Upload an audio file to the soundboard.
         """
-        await interaction.response.send_message("Processing file...")
+        await acknowledge(interaction, "Processing file...")
 
         if not mp3_file.filename.endswith(".mp3"):
             await interaction.edit_original_response(content="Only .mp3 files are allowed.")
             return
 
         file_bytes = await mp3_file.read()
-        result = Endpoints.upload_audio(interaction.guild_id, mp3_file.filename, file_bytes)
+        result = await Endpoints.upload_audio(interaction.guild_id, mp3_file.filename, file_bytes)
+        if result == UPLOAD_SUCCESSFUL:
+            self.soundboard_index.add(interaction.guild_id, mp3_file.filename)
         await interaction.edit_original_response(content=result)
 
     async def __search_tracks(self, search: str, guild_id: int) -> tuple[wavelink.Playable | wavelink.Playlist, int]:
@@ -172,11 +563,26 @@ class AudioCog(commands.Cog):
             raise UnexpectedPlayableType
 
         if search.isdigit():
-            soundboard = Endpoints.get_soundboard(guild_id)
+            soundboard = await Endpoints.get_soundboard(guild_id)
+            if soundboard is None and Endpoints.breaker.open:
+                raise SoundboardUnavailable
             if soundboard and int(search) <= len(soundboard):
-                file_name = soundboard[int(search) - 1]
-                result = await wavelink.Pool.fetch_tracks(f"sounds/{guild_id}/{file_name}")
-                return result[0], start_time
+                if not self.soundboard_index.is_loaded(guild_id):
+                    self.soundboard_index.load(guild_id, soundboard)
+                return await self.__fetch_soundboard_track(soundboard[int(search) - 1], guild_id), start_time
+            raise SoundboardTrackNotFound
+
+        if search.lower().startswith(SOUNDBOARD_PREFIX) and not self.soundboard_index.is_loaded(guild_id):
+            soundboard = await Endpoints.get_soundboard(guild_id)
+            if soundboard is not None:
+                self.soundboard_index.load(guild_id, soundboard)
+            elif Endpoints.breaker.open:
+                raise SoundboardUnavailable
+
+        file_name = self.soundboard_index.resolve(guild_id, search)
+        if file_name:
+            return await self.__fetch_soundboard_track(file_name, guild_id), start_time
+        if search.lower().startswith(SOUNDBOARD_PREFIX):
             raise SoundboardTrackNotFound
 
         video_id_regex = re.search(r"(?:youtu\.be/|youtube\.com/watch\?v=)([\w-]+)", search)
@@ -195,6 +601,25 @@ class AudioCog(commands.Cog):
 
         return result[0], start_time
 
+    async def __fetch_soundboard_track(self, file_name: str, guild_id: int) -> wavelink.Playable:
+        """
+        Load a soundboard file through Lavalink.
+        """
+        result = await wavelink.Pool.fetch_tracks(f"sounds/{guild_id}/{file_name}")
+        if not result:
+            raise SoundboardTrackNotFound
+        track = result[0]
+        track.extras = {"soundboard_file": file_name}
+        return track
+
+    async def __update_view(self, guild_id: int) -> None:
+        """
+        Refresh the guild's player embed, if there is one.
+        """
+        view = self.views.get(guild_id)
+        if view:
+            await view.update_embed()
+
     async def disconnect_player_if_alone_in_channel(self, player: AudioPlayer, delay: int = 2):
         """
         Disconnect the player if it's alone in the voice channel after a delay.
@@ -208,19 +633,116 @@ class AudioCog(commands.Cog):
         Remove the view associated with the guild and disconnect the player.
         """
         guild_id = player.guild.id
+        self.bot.tasks.cancel_guild(guild_id)
         if guild_id in self.views:
-            self.views[guild_id].remove_view()
+            await self.views[guild_id].remove_view()
             del self.views[guild_id]
         await player.disconnect()
 
+    @commands.Cog.listener()
+    async def on_voice_state_update(
+        self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState
+    ):
+        """
+        Triggered when a user's voice state changes, the player leaves once it is alone in its channel.
+        """
+        self.bot.trace.voice_state(member, before, after)
+        player = cast(AudioPlayer, member.guild.voice_client)
+        if player:
+            settings = self.bot.guild_settings.get_cached(member.guild.id)
+            self.bot.tasks.spawn(
+                self.disconnect_player_if_alone_in_channel(player, settings.idle_disconnect_delay),
+                name="idle-disconnect",
+                guild_id=member.guild.id,
+                bounded=False,  # Mostly asleep, it would hold a concurrency slot for the whole delay
+                replace=True,
+            )
+
+    @commands.Cog.listener()
+    async def on_player_resumed(self, player: AudioPlayer, snapshot: dict):
+        """
+        Triggered when a player of the previous process was taken over after a restart.
+        """
+        guild = player.guild
+        settings = await self.bot.guild_settings.get(guild.id)
+        text_channel = guild.get_channel_or_thread(snapshot.get("text_channel_id") or 0)
+        message_id = snapshot.get("message_id") if text_channel else None
+        text_channel = text_channel or await self.__player_channel(guild, settings)
+        if not text_channel:
+            return
+        view = AudioPlayerView(self.bot, text_channel, settings.button_cooldown, repost=snapshot.get("repost", True))
+        self.views[guild.id] = view
+        if message_id:
+            view.reattach(message_id)  # Controllable right away through the player controls, nothing is sent
+        else:
+            await view.send_embed()
+
+    @commands.Cog.listener()
+    async def on_wavelink_track_start(self, payload: wavelink.TrackStartEventPayload):
+        """
+        Triggered when a track starts playing.
+        """
+        if not payload.player:
+            return
+
+        player = cast(AudioPlayer, payload.player)
+        player.track_started()
+        guild_id = player.guild.id
+        track = payload.track
+        soundboard_file = dict(track.extras).get("soundboard_file")
+        if soundboard_file:
+            self.recent_tracks.record(guild_id, display_name(soundboard_file), soundboard_file)
+        else:
+            self.recent_tracks.record(guild_id, track.title, track.uri)
+
     @commands.Cog.listener()
     async def on_wavelink_track_end(self, payload: wavelink.TrackEndEventPayload):
         """
         Triggered when a track finishes playing.
         """
         player = cast(AudioPlayer, payload.player)
+        self.bot.trace.track_end(player.guild.id, payload.reason)
+        self.__record_play(player, payload.track, payload.reason)
         view = self.views.get(player.guild.id)
         await asyncio.sleep(0.1)
         if not player.queue and not player.playing:
             await player.disable_filters()
-        await view.send_embed()
+        if view:
+            await view.send_embed()
+
+    def __record_play(self, player: AudioPlayer, track: wavelink.Playable, reason: str):
+        """
+        Store a finished track in the persistent play history.
+        """
+        started_at, player.track_started_at = player.track_started_at, None
+        if reason == "loadFailed":
+            return
+
+        if reason == "finished":
+            duration_played = track.length
+        elif started_at:
+            duration_played = min(int((time.monotonic() - started_at) * 1000), track.length)
+        else:
+            duration_played = 0
+
+        self.bot.play_history.record(
+            PlayRecord(
+                guild_id=player.guild.id,
+                track_id=track.identifier,
+                title=track.title,
+                uri=track.uri,
+                user_id=dict(track.extras).get("requester_id"),
+                played_at=time.time(),
+                duration_played=duration_played,
+            )
+        )
+
+
+def _copy_result(result: wavelink.Playable | wavelink.Playlist) -> wavelink.Playable | wavelink.Playlist:
+    """
+    Copy of a search result whose extras can be set without touching the original, tracks of a playlist included.
+    """
+    duplicate = copy.copy(result)
+    if isinstance(result, wavelink.Playlist):
+        duplicate.tracks = [copy.copy(track) for track in result.tracks]
+    return duplicate
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+import asyncio
 from datetime import datetime
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 import discord
 from discord import app_commands
@@ -10,6 +11,10 @@ from discord.ext import commands
 if TYPE_CHECKING:
     from __main__ import DiscordBot
 
+REBUKE_KEY = "last_rebuke"
+LEGACY_REBUKE_FILE = "./soundboards/wypomnienie.txt"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
 
 class BaduraCog(commands.Cog):
     """
@@ -20,26 +25,40 @@ class BaduraCog(commands.Cog):
         super().__init__()
         self.bot: DiscordBot = bot
 
+    @commands.guild_only()
     @app_commands.command(name="wypomnienie")
     async def update_rebuke(self, interaction: discord.Interaction) -> None:
         """
         Update wypomnienie
         """
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        with open("./soundboards/wypomnienie.txt", "w+") as file:
-            file.write(timestamp)
+        self.bot.state.set(interaction.guild_id, REBUKE_KEY, datetime.now().strftime(TIMESTAMP_FORMAT))
         await interaction.response.send_message("Wypomnienie zostało zaktualizowane.")
 
+    @commands.guild_only()
     @app_commands.command(name="kiedy_wypomnienie")
     async def get_last_rebuke(self, interaction: discord.Interaction) -> None:
         """
         Command to get last wypomnienie
         """
-        with open("./soundboards/wypomnienie.txt", "r") as file:
-            last_rebuke = file.read()
-        last_rebuke_time = datetime.strptime(last_rebuke, "%Y-%m-%d %H:%M:%S")
-        time_difference = datetime.now() - last_rebuke_time
+        last_rebuke = await self.bot.state.get(interaction.guild_id, REBUKE_KEY)
+        if last_rebuke is None:
+            last_rebuke = await asyncio.to_thread(_read_legacy_rebuke)
+            if last_rebuke is None:
+                await interaction.response.send_message("Nie było jeszcze wypomnienia.")
+                return
+            self.bot.state.set(interaction.guild_id, REBUKE_KEY, last_rebuke)
+
+        time_difference = datetime.now() - datetime.strptime(last_rebuke, TIMESTAMP_FORMAT)
         await interaction.response.send_message(
             f"""Ostatnie wypomnienie było {time_difference.days} dni, {time_difference.seconds // 3600}
             godzin i {time_difference.seconds % 3600 // 60} minut temu."""
         )
+
+
+def _read_legacy_rebuke() -> Optional[str]:
+    # Rebukes used to be kept in a text file shared by all guilds
+    try:
+        with open(LEGACY_REBUKE_FILE, "r") as file:
+            return file.read().strip() or None
+    except OSError:
+        return None
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import datetime
+from typing import Optional
+
+import discord
+from discord import app_commands
+from discord.ext import commands
+from discord_bot import DiscordBot
+
+HISTORY_PAGE_SIZE = 15
+
+
+class StatsCog(commands.Cog):
+    """
+    Cog for commands reading the persistent play history.
+    """
+
+    def __init__(self, bot: DiscordBot) -> None:
+        super().__init__()
+        self.bot = bot
+
+    @commands.guild_only()
+    @app_commands.command(name="stats")
+    async def stats(self, interaction: discord.Interaction) -> None:
+        """
+        Show play statistics of this server.
+        """
+        await interaction.response.defer()
+        stats = await self.bot.play_history.guild_stats(interaction.guild_id)
+        if not stats.plays:
+            await interaction.edit_original_response(content="Nothing has been played yet.")
+            return
+
+        hours, remainder = divmod(stats.total_duration // 1000, 3600)
+        lines = [
+            f"Plays: {stats.plays}",
+            f"Unique tracks: {stats.unique_tracks}",
+            f"Listeners: {stats.listeners}",
+            f"Time played: {hours} hr {remainder // 60} min",
+        ]
+        if stats.top_user_id:
+            lines.append(f"Top DJ: <@{stats.top_user_id}>")
+
+        embed = discord.Embed(title='Server stats', description="\n".join(lines), color=0x00FF00)
+        await interaction.edit_original_response(embed=embed, allowed_mentions=discord.AllowedMentions.none())
+
+    @commands.guild_only()
+    @app_commands.command(name="top")
+    @app_commands.describe(days="Only count plays from the last given days")
+    async def top(self, interaction: discord.Interaction, days: Optional[app_commands.Range[int, 1, 365]] = None):
+        """
+        Show the most played tracks on this server.
+        """
+        await interaction.response.defer()
+        tracks = await self.bot.play_history.top_tracks(interaction.guild_id, days=days)
+        if not tracks:
+            await interaction.edit_original_response(content="Nothing has been played yet.")
+            return
+
+        description = "\n".join(f"{i + 1}. {track.title} ({track.plays} plays)" for i, track in enumerate(tracks))
+        title = f'Top tracks (last {days} days)' if days else 'Top tracks'
+        await interaction.edit_original_response(embed=discord.Embed(title=title, description=description))
+
+    @commands.guild_only()
+    @app_commands.command(name="history")
+    async def history(self, interaction: discord.Interaction, page: app_commands.Range[int, 1, 1000] = 1):
+        """
+        Show previously played tracks on this server, newest first.
+        """
+        await interaction.response.defer(ephemeral=True)
+        plays = await self.bot.play_history.history_page(interaction.guild_id, page - 1, HISTORY_PAGE_SIZE)
+        if not plays:
+            await interaction.edit_original_response(content="No plays on this page.")
+            return
+
+        start = (page - 1) * HISTORY_PAGE_SIZE
+        description = "\n".join(
+            f"{start + i + 1}. {play.title} - <t:{int(play.played_at)}:R>" for i, play in enumerate(plays)
+        )
+        embed = discord.Embed(
+            title=f'History (page {page})',
+            description=description,
+            timestamp=datetime.datetime.now(datetime.timezone.utc),
+        )
+        await interaction.edit_original_response(embed=embed)
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Optional
 
 import discord
 from discord import app_commands
@@ -9,6 +9,9 @@ from discord.ext import commands
 if TYPE_CHECKING:
     from __main__ import DiscordBot
 
+# Embedded images are shown at most about 400 pixels wide, the CDN serves sizes that are powers of two
+AVATAR_SIZE = 512
+
 
 class UserCog(commands.Cog):
     """
@@ -20,11 +23,12 @@ class UserCog(commands.Cog):
         self.bot: DiscordBot = bot
 
     @app_commands.command(name="avatar")
-    async def avatar(self, interaction: discord.Interaction, member: discord.Member = None) -> None:
+    @app_commands.describe(member="Whose avatar to show, yours by default")
+    async def avatar(self, interaction: discord.Interaction, member: Optional[discord.Member] = None) -> None:
         """
         Command to get user avatar
         """
-        avatar_url = member.avatar.url
         embed = discord.Embed()
-        embed.set_image(url=avatar_url)
+        # The displayed avatar is the guild avatar of members that have one
+        embed.set_image(url=(member or interaction.user).display_avatar.with_size(AVATAR_SIZE).url)
         await interaction.response.send_message(embed=embed)
@@ -1,11 +1,28 @@
+import asyncio
+import importlib
 import logging
 import os
-from types import TracebackType
-from typing import Optional, Type
+from typing import Optional, Sequence
 
+import discord
 import wavelink
 from discord import Intents
+from discord import app_commands
 from discord.ext import commands
+from exceptions.exception_handler import ExceptionHandler
+from storage.database import Database
+from storage.guild_settings_store import GuildSettingsStore
+from storage.history_segment_store import HistorySegmentStore
+from storage.play_history_store import PlayHistoryStore
+from storage.shared_state import shared_state
+from storage.state_store import StateStore
+from utils.circuit_breaker import CircuitBreaker
+from utils.node_supervisor import NodeSupervisor
+from utils.rest_budget import RestBudget
+from utils.session_resume import SessionResumer
+from utils.startup_profiler import StartupProfiler
+from utils.task_supervisor import TaskSupervisor
+from utils.trace_recorder import TraceRecorder
 
 
 class DiscordBot(commands.Bot):
@@ -13,7 +30,12 @@ class DiscordBot(commands.Bot):
     Extends the default bot class functionality.
     """
 
-    def __init__(self) -> None:
+    def __init__(self, cogs: Sequence[tuple[str, str]] = (), profiler: Optional[StartupProfiler] = None) -> None:
+        """
+        Args:
+            cogs (Sequence[tuple[str, str]]): Module and class names of the cogs, imported after login.
+            profiler (Optional[StartupProfiler]): Records the duration of each startup phase.
+        """
         intents = Intents.default()
         intents.message_content = True  # Enables the bot to access message content.
         super().__init__(
@@ -21,31 +43,126 @@ class DiscordBot(commands.Bot):
             description="The Boi is back",
             intents=intents,
         )
+        self.cog_specs = cogs
+        self.startup = profiler or StartupProfiler()
+        self.database = Database(os.getenv("DATABASE_PATH", "./data/wkk_bot.sqlite3"))
+        self.play_history = PlayHistoryStore(self.database)
+        self.guild_settings = GuildSettingsStore(self.database)
+        self.state = StateStore(self.database)
+        self.history_segments = HistorySegmentStore(
+            self.database, memory_limit=int(os.getenv("HISTORY_MEMORY_LIMIT") or 500)
+        )
+        self.node_supervisor = NodeSupervisor(self)
+        self.tasks = TaskSupervisor()
+        self.rest_budget = RestBudget(self.tasks)
+        self.exception_handler = ExceptionHandler()
+        self.lavalink_breaker = CircuitBreaker("lavalink")
+        self.session_resumer = SessionResumer(self)
+        self.trace = TraceRecorder(self.tasks, os.getenv("TRACE_PATH") or None)
+        self.tree.error(self.on_app_command_error)
 
-    async def __aexit__(
-        self,
-        exc_type: Optional[Type[BaseException]],
-        exc_value: Optional[BaseException],
-        traceback: Optional[TracebackType],
-    ) -> None:
+    async def close(self) -> None:
         """
-        Clean up resources and run destructors for cogs, if defined.
+        Finish background work while the Discord connection is still open, then flush persistent stores.
+        Cogs clean up after themselves in `cog_unload`.
         """
-        for cog in self.cogs.values():
-            if hasattr(cog, "__del__"):
-                cog.__del__()  # Call explicitly to ensure cleanup.
-        await super().__aexit__(exc_type, exc_value, traceback)
+        self.node_supervisor.close()
+        self.session_resumer.suspend()
+        await self.tasks.close()
+        await self.trace.close()
+        await super().close()
+        await self.play_history.close()
+        await self.guild_settings.close()
+        await self.state.close()
+        await self.history_segments.close()
+        await shared_state.close()
+        await self.database.close()
 
     async def setup_hook(self) -> None:
         """
-        Connect to the Lavalink server during bot setup.
+        Open the local database, everything else is started in the background
+        so the gateway connection is not held up by it.
         """
+        with self.startup.phase("database"):
+            await self.database.connect()
+            await self.play_history.start()
+            await self.guild_settings.start()
+            await self.state.start()
+            await self.history_segments.start()
+            shared_state.connect(os.getenv("STATE_BACKEND_URL"))
+
+        self.tasks.spawn(self._load_cogs(), name="load-cogs", bounded=False)
+        self.tasks.spawn(self._load_native_libraries(), name="load-native-libraries", bounded=False)
+        self.startup.begin("lavalink")
+
+        # Connection attempts fail fast, the supervisor retries them with its own backoff
         node_url = f"{os.getenv('WAVELINK_URL')}:{os.getenv('WAVELINK_PORT')}"
-        node = wavelink.Node(uri=node_url, password=os.getenv('WAVELINK_PASSWORD'))
-
-        try:
-            await wavelink.Pool.connect(client=self, nodes=[node])
-            logging.info("Connected to Lavalink server successfully.")
-        except wavelink.exceptions.WavelinkException as err:
-            logging.warning("Could not connect to the Lavalink server.")
-            logging.warning(err)
+        node = wavelink.Node(
+            uri=node_url,
+            password=os.getenv('WAVELINK_PASSWORD'),
+            retries=0,
+            resume_timeout=self.session_resumer.resume_timeout,
+        )
+        self.node_supervisor.session_id = await self.session_resumer.saved_session()
+        self.node_supervisor.start(node)
+
+    async def on_app_command_error(
+        self, interaction: discord.Interaction, error: app_commands.AppCommandError
+    ) -> None:
+        """
+        Report errors of every app command, commands handle the errors they expect themselves.
+        """
+        await self.exception_handler.respond(interaction, error)
+
+    async def on_interaction(self, interaction: discord.Interaction) -> None:
+        """
+        Record slash commands in the traffic trace, components are recorded by their views.
+        """
+        self.trace.interaction(interaction)
+
+    async def on_wavelink_node_ready(self, payload: wavelink.NodeReadyEventPayload) -> None:
+        """
+        Release commands waiting for the Lavalink node.
+        """
+        logging.info("Connected to Lavalink server successfully.")
+        self.node_supervisor.session_id = payload.session_id
+        self.session_resumer.session_ready(payload)
+        self.node_supervisor.node_ready()
+        self.startup.end("lavalink")
+
+    async def _load_cogs(self) -> None:
+        with self.startup.phase("cogs"):
+            for module_name, class_name in self.cog_specs:
+                try:
+                    module = importlib.import_module(module_name)
+                    await self.add_cog(getattr(module, class_name)(self))
+                except Exception as err:
+                    logging.error("Could not load cog %s.%s: %s", module_name, class_name, err)
+
+    async def _load_native_libraries(self) -> None:
+        # Audio is decoded by Lavalink, local ffmpeg and Opus are not needed to go online
+        with self.startup.phase("ffmpeg"):
+            try:
+                await asyncio.to_thread(_add_ffmpeg_paths)
+            except Exception as err:
+                logging.error("Could not install ffmpeg: %s", err)
+        with self.startup.phase("opus"):
+            await asyncio.to_thread(_load_opus)
+        if not discord.opus.is_loaded():
+            logging.error("Failed to load Opus library.")
+
+
+def _add_ffmpeg_paths() -> None:
+    import static_ffmpeg  # Imported lazily, it may unpack its binaries on first use
+
+    static_ffmpeg.add_paths()
+
+
+def _load_opus() -> None:
+    try:
+        if os.name == 'nt':
+            discord.opus._load_default()
+        elif os.name == 'posix':
+            discord.opus.load_opus('libopus.so.0')
+    except OSError as err:
+        logging.error("Could not load Opus library: %s", err)
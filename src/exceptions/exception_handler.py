@@ -1,21 +1,146 @@
 import logging
-from exceptions.user_exceptions import SoundboardTrackNotFound
-from exceptions.wavelink_exceptions import UnexpectedPlayableType, YoutubeTrackNotFound
+import time
+from typing import Optional
+
+import discord
+import wavelink
+from discord import app_commands
+from exceptions.soundboard_exceptions import SoundboardUnavailable
+from exceptions.user_exceptions import SoundboardTrackNotFound, UserException
+from exceptions.wavelink_exceptions import (
+    LavalinkUnavailable,
+    UnexpectedPlayableType,
+    WavelinkPlayerException,
+    YoutubeTrackNotFound,
+)
+from utils.metrics import metrics
+
+UNEXPECTED_ERROR = "Unexpected error occured!"
+
+# Exceptions that mean the Lavalink node, rather than the request, failed
+LAVALINK_ERRORS = (
+    LavalinkUnavailable,
+    wavelink.LavalinkException,
+    wavelink.LavalinkLoadException,
+    wavelink.NodeException,
+    wavelink.InvalidNodeException,
+)
 
 
 class ExceptionHandler(Exception):
-    def handle(self, err) -> str:
-        logging.error(err)
-        if isinstance(err, YoutubeTrackNotFound):
-            return "Youtube track not found!"
-        if isinstance(err, SoundboardTrackNotFound):
-            return "Soundboard track not found!"
-        if isinstance(err, UnexpectedPlayableType):
-            return "Server returned unexpected type!"
-        if isinstance(err, SyntaxError):
-            return "No argument passed!"
-        if isinstance(err, IndexError):
-            return "No such index in soundboard!"
-        if isinstance(err, TypeError):
-            return "Type error!"
-        return "Unexpected error occured!"
+    """
+    Turns exceptions into user-facing messages, logs them and counts them per source and type.
+    Messages are looked up in a registry by the closest registered base class. Expected exceptions
+    are logged in one line, unexpected ones with their traceback. A traceback seen again within
+    `log_window` seconds is only counted, the count is logged with its next traceback.
+
+    Metrics:
+        errors: All handled exceptions.
+        errors.source.<source>: Exceptions by command or component.
+        errors.type.<type>: Exceptions by type.
+    """
+
+    messages: dict[type, str] = {
+        YoutubeTrackNotFound: "Youtube track not found!",
+        SoundboardTrackNotFound: "Soundboard track not found!",
+        SoundboardUnavailable: "Soundboard server is unavailable, try again later!",
+        UnexpectedPlayableType: "Server returned unexpected type!",
+        LavalinkUnavailable: "Audio server is unavailable, try again later!",
+        wavelink.ChannelTimeoutException: "Could not join the voice channel, try again!",
+        wavelink.LavalinkLoadException: "Audio server could not load the track!",
+        app_commands.CommandOnCooldown: "Slow down, try again in a moment!",
+        app_commands.NoPrivateMessage: "This command only works in a server!",
+        app_commands.MissingPermissions: "You are not allowed to use this command!",
+        SyntaxError: "No argument passed!",
+        IndexError: "No such index in soundboard!",
+        TypeError: "Type error!",
+    }
+    # Exceptions caused by the request, not by a bug
+    expected: tuple[type, ...] = (
+        UserException,
+        WavelinkPlayerException,
+        SoundboardUnavailable,
+        wavelink.ChannelTimeoutException,
+        app_commands.CheckFailure,
+    )
+    log_window: float = 60.0
+
+    def __init__(self) -> None:
+        self._resolved: dict[type, str] = {}
+        self._seen: dict[tuple, list] = {}
+
+    def register(self, exception_type: type, message: str) -> None:
+        """
+        Registers the message shown for an exception type and its subclasses.
+        """
+        self.messages = {**self.messages, exception_type: message}
+        self._resolved.clear()
+
+    def message(self, err: BaseException) -> str:
+        """
+        Returns the user-facing message of an exception.
+        """
+        err_type = type(err)
+        message = self._resolved.get(err_type)
+        if message is None:
+            message = next((self.messages[base] for base in err_type.__mro__ if base in self.messages), None)
+            message = self._resolved[err_type] = message or UNEXPECTED_ERROR
+        return message
+
+    def handle(self, err: BaseException, source: str = "unknown") -> str:
+        """
+        Records an exception and returns its user-facing message.
+
+        Args:
+            err (BaseException): The exception.
+            source (str): The command or component it came from.
+
+        Returns:
+            str: The message to show the user.
+        """
+        # The interesting part of an app command error is the exception raised by the command
+        if isinstance(err, app_commands.CommandInvokeError):
+            err = err.original
+        metrics.increment("errors")
+        metrics.increment(f"errors.source.{source}")
+        metrics.increment(f"errors.type.{type(err).__name__}")
+        self._log(err, source)
+        return self.message(err)
+
+    async def respond(
+        self, interaction: discord.Interaction, err: BaseException, source: Optional[str] = None
+    ) -> None:
+        """
+        Handles an exception raised while processing an interaction and tells the user about it.
+        """
+        if source is None:
+            source = interaction.command.name if interaction.command else (interaction.data or {}).get("custom_id")
+        message = self.handle(err, source or "unknown")
+        try:
+            if interaction.response.is_done():
+                await interaction.followup.send(message, ephemeral=True)
+            else:
+                await interaction.response.send_message(message, ephemeral=True, delete_after=5)
+        except discord.HTTPException as http_err:
+            logging.warning("Could not report an error to the user: %s", http_err)
+
+    def _log(self, err: BaseException, source: str) -> None:
+        if isinstance(err, self.expected):
+            logging.info("%s in %s: %s", type(err).__name__, source, err)
+            return
+
+        # Tracebacks are told apart by the line that raised them
+        tb = err.__traceback__
+        while tb and tb.tb_next:
+            tb = tb.tb_next
+        signature = (type(err), source, tb.tb_frame.f_code.co_filename if tb else None, tb.tb_lineno if tb else None)
+        now = time.monotonic()
+        seen = self._seen.get(signature)
+        if seen and now - seen[0] < self.log_window:
+            seen[1] += 1
+            return
+
+        if seen and seen[1]:
+            logging.error("%s in %s repeated %d more times.", type(err).__name__, source, seen[1])
+        self._seen[signature] = [now, 0]
+        logging.error("%s in %s: %s", type(err).__name__, source, err, exc_info=err)
@@ -0,0 +1,4 @@
+class SoundboardUnavailable(Exception):
+    """
+    Exception for when the soundboard server is down and no listing of the guild is cached
+    """
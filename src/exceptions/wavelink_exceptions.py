@@ -14,3 +14,9 @@ class UnexpectedPlayableType(WavelinkPlayerException):
     """
     Exception for when WavelinkPlayer returned unexpected Playable type
     """
+
+
+class LavalinkUnavailable(WavelinkPlayerException):
+    """
+    Exception for when no Lavalink node became ready in time
+    """
@@ -5,14 +5,19 @@ import signal
 import sys
 
 import discord
-import static_ffmpeg
 from dotenv import load_dotenv
 
-from cogs.audio_cog import AudioCog
-from cogs.admin_cog import AdminCog
-from cogs.user_cog import UserCog
-from cogs.badura_cog import BaduraCog
 from discord_bot import DiscordBot
+from utils.startup_profiler import StartupProfiler
+
+# Cogs are imported after login, see DiscordBot.setup_hook
+COGS = (
+    ("cogs.admin_cog", "AdminCog"),
+    ("cogs.user_cog", "UserCog"),
+    ("cogs.audio_cog", "AudioCog"),
+    ("cogs.badura_cog", "BaduraCog"),
+    ("cogs.stats_cog", "StatsCog"),
+)
 
 # Logger setup
 logging.basicConfig(
@@ -22,39 +27,16 @@ logging.basicConfig(
     handlers=[logging.FileHandler("info.log"), logging.StreamHandler()],
 )
 
-# Load environment variables and dependencies
-load_dotenv()
-static_ffmpeg.add_paths()
-
-# Load Opus library based on OS
-if os.name == 'nt':
-    discord.opus._load_default()
-elif os.name == 'posix':
-    discord.opus.load_opus('libopus.so.0')
-
-if not discord.opus.is_loaded():
-    raise RuntimeError('Failed to load Opus library.')
-
 
 class Bot:
     """
     Main Bot class
     """
 
-    def __init__(self) -> None:
-        self.bot = DiscordBot()
-        self._initialize_cogs()
+    def __init__(self, profiler: StartupProfiler) -> None:
+        self.bot = DiscordBot(COGS, profiler)
         self._initialize_events()
 
-    def _initialize_cogs(self):
-        """
-        Initialize and configure all bot cogs.
-        """
-        self.admin_cog = AdminCog(self.bot)
-        self.audio_cog = AudioCog(self.bot)
-        self.user_cog = UserCog(self.bot)
-        self.badura_cog = BaduraCog(self.bot)
-
     def _initialize_events(self):
         """
         Configure bot events.
@@ -67,15 +49,7 @@ class Bot:
             """
             logging.info("Logged in as %s (ID: %d)", self.bot.user, self.bot.user.id)
             logging.info("Bot is ready and operational.")
-
-        @self.bot.event
-        async def on_voice_state_update(member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
-            """
-            Event triggered when a user's voice state changes.
-            """
-            player = member.guild.voice_client
-            if player:
-                await self.audio_cog.disconnect_player_if_alone_in_channel(player, 10)
+            self.bot.startup.mark_ready()
 
     async def run(self):
         """
@@ -84,11 +58,10 @@ class Bot:
         discord.utils.setup_logging(level=logging.WARNING, root=False)
 
         async with self.bot:
-            await self.bot.add_cog(self.admin_cog)
-            await self.bot.add_cog(self.user_cog)
-            await self.bot.add_cog(self.audio_cog)
-            await self.bot.add_cog(self.badura_cog)
-            await self.bot.start(os.getenv("BOT_TOKEN"))
+            # Same as bot.start(), split to time the login, the gateway connection is covered by time to ready
+            with self.bot.startup.phase("login"):
+                await self.bot.login(os.getenv("BOT_TOKEN"))
+            await self.bot.connect()
 
 
 def sigterm_handler(signum, frame):
@@ -103,10 +76,14 @@ def main():
     """
     Entry point of the script.
     """
+    profiler = StartupProfiler()
     logging.info("Starting bot...")
 
+    with profiler.phase("environment"):
+        load_dotenv()
+
     # Instantiate and run the bot
-    bot = Bot()
+    bot = Bot(profiler)
     try:
         asyncio.run(bot.run())
     except KeyboardInterrupt:
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class Database:
+    """
+    Asynchronous wrapper around a single SQLite connection running in WAL mode.
+    Every statement runs on one dedicated worker thread, so the event loop never blocks on disk I/O
+    and the connection is never shared between threads.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._connection: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite")
+
+    async def connect(self) -> None:
+        """
+        Opens the database file, creating its directory if needed, and enables WAL journaling.
+        """
+        if self._connection:
+            return
+        self._connection = await self._run(self._open)
+        logging.info("Opened database at %s.", self.path)
+
+    def _open(self) -> sqlite3.Connection:
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        connection = sqlite3.connect(self.path, check_same_thread=False)
+        connection.row_factory = sqlite3.Row
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    async def close(self) -> None:
+        """
+        Closes the connection and stops the worker thread.
+        """
+        if self._connection:
+            await self._run(self._connection.close)
+            self._connection = None
+        self._executor.shutdown(wait=True)
+
+    async def executescript(self, script: str) -> None:
+        """
+        Runs several SQL statements at once, used for schema creation.
+        """
+        await self._run(lambda: self._require_connection().executescript(script))
+
+    async def executemany(self, sql: str, rows: Iterable[Iterable[Any]]) -> None:
+        """
+        Runs a statement for every row inside a single transaction.
+
+        Args:
+            sql (str): The parameterized statement.
+            rows (Iterable[Iterable[Any]]): Parameters for each execution.
+        """
+
+        def write() -> None:
+            with self._require_connection() as connection:
+                connection.executemany(sql, rows)
+
+        await self._run(write)
+
+    async def execute(self, sql: str, parameters: Iterable[Any] = ()) -> None:
+        """
+        Runs a single write statement inside its own transaction.
+        """
+
+        def write() -> None:
+            with self._require_connection() as connection:
+                connection.execute(sql, tuple(parameters))
+
+        await self._run(write)
+
+    async def fetchall(self, sql: str, parameters: Iterable[Any] = ()) -> list[sqlite3.Row]:
+        """
+        Runs a query and returns every resulting row.
+        """
+        return await self._run(lambda: self._require_connection().execute(sql, tuple(parameters)).fetchall())
+
+    async def fetchone(self, sql: str, parameters: Iterable[Any] = ()) -> Optional[sqlite3.Row]:
+        """
+        Runs a query and returns the first resulting row, if any.
+        """
+        return await self._run(lambda: self._require_connection().execute(sql, tuple(parameters)).fetchone())
+
+    def _require_connection(self) -> sqlite3.Connection:
+        if not self._connection:
+            raise RuntimeError("Database is not connected.")
+        return self._connection
+
+    async def _run(self, func: Callable[[], T]) -> T:
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func)
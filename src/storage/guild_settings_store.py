@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from storage.shared_state import shared_state
+from storage.write_behind import WriteBehindStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS guild_settings (
+    guild_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+"""
+
+
+@dataclass
+class GuildSettings:
+    """Per-guild player settings"""
+
+    volume: int = 100
+    filter_preset: Optional[str] = None
+    idle_disconnect_delay: int = 10
+    embed_channel_id: Optional[int] = None
+    embed_thread: bool = False
+    button_cooldown: float = 1.0
+    custom_filters: dict[str, dict[str, float]] = field(default_factory=dict)
+
+    @classmethod
+    def from_json(cls, data: str) -> GuildSettings:
+        """
+        Loads settings from their stored form, ignoring keys that are no longer known.
+        """
+        known = {settings_field.name for settings_field in dataclasses.fields(cls)}
+        return cls(**{key: value for key, value in json.loads(data).items() if key in known})
+
+    def to_json(self) -> str:
+        """
+        Serializes settings to their stored form.
+        """
+        return json.dumps(dataclasses.asdict(self))
+
+
+class GuildSettingsStore(WriteBehindStore[int]):
+    """
+    Durable per-guild settings with a read-through in-memory cache.
+    Reads hit the database only once per guild, changes are applied to the cache immediately
+    and persisted in batches. Changes are also published to the shared state, a guild moved to another
+    process picks up its latest settings before they reach the database.
+    """
+
+    schema = SCHEMA
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._cache: dict[int, GuildSettings] = {}
+
+    async def get(self, guild_id: int) -> GuildSettings:
+        """
+        Returns the guild's settings, loading them from the database on a cache miss.
+
+        Args:
+            guild_id (int): The ID of the guild.
+
+        Returns:
+            GuildSettings: The cached settings object, defaults if the guild has none stored.
+        """
+        settings = self._cache.get(guild_id)
+        if settings:
+            return settings
+
+        data = await shared_state.guild_settings(guild_id)
+        if data is None:
+            row = await self.database.fetchone("SELECT data FROM guild_settings WHERE guild_id = ?", (guild_id,))
+            data = row["data"] if row else None
+        # Another coroutine may have populated the cache while the query was running
+        settings = self._cache.get(guild_id)
+        if not settings:
+            settings = GuildSettings.from_json(data) if data else GuildSettings()
+            self._cache[guild_id] = settings
+        return settings
+
+    def get_cached(self, guild_id: int) -> GuildSettings:
+        """
+        Returns the guild's settings without touching the database, defaults if they were never loaded.
+        """
+        return self._cache.get(guild_id) or GuildSettings()
+
+    async def update(self, guild_id: int, **changes: Any) -> GuildSettings:
+        """
+        Changes some of the guild's settings and schedules them to be persisted.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            **changes: New values for `GuildSettings` fields.
+
+        Returns:
+            GuildSettings: The updated settings.
+        """
+        settings = await self.get(guild_id)
+        for key, value in changes.items():
+            if not hasattr(settings, key):
+                raise AttributeError(f"Unknown guild setting: {key}")
+            setattr(settings, key, value)
+
+        if guild_id not in self._pending:
+            self._enqueue(guild_id)
+        await shared_state.put_guild_settings(guild_id, settings.to_json())
+        return settings
+
+    async def _write_batch(self, batch: list[int]) -> None:
+        await self.database.executemany(
+            "INSERT INTO guild_settings (guild_id, data) VALUES (?, ?) "
+            "ON CONFLICT (guild_id) DO UPDATE SET data = excluded.data",
+            [(guild_id, self._cache[guild_id].to_json()) for guild_id in batch],
+        )
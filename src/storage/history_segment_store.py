@@ -0,0 +1,122 @@
+from __future__ import annotations
+
+import itertools
+import json
+from collections import OrderedDict
+from typing import Any
+
+from storage.write_behind import WriteBehindStore
+from track_queue import TrackRef
+from utils.metrics import metrics
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history_segments (
+    session INTEGER NOT NULL,
+    segment INTEGER NOT NULL,
+    tracks TEXT NOT NULL,
+    PRIMARY KEY (session, segment)
+);
+"""
+
+_FORGOTTEN = -1  # Segment number of a batch item that deletes a whole session
+
+
+class HistorySegmentStore(WriteBehindStore[tuple[int, int]]):
+    """
+    Played tracks spilled from the in-memory history of the players, in segments of `segment_size` tracks.
+    Segments are served from memory until their batch is written, and read back one at a time when a page
+    of old history is shown. Each player history is a session of its own that only lives as long as the player,
+    the table is emptied on start.
+
+    Metrics:
+        history.spilled: Segments moved out of memory.
+        history.segment_reads: Segments read back from the database.
+    """
+
+    schema = SCHEMA
+    segment_size = 100
+    read_cache_size = 16
+
+    def __init__(self, *args: Any, memory_limit: int = 500, **kwargs: Any) -> None:
+        """
+        Args:
+            memory_limit (int): Tracks a history keeps in memory, at least `segment_size`. Defaults to 500.
+        """
+        super().__init__(*args, **kwargs)
+        self.memory_limit = max(memory_limit, self.segment_size)
+        self._unwritten: dict[tuple[int, int], list[TrackRef]] = {}
+        self._read_cache: OrderedDict[tuple[int, int], list[TrackRef]] = OrderedDict()
+        self._sessions = itertools.count(1)
+
+    async def start(self) -> None:
+        await super().start()
+        await self.database.execute("DELETE FROM history_segments")
+
+    async def close(self) -> None:
+        # Histories do not outlive the process, there is no point in writing what is left
+        self._pending.clear()
+        self._unwritten.clear()
+        await super().close()
+
+    def new_session(self) -> int:
+        """
+        Returns the session number of a new player history.
+        """
+        return next(self._sessions)
+
+    def spill(self, session: int, segment: int, tracks: list[TrackRef]) -> None:
+        """
+        Schedules a full segment of a history to be written.
+        """
+        metrics.increment("history.spilled")
+        self._unwritten[session, segment] = tracks
+        self._enqueue((session, segment))
+
+    def forget(self, session: int) -> None:
+        """
+        Schedules every segment of a history to be deleted.
+        """
+        for key in [key for key in self._unwritten if key[0] == session]:
+            del self._unwritten[key]
+        for key in [key for key in self._read_cache if key[0] == session]:
+            del self._read_cache[key]
+        self._enqueue((session, _FORGOTTEN))
+
+    async def read(self, session: int, segment: int) -> list[TrackRef]:
+        """
+        Returns the tracks of a segment, empty if the segment does not exist.
+        """
+        key = (session, segment)
+        if key in self._unwritten:
+            return self._unwritten[key]
+        if key in self._read_cache:
+            self._read_cache.move_to_end(key)
+            return self._read_cache[key]
+
+        metrics.increment("history.segment_reads")
+        row = await self.database.fetchone(
+            "SELECT tracks FROM history_segments WHERE session = ? AND segment = ?", key
+        )
+        tracks = [TrackRef.from_payload(data) for data in json.loads(row["tracks"])] if row else []
+        self._read_cache[key] = tracks
+        if len(self._read_cache) > self.read_cache_size:
+            self._read_cache.popitem(last=False)
+        return tracks
+
+    def _discard(self, items: list[tuple[int, int]]) -> None:
+        # Dropped segments are lost, reading them returns no tracks
+        for key in items:
+            self._unwritten.pop(key, None)
+
+    async def _write_batch(self, batch: list[tuple[int, int]]) -> None:
+        # Segments of a history forgotten in the meantime are no longer in _unwritten and are skipped
+        written = [key for key in batch if key in self._unwritten]
+        await self.database.executemany(
+            "INSERT OR REPLACE INTO history_segments (session, segment, tracks) VALUES (?, ?, ?)",
+            [(*key, json.dumps([track.payload() for track in self._unwritten[key]])) for key in written],
+        )
+        for key in written:
+            self._unwritten.pop(key, None)
+        forgotten = [(session,) for session, segment in batch if segment == _FORGOTTEN]
+        if forgotten:
+            await self.database.executemany("DELETE FROM history_segments WHERE session = ?", forgotten)
@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from storage.write_behind import WriteBehindStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS plays (
+    id INTEGER PRIMARY KEY,
+    guild_id INTEGER NOT NULL,
+    track_id TEXT NOT NULL,
+    title TEXT NOT NULL,
+    uri TEXT,
+    user_id INTEGER,
+    played_at REAL NOT NULL,
+    duration_played INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS plays_by_guild_time ON plays (guild_id, played_at);
+CREATE INDEX IF NOT EXISTS plays_by_guild_track ON plays (guild_id, track_id);
+CREATE INDEX IF NOT EXISTS plays_by_guild_user ON plays (guild_id, user_id);
+"""
+
+
+@dataclass(frozen=True)
+class PlayRecord:
+    """A single finished play of a track"""
+
+    guild_id: int
+    track_id: str
+    title: str
+    uri: Optional[str]
+    user_id: Optional[int]
+    played_at: float
+    duration_played: int
+
+
+@dataclass(frozen=True)
+class TrackStats:
+    """Aggregated plays of a single track"""
+
+    track_id: str
+    title: str
+    uri: Optional[str]
+    plays: int
+
+
+@dataclass(frozen=True)
+class GuildStats:
+    """Aggregated plays of a whole guild"""
+
+    plays: int
+    unique_tracks: int
+    listeners: int
+    total_duration: int
+    top_user_id: Optional[int]
+
+
+class PlayHistoryStore(WriteBehindStore[PlayRecord]):
+    """
+    Persists finished plays per guild using write-behind batching.
+    """
+
+    schema = SCHEMA
+
+    def record(self, record: PlayRecord) -> None:
+        """
+        Buffers a play, it will be persisted by the next flush.
+        """
+        self._enqueue(record)
+
+    async def _write_batch(self, batch: list[PlayRecord]) -> None:
+        await self.database.executemany(
+            "INSERT INTO plays (guild_id, track_id, title, uri, user_id, played_at, duration_played) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(r.guild_id, r.track_id, r.title, r.uri, r.user_id, r.played_at, r.duration_played) for r in batch],
+        )
+
+    async def top_tracks(self, guild_id: int, limit: int = 10, days: Optional[int] = None) -> list[TrackStats]:
+        """
+        Returns the most played tracks of a guild.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            limit (int): The maximum number of tracks. Defaults to 10.
+            days (Optional[int]): Only count plays from the last given days. Defaults to all time.
+
+        Returns:
+            list[TrackStats]: Tracks ordered by play count.
+        """
+        await self.flush()
+        since = time.time() - days * 86400 if days else 0
+        rows = await self.database.fetchall(
+            "SELECT track_id, MAX(title) AS title, MAX(uri) AS uri, COUNT(*) AS plays FROM plays "
+            "WHERE guild_id = ? AND played_at >= ? GROUP BY track_id ORDER BY plays DESC LIMIT ?",
+            (guild_id, since, limit),
+        )
+        return [TrackStats(row["track_id"], row["title"], row["uri"], row["plays"]) for row in rows]
+
+    async def guild_stats(self, guild_id: int) -> GuildStats:
+        """
+        Returns aggregated play statistics of a guild.
+        """
+        await self.flush()
+        totals = await self.database.fetchone(
+            "SELECT COUNT(*) AS plays, COUNT(DISTINCT track_id) AS unique_tracks, "
+            "COUNT(DISTINCT user_id) AS listeners, COALESCE(SUM(duration_played), 0) AS total_duration "
+            "FROM plays WHERE guild_id = ?",
+            (guild_id,),
+        )
+        top_user = await self.database.fetchone(
+            "SELECT user_id FROM plays WHERE guild_id = ? AND user_id IS NOT NULL "
+            "GROUP BY user_id ORDER BY COUNT(*) DESC LIMIT 1",
+            (guild_id,),
+        )
+        return GuildStats(
+            plays=totals["plays"],
+            unique_tracks=totals["unique_tracks"],
+            listeners=totals["listeners"],
+            total_duration=totals["total_duration"],
+            top_user_id=top_user["user_id"] if top_user else None,
+        )
+
+    async def history_page(self, guild_id: int, page: int, page_size: int = 25) -> list[PlayRecord]:
+        """
+        Reads a single page of the guild's play history, newest first.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            page (int): Zero based page number.
+            page_size (int): Number of plays per page. Defaults to 25.
+
+        Returns:
+            list[PlayRecord]: The plays on the requested page.
+        """
+        await self.flush()
+        rows = await self.database.fetchall(
+            "SELECT guild_id, track_id, title, uri, user_id, played_at, duration_played FROM plays "
+            "WHERE guild_id = ? ORDER BY played_at DESC LIMIT ? OFFSET ?",
+            (guild_id, page_size, page * page_size),
+        )
+        return [PlayRecord(**dict(row)) for row in rows]
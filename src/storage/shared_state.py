@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any, Optional
+
+from storage.state_backend import InMemoryBackend, StateBackend, StateBackendError, create_backend
+from utils.circuit_breaker import CircuitBreaker
+from utils.metrics import metrics
+
+PLAYER_SNAPSHOT_TTL = 3600  # Seconds a suspended player waits for a process to take it over
+SOUNDBOARD_LISTING_TTL = 86_400
+RATE_LIMIT_TIMEOUT = 0.5  # Seconds a rate limit waits for the backend, checks run before the interaction is acked
+
+
+class SharedState:
+    """
+    State shared by every process of the bot, so guilds can move between processes or shards.
+    Backed by the process itself by default, or by a Redis-protocol server when `STATE_BACKEND_URL` is set.
+    Every operation costs at most one round trip to the backend. When the backend is unreachable or slow
+    reads miss and rate limits are counted by the process alone, the bot keeps working on its local state,
+    a circuit breaker keeps it from waiting on the backend for every operation.
+
+    Metrics:
+        shared_state.errors: Operations that failed on the backend.
+        shared_state.local_rate_limits: Rate limits counted locally because the backend did not answer.
+    """
+
+    def __init__(self, backend: Optional[StateBackend] = None, prefix: str = "wkk:") -> None:
+        self.backend = backend or InMemoryBackend()
+        self.prefix = prefix
+        self._local = InMemoryBackend()
+        self.breaker = CircuitBreaker("shared_state", failure_threshold=3, window=30.0, reset_timeout=15.0)
+
+    def connect(self, url: Optional[str]) -> None:
+        """
+        Switches to the backend of the given URL, see `create_backend`.
+        """
+        self.backend = create_backend(url)
+        logging.info("Shared state backend: %s", type(self.backend).__name__)
+
+    async def close(self) -> None:
+        """
+        Closes the backend connection.
+        """
+        await self.backend.close()
+
+    async def hit_rate_limit(self, bucket: str, rate: int, per: float) -> float:
+        """
+        Counts a call against a rate limit shared by all processes.
+
+        Args:
+            bucket (str): Name of the limited resource.
+            rate (int): Calls allowed per window.
+            per (float): Window length in seconds.
+
+        Returns:
+            float: Seconds until the window resets if the call is over the limit, 0 otherwise.
+        """
+        key = f"{self.prefix}ratelimit:{bucket}"
+        commands = [("SET", key, 0, "PX", max(int(per * 1000), 1), "NX"), ("INCRBY", key, 1), ("PTTL", key)]
+        # Shielded, a round trip cut off halfway would leave its replies on the connection
+        pending = asyncio.ensure_future(self._run(commands, "rate limit"))
+        try:
+            replies = await asyncio.wait_for(asyncio.shield(pending), timeout=RATE_LIMIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            replies = []
+        if not replies:
+            metrics.increment("shared_state.local_rate_limits")
+            replies = await self._local.execute(commands)
+        _, count, ttl_ms = replies
+        return max(ttl_ms, 0) / 1000 if count > rate else 0
+
+    async def soundboard_listing(self, guild_id: int) -> Optional[list[str]]:
+        """
+        Returns the last soundboard listing received by any process, None if there is none.
+        """
+        data = await self._get(f"soundboard:{guild_id}", "soundboard")
+        return json.loads(data) if data is not None else None
+
+    async def put_soundboard_listing(self, guild_id: int, listing: Optional[list[str]]) -> None:
+        """
+        Shares a soundboard listing with the other processes, None forgets it.
+        """
+        key = f"{self.prefix}soundboard:{guild_id}"
+        if listing is None:
+            await self._run([("DEL", key)], "soundboard")
+        else:
+            await self._run([("SET", key, json.dumps(listing), "PX", SOUNDBOARD_LISTING_TTL * 1000)], "soundboard")
+
+    async def guild_settings(self, guild_id: int) -> Optional[str]:
+        """
+        Returns the serialized settings of a guild last published by any process.
+        """
+        data = await self._get(f"settings:{guild_id}", "settings")
+        return data.decode() if data is not None else None
+
+    async def put_guild_settings(self, guild_id: int, data: str) -> None:
+        """
+        Publishes the serialized settings of a guild.
+        """
+        await self._run([("SET", f"{self.prefix}settings:{guild_id}", data)], "settings")
+
+    async def save_players(self, snapshots: dict[int, dict[str, Any]]) -> None:
+        """
+        Stores the snapshots of suspended players, queues included, in a single round trip.
+        """
+        commands = [
+            ("SET", f"{self.prefix}player:{guild_id}", json.dumps(snapshot), "PX", PLAYER_SNAPSHOT_TTL * 1000)
+            for guild_id, snapshot in snapshots.items()
+        ]
+        if commands:
+            await self._run(commands, "players")
+
+    async def take_player(self, guild_id: int) -> Optional[dict[str, Any]]:
+        """
+        Returns and removes the snapshot of a suspended player, so only one process takes it over.
+        """
+        data = await self._get(f"player:{guild_id}", "players", command="GETDEL")
+        return json.loads(data) if data is not None else None
+
+    async def _get(self, key: str, operation: str, command: str = "GET") -> Optional[bytes]:
+        replies = await self._run([(command, f"{self.prefix}{key}")], operation)
+        return replies[0] if replies else None
+
+    async def _run(self, commands: list[tuple], operation: str) -> list[Any]:
+        if not self.breaker.allow():
+            return []
+        try:
+            replies = await self.backend.execute(commands)
+        except StateBackendError as err:
+            self.breaker.record_failure()
+            metrics.increment("shared_state.errors")
+            logging.warning("Shared state %s failed: %s", operation, err)
+            return []
+        self.breaker.record_success()
+        return replies
+
+
+shared_state = SharedState()
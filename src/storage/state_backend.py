@@ -0,0 +1,253 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Optional, Sequence
+from urllib.parse import urlparse
+
+Command = Sequence[Any]
+
+
+class StateBackendError(Exception):
+    """
+    Exception for when the state backend could not be reached or rejected a command
+    """
+
+
+class StateBackend(ABC):
+    """
+    Key-value store shared by every bot process, driven by Redis-style commands.
+    Commands are sent in batches, a batch costs a single round trip on network backends.
+
+    Supported commands: GET, GETDEL, SET (with PX and NX), DEL, INCRBY, PTTL.
+    Values are returned as bytes, like Redis does.
+    """
+
+    @abstractmethod
+    async def execute(self, commands: Sequence[Command]) -> list[Any]:
+        """
+        Runs a batch of commands in order.
+
+        Args:
+            commands (Sequence[Command]): Commands like `("SET", "key", "value", "PX", 1000)`.
+
+        Returns:
+            list[Any]: The reply of each command.
+
+        Raises:
+            StateBackendError: The backend could not be reached, or a command failed.
+        """
+
+    async def close(self) -> None:
+        """
+        Releases the connection, if any.
+        """
+
+
+class InMemoryBackend(StateBackend):
+    """
+    State kept in the process itself, for single process deployments.
+    Expired keys are dropped when touched, and all at once every `sweep_interval` commands.
+    """
+
+    sweep_interval = 1024
+
+    def __init__(self) -> None:
+        self._values: dict[str, Any] = {}
+        self._deadlines: dict[str, float] = {}
+        self._commands_until_sweep = self.sweep_interval
+        self._handlers = {
+            "GET": self._get,
+            "GETDEL": self._getdel,
+            "SET": self._set,
+            "DEL": self._del,
+            "INCRBY": self._incrby,
+            "PTTL": self._pttl,
+        }
+
+    async def execute(self, commands: Sequence[Command]) -> list[Any]:
+        self._commands_until_sweep -= len(commands)
+        if self._commands_until_sweep <= 0:
+            self._commands_until_sweep = self.sweep_interval
+            now = time.monotonic()
+            for key in [key for key, deadline in self._deadlines.items() if deadline <= now]:
+                del self._deadlines[key]
+                self._values.pop(key, None)
+        return [self.apply(command) for command in commands]
+
+    def apply(self, command: Command) -> Any:
+        """
+        Runs a single command synchronously.
+        """
+        handler = self._handlers.get(command[0].upper())
+        if handler is None:
+            raise StateBackendError(f"Unsupported command: {command[0]}")
+        return handler(*command[1:])
+
+    def _alive(self, key: str) -> bool:
+        deadline = self._deadlines.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            del self._deadlines[key]
+            self._values.pop(key, None)
+        return key in self._values
+
+    def _get(self, key: str) -> Optional[bytes]:
+        return self._values[key] if self._alive(key) else None
+
+    def _getdel(self, key: str) -> Optional[bytes]:
+        value = self._get(key)
+        self._del(key)
+        return value
+
+    def _set(self, key: str, value: Any, *options: Any) -> Optional[str]:
+        options = [option.upper() if isinstance(option, str) else option for option in options]
+        if "NX" in options and self._alive(key):
+            return None
+        self._values[key] = _to_bytes(value)
+        if "PX" in options:
+            self._deadlines[key] = time.monotonic() + int(options[options.index("PX") + 1]) / 1000
+        else:
+            self._deadlines.pop(key, None)
+        return "OK"
+
+    def _del(self, *keys: str) -> int:
+        deleted = 0
+        for key in keys:
+            if self._alive(key):
+                del self._values[key]
+                self._deadlines.pop(key, None)
+                deleted += 1
+        return deleted
+
+    def _incrby(self, key: str, amount: Any) -> int:
+        value = int(self._values[key]) + int(amount) if self._alive(key) else int(amount)
+        self._values[key] = _to_bytes(value)
+        return value
+
+    def _pttl(self, key: str) -> int:
+        if not self._alive(key):
+            return -2
+        deadline = self._deadlines.get(key)
+        return -1 if deadline is None else int((deadline - time.monotonic()) * 1000)
+
+
+class RespBackend(StateBackend):
+    """
+    Client for a server speaking the Redis protocol, like Redis or Valkey, over one pipelined connection.
+    """
+
+    def __init__(
+        self, host: str, port: int = 6379, db: int = 0, password: Optional[str] = None, timeout: float = 5.0
+    ) -> None:
+        """
+        Args:
+            host (str): Server host.
+            port (int): Server port. Defaults to 6379.
+            db (int): Database number. Defaults to 0.
+            password (Optional[str]): Password, if the server requires one.
+            timeout (float): Seconds a batch may take, including connecting. Defaults to 5.
+        """
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+
+    async def execute(self, commands: Sequence[Command]) -> list[Any]:
+        async with self._lock:
+            try:
+                replies = await asyncio.wait_for(self._round_trip(commands), timeout=self.timeout)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as err:
+                await self.close()
+                raise StateBackendError(f"State backend unavailable: {err!r}") from err
+        errors = [reply for reply in replies if isinstance(reply, StateBackendError)]
+        if errors:
+            raise errors[0]
+        return replies
+
+    async def close(self) -> None:
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def _round_trip(self, commands: Sequence[Command]) -> list[Any]:
+        if not self._writer:
+            self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+            handshake = []
+            if self.password:
+                handshake.append(("AUTH", self.password))
+            if self.db:
+                handshake.append(("SELECT", self.db))
+            if handshake:
+                errors = [reply for reply in await self._round_trip(handshake) if isinstance(reply, StateBackendError)]
+                if errors:
+                    # A connection left unauthenticated or on the wrong database must not be reused
+                    await self.close()
+                    raise StateBackendError(f"State backend handshake failed: {errors[0]}")
+
+        self._writer.write(b"".join(encode_command(command) for command in commands))
+        await self._writer.drain()
+        return [await read_reply(self._reader) for _ in commands]
+
+
+def create_backend(url: Optional[str]) -> StateBackend:
+    """
+    Creates the backend for a URL like `redis://:password@host:6379/0`, in-memory when there is none.
+    """
+    if not url:
+        return InMemoryBackend()
+    parsed = urlparse(url)
+    if parsed.scheme != "redis":
+        raise ValueError(f"Unsupported state backend: {parsed.scheme}")
+    return RespBackend(
+        parsed.hostname or "localhost",
+        parsed.port or 6379,
+        int(parsed.path.lstrip("/") or 0),
+        parsed.password,
+    )
+
+
+def encode_command(command: Command) -> bytes:
+    """
+    Encodes a command as a RESP array of bulk strings.
+    """
+    parts = [b"*%d\r\n" % len(command)]
+    for arg in command:
+        data = _to_bytes(arg)
+        parts.append(b"$%d\r\n%b\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    """
+    Reads one RESP reply, error replies are returned as `StateBackendError`.
+    """
+    line = await reader.readuntil(b"\r\n")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload.decode()
+    if kind == b"-":
+        return StateBackendError(payload.decode())
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        return None if length < 0 else (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(payload)
+        return None if length < 0 else [await read_reply(reader) for _ in range(length)]
+    raise StateBackendError(f"Malformed reply: {line!r}")
+
+
+def _to_bytes(value: Any) -> bytes:
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode()
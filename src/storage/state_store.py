@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+from typing import Any
+
+from storage.write_behind import WriteBehindStore
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS guild_state (
+    guild_id INTEGER NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (guild_id, key)
+);
+"""
+
+_MISSING = object()
+
+
+class StateStore(WriteBehindStore[tuple[int, str]]):
+    """
+    Small per-guild key-value store for command state, values are anything JSON serializable.
+    Every key is read from the database once, later reads are served from memory. Writes update the
+    cache immediately and are persisted in batches, each batch in a single transaction.
+    """
+
+    schema = SCHEMA
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._cache: dict[tuple[int, str], Any] = {}
+
+    async def get(self, guild_id: int, key: str, default: Any = None) -> Any:
+        """
+        Returns a value of the guild, loading it from the database on a cache miss.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            key (str): The name of the value.
+            default (Any): Returned when the guild has no such value.
+
+        Returns:
+            Any: The stored value or `default`.
+        """
+        cache_key = (guild_id, key)
+        value = self._cache.get(cache_key, _MISSING)
+        if value is _MISSING:
+            row = await self.database.fetchone(
+                "SELECT value FROM guild_state WHERE guild_id = ? AND key = ?", (guild_id, key)
+            )
+            # Another coroutine may have set the value while the query was running
+            value = self._cache.setdefault(cache_key, json.loads(row["value"]) if row else None)
+        return default if value is None else value
+
+    def set(self, guild_id: int, key: str, value: Any) -> None:
+        """
+        Stores a value of the guild and schedules it to be persisted.
+        """
+        cache_key = (guild_id, key)
+        self._cache[cache_key] = value
+        if cache_key not in self._pending:
+            self._enqueue(cache_key)
+
+    async def _write_batch(self, batch: list[tuple[int, str]]) -> None:
+        await self.database.executemany(
+            "INSERT INTO guild_state (guild_id, key, value) VALUES (?, ?, ?) "
+            "ON CONFLICT (guild_id, key) DO UPDATE SET value = excluded.value",
+            [(guild_id, key, json.dumps(self._cache[guild_id, key])) for guild_id, key in batch],
+        )
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Generic, Optional, TypeVar
+
+from storage.database import Database
+from utils.metrics import metrics
+
+T = TypeVar("T")
+
+
+class WriteBehindStore(ABC, Generic[T]):
+    """
+    Base class for stores that buffer writes in memory and persist them in batches.
+    A batch is written every `flush_interval` seconds, or as soon as `max_batch_size` items are pending.
+    Items of a failed batch stay buffered and are retried every `flush_interval` seconds. While writes keep
+    failing at most `max_pending` items are kept, the oldest ones are dropped.
+
+    Metrics:
+        write_behind.dropped: Items dropped because the buffer was full while writes were failing.
+    """
+
+    schema = ""
+    flush_interval: float = 5
+    max_batch_size: int = 100
+    max_pending: int = 10_000
+
+    def __init__(self, database: Database) -> None:
+        self.database = database
+        self._pending: list[T] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._batch_full = asyncio.Event()
+        self._failing = False
+
+    async def start(self) -> None:
+        """
+        Creates the schema and starts the background flusher.
+        """
+        if self.schema:
+            await self.database.executescript(self.schema)
+        self._flush_task = asyncio.create_task(self._flush_loop())
+
+    async def close(self) -> None:
+        """
+        Stops the background flusher and writes any buffered items.
+        """
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        await self.flush()
+
+    def _enqueue(self, item: T) -> None:
+        self._pending.append(item)
+        if len(self._pending) >= self.max_batch_size:
+            self._batch_full.set()
+
+    async def flush(self) -> None:
+        """
+        Writes every buffered item in a single transaction.
+        """
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        try:
+            await self._write_batch(batch)
+        except Exception as err:
+            logging.error("%s could not persist %d items: %s", type(self).__name__, len(batch), err)
+            self._failing = True
+            self._pending[:0] = batch
+            overflow = len(self._pending) - self.max_pending
+            if overflow > 0:
+                dropped, self._pending = self._pending[:overflow], self._pending[overflow:]
+                metrics.increment("write_behind.dropped", overflow)
+                logging.warning("%s dropped its %d oldest unwritten items.", type(self).__name__, overflow)
+                self._discard(dropped)
+        else:
+            self._failing = False
+
+    @abstractmethod
+    async def _write_batch(self, batch: list[T]) -> None:
+        """
+        Persists a batch of items, raising leaves them buffered for the next flush.
+        """
+
+    def _discard(self, items: list[T]) -> None:
+        """
+        Called with the items dropped from a full buffer, stores holding data for them can release it here.
+        """
+
+    async def _flush_loop(self) -> None:
+        while True:
+            # A full batch does not hurry a retry, every flush while failing would rewrite the whole buffer
+            if self._failing:
+                await asyncio.sleep(self.flush_interval)
+            else:
+                try:
+                    await asyncio.wait_for(self._batch_full.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._batch_full.clear()
+            await self.flush()
@@ -0,0 +1,600 @@
+from __future__ import annotations
+
+import random
+from collections import OrderedDict
+from itertools import chain, islice
+from typing import TYPE_CHECKING, Any, Iterable, Iterator, MutableSequence, Optional
+
+import wavelink
+from utils.metrics import metrics
+
+if TYPE_CHECKING:
+    from storage.history_segment_store import HistorySegmentStore
+
+
+class TrackRef:
+    """
+    Compact reference to a queued track, holding only what the queue and the player view show.
+    The full `wavelink.Playable` is loaded from the `TrackStore` when the track is played,
+    the encoded track is kept for that, and the user data for the track events.
+    """
+
+    __slots__ = ("encoded", "identifier", "title", "length", "user_data")
+
+    def __init__(
+        self, encoded: str, identifier: str, title: str, length: int, user_data: Optional[dict[str, Any]] = None
+    ) -> None:
+        self.encoded = encoded
+        self.identifier = identifier
+        self.title = title
+        self.length = length
+        self.user_data = user_data or None
+
+    @classmethod
+    def from_playable(cls, track: wavelink.Playable) -> TrackRef:
+        """
+        Creates a reference to a track, the full track is remembered by the `TrackStore`.
+        """
+        track_store.remember(track)
+        return cls(track.encoded, track.identifier, track.title, track.length, dict(track.extras))
+
+    @classmethod
+    def from_payload(cls, data: dict[str, Any]) -> TrackRef:
+        """
+        Creates a reference from the output of `payload`, or from a Lavalink track payload.
+        """
+        info = data.get("info", data)
+        return cls(data["encoded"], info["identifier"], info["title"], info["length"], data.get("userData"))
+
+    def payload(self) -> dict[str, Any]:
+        """
+        JSON-serializable form of the reference, see `from_payload`.
+        """
+        return {
+            "encoded": self.encoded,
+            "identifier": self.identifier,
+            "title": self.title,
+            "length": self.length,
+            "userData": self.user_data or {},
+        }
+
+    def __eq__(self, other: object) -> bool:
+        # Same as Playable.__eq__, so references and full tracks compare equal
+        if not isinstance(other, (TrackRef, wavelink.Playable)):
+            return NotImplemented
+        return self.encoded == other.encoded or self.identifier == other.identifier
+
+    def __hash__(self) -> int:
+        return hash(self.encoded)
+
+    def __repr__(self) -> str:
+        return f"TrackRef(identifier={self.identifier!r}, title={self.title!r})"
+
+
+class TrackStore:
+    """
+    Full payloads of recently queued tracks, shared by every guild so a popular track is held once.
+    Tracks that fell out of the store are decoded by Lavalink when they are played.
+
+    Metrics:
+        tracks.decoded: Tracks that had to be decoded by Lavalink.
+    """
+
+    def __init__(self, capacity: int = 2048) -> None:
+        self.capacity = capacity
+        self._payloads: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+    def remember(self, track: wavelink.Playable) -> None:
+        """
+        Keeps the payload of a track, the user data stays with its references.
+        """
+        self._put(track.encoded, track.raw_data)
+
+    async def load(self, ref: TrackRef, node: wavelink.Node) -> wavelink.Playable:
+        """
+        Returns the full track of a reference, with the reference's user data.
+
+        Raises:
+            wavelink.LavalinkException: Lavalink could not decode the track.
+        """
+        data = self._payloads.get(ref.encoded)
+        if data is None:
+            metrics.increment("tracks.decoded")
+            data = await node.send("GET", path="v4/decodetrack", params={"encodedTrack": ref.encoded})
+        self._put(ref.encoded, data)
+        return wavelink.Playable({**data, "userData": dict(ref.user_data or {})})
+
+    def _put(self, encoded: str, data: dict[str, Any]) -> None:
+        self._payloads[encoded] = data
+        self._payloads.move_to_end(encoded)
+        if len(self._payloads) > self.capacity:
+            self._payloads.popitem(last=False)
+
+
+track_store = TrackStore()
+Track = TrackRef | wavelink.Playable
+
+
+class TrackList(MutableSequence[TrackRef]):
+    """
+    List of tracks stored in blocks of bounded size, with a Fenwick tree over the block lengths.
+    Finding a position costs O(log n), inserting or deleting there only shifts the tracks of a single block.
+    Occurrences of each track identifier are counted, so membership and duplicate checks are O(1).
+    Tracks are stored as `TrackRef`s, full tracks are converted when they are added.
+    """
+
+    load = 256  # Blocks are split once they grow past twice this size
+
+    def __init__(self, tracks: Iterable[Track] = ()) -> None:
+        self._blocks: list[list[TrackRef]] = []
+        self._tree: list[int] = [0]
+        self._length = 0
+        self._counts: dict[str, int] = {}
+        self._duplicates = 0
+        self.extend(tracks)
+
+    @property
+    def has_duplicates(self) -> bool:
+        """
+        Whether any track identifier occurs more than once.
+        """
+        return self._duplicates > 0
+
+    def count_identifier(self, identifier: str) -> int:
+        """
+        Number of tracks with the given identifier.
+        """
+        return self._counts.get(identifier, 0)
+
+    def reset(self, tracks: Iterable[Track] = ()) -> None:
+        """
+        Replaces the contents with the given tracks.
+        """
+        self._blocks = []
+        self._tree = [0]
+        self._length = 0
+        self._counts.clear()
+        self._duplicates = 0
+        self.extend(tracks)
+
+    def shuffle(self) -> None:
+        """
+        Shuffles the tracks in place.
+        """
+        tracks = list(self)
+        random.shuffle(tracks)
+        self._reblock(tracks)
+
+    def dedupe(self, exclude: Iterable[str] = ()) -> int:
+        """
+        Removes repeated tracks, keeping the first occurrence of each identifier.
+
+        Args:
+            exclude (Iterable[str]): Identifiers whose every occurrence is removed.
+
+        Returns:
+            int: The number of tracks removed.
+        """
+        seen = set(exclude)
+        tracks = []
+        for track in self:
+            if track.identifier not in seen:
+                seen.add(track.identifier)
+                tracks.append(track)
+
+        removed = self._length - len(tracks)
+        self._reblock(tracks)
+        self._counts = dict.fromkeys((track.identifier for track in tracks), 1)
+        self._duplicates = 0
+        return removed
+
+    def insert_many(self, index: int, tracks: Iterable[Track]) -> None:
+        """
+        Inserts tracks before the given position, keeping their order.
+        """
+        tracks = [_compact(track) for track in tracks]
+        index = self._clamp(index)
+        if not self._blocks or index == self._length:
+            self.extend(tracks)
+            return
+
+        block, offset = self._locate(index)
+        items = self._blocks[block]
+        items[offset:offset] = tracks
+        if len(items) > 2 * self.load:
+            self._blocks[block:block + 1] = [items[i:i + self.load] for i in range(0, len(items), self.load)]
+        self._added(tracks)
+        self._rebuild_index()
+
+    def insert(self, index: int, value: Track) -> None:
+        value = _compact(value)
+        index = self._clamp(index)
+        if not self._blocks:
+            self._blocks.append([value])
+            self._added((value,))
+            self._rebuild_index()
+            return
+
+        if index == self._length:
+            block, offset = len(self._blocks) - 1, len(self._blocks[-1])
+        else:
+            block, offset = self._locate(index)
+        items = self._blocks[block]
+        items.insert(offset, value)
+        self._added((value,))
+        if len(items) > 2 * self.load:
+            self._blocks[block:block + 1] = [items[:self.load], items[self.load:]]
+            self._rebuild_index()
+        else:
+            self._update_index(block, 1)
+
+    def extend(self, values: Iterable[Track]) -> None:
+        tracks = [_compact(track) for track in values]
+        if not tracks:
+            return
+
+        start = 0
+        if self._blocks:
+            start = max(0, 2 * self.load - len(self._blocks[-1]))
+            self._blocks[-1].extend(tracks[:start])
+        self._blocks.extend(tracks[i:i + self.load] for i in range(start, len(tracks), self.load))
+        self._added(tracks)
+        self._rebuild_index()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step != 1:
+                return list(self)[index]
+            result: list[TrackRef] = []
+            if start < stop:
+                block, offset = self._locate(start)
+                while len(result) < stop - start:
+                    result.extend(self._blocks[block][offset:offset + stop - start - len(result)])
+                    block, offset = block + 1, 0
+            return result
+
+        block, offset = self._locate(self._normalize(index))
+        return self._blocks[block][offset]
+
+    def __setitem__(self, index, value) -> None:
+        if isinstance(index, slice):
+            tracks = list(self)
+            tracks[index] = value
+            self.reset(tracks)
+            return
+
+        value = _compact(value)
+        block, offset = self._locate(self._normalize(index))
+        self._removed((self._blocks[block][offset],))
+        self._blocks[block][offset] = value
+        self._added((value,))
+
+    def __delitem__(self, index) -> None:
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._length)
+            if step != 1:
+                tracks = list(self)
+                del tracks[index]
+                self.reset(tracks)
+            elif start < stop:
+                self._delete_range(start, stop)
+            return
+
+        block, offset = self._locate(self._normalize(index))
+        items = self._blocks[block]
+        self._removed((items.pop(offset),))
+        if items:
+            self._update_index(block, -1)
+        else:
+            del self._blocks[block]
+            self._rebuild_index()
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __iter__(self) -> Iterator[TrackRef]:
+        return chain.from_iterable(self._blocks)
+
+    def __reversed__(self) -> Iterator[TrackRef]:
+        for items in reversed(self._blocks):
+            yield from reversed(items)
+
+    def __contains__(self, value: object) -> bool:
+        # Tracks are equal when their identifiers are, see Playable.__eq__
+        return isinstance(value, (TrackRef, wavelink.Playable)) and value.identifier in self._counts
+
+    def __repr__(self) -> str:
+        return f"TrackList({list(self)!r})"
+
+    def count(self, value: object) -> int:
+        return self._counts.get(value.identifier, 0) if isinstance(value, (TrackRef, wavelink.Playable)) else 0
+
+    def index(self, value: object, start: int = 0, stop: Optional[int] = None) -> int:
+        if value in self:
+            start, stop, _ = slice(start, stop).indices(self._length)
+            for i, track in enumerate(islice(self, start, stop), start):
+                if track == value:
+                    return i
+        raise ValueError(f"{value!r} is not in the track list")
+
+    def clear(self) -> None:
+        self.reset()
+
+    def copy(self) -> TrackList:
+        """
+        Returns a shallow copy.
+        """
+        return TrackList(self)
+
+    def _normalize(self, index: int) -> int:
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError("track index out of range")
+        return index
+
+    def _clamp(self, index: int) -> int:
+        # Same as list.insert, out of range positions insert at either end
+        if index < 0:
+            index += self._length
+        return min(max(index, 0), self._length)
+
+    def _locate(self, index: int) -> tuple[int, int]:
+        # Walks down the Fenwick tree to the last block whose prefix length does not exceed the index
+        tree = self._tree
+        block = 0
+        step = 1 << (len(tree) - 1).bit_length()
+        while step:
+            candidate = block + step
+            if candidate < len(tree) and tree[candidate] <= index:
+                block = candidate
+                index -= tree[candidate]
+            step >>= 1
+        return block, index
+
+    def _update_index(self, block: int, delta: int) -> None:
+        self._length += delta
+        block += 1
+        while block < len(self._tree):
+            self._tree[block] += delta
+            block += block & -block
+
+    def _rebuild_index(self) -> None:
+        tree = [0] + [len(items) for items in self._blocks]
+        for i in range(1, len(tree)):
+            parent = i + (i & -i)
+            if parent < len(tree):
+                tree[parent] += tree[i]
+        self._tree = tree
+        self._length = sum(len(items) for items in self._blocks)
+
+    def _reblock(self, tracks: list[TrackRef]) -> None:
+        # Replaces the contents with the same tracks in another order, the identifier counts stay valid
+        self._blocks = [tracks[i:i + self.load] for i in range(0, len(tracks), self.load)]
+        self._rebuild_index()
+
+    def _delete_range(self, start: int, stop: int) -> None:
+        block, offset = self._locate(start)
+        remaining = stop - start
+        while remaining:
+            items = self._blocks[block]
+            removed = items[offset:offset + remaining]
+            del items[offset:offset + remaining]
+            self._removed(removed)
+            remaining -= len(removed)
+            if items:
+                block += 1
+            else:
+                del self._blocks[block]
+            offset = 0
+        self._rebuild_index()
+
+    def _added(self, tracks: Iterable[TrackRef]) -> None:
+        counts = self._counts
+        for track in tracks:
+            count = counts.get(track.identifier, 0)
+            if count:
+                self._duplicates += 1
+            counts[track.identifier] = count + 1
+
+    def _removed(self, tracks: Iterable[TrackRef]) -> None:
+        counts = self._counts
+        for track in tracks:
+            count = counts[track.identifier]
+            if count > 1:
+                self._duplicates -= 1
+                counts[track.identifier] = count - 1
+            else:
+                del counts[track.identifier]
+
+
+def _compact(track: Track) -> TrackRef:
+    return track if isinstance(track, TrackRef) else TrackRef.from_playable(track)
+
+
+class TrackQueue(wavelink.Queue):
+    """
+    Wavelink queue backed by a `TrackList`, with positional operations for queue management commands.
+    Full tracks put in the queue or its history come out as `TrackRef`s, `AudioPlayer.play` loads them.
+    """
+
+    def __init__(self, *, history: bool | TrackHistory = True) -> None:
+        """
+        Args:
+            history (bool | TrackHistory): Whether played tracks are kept, or the history to keep them in.
+                Defaults to an unbounded in-memory history.
+        """
+        super().__init__(history=False)
+        self._items: TrackList = TrackList()
+        # An empty history is falsy, it has to be told apart from False by its type
+        self._history: Optional[TrackHistory] = None
+        if isinstance(history, TrackHistory):
+            self._history = history
+        elif history:
+            self._history = TrackHistory()
+
+    @staticmethod
+    def _check_compatibility(item: object) -> bool:
+        if not isinstance(item, (TrackRef, wavelink.Playable)):
+            raise TypeError("This queue is restricted to Playable objects.")
+        return True
+
+    def put_next(self, item: wavelink.Playable | wavelink.Playlist) -> int:
+        """
+        Puts a track or every track of a playlist at the front of the queue.
+
+        Returns:
+            int: The number of tracks added.
+        """
+        tracks = list(item) if isinstance(item, wavelink.Playlist) else [item]
+        if not all(self._check_compatibility(track) for track in tracks):
+            raise TypeError("This queue is restricted to Playable objects.")
+
+        self._items.insert_many(0, tracks)
+        self._wakeup_next()
+        return len(tracks)
+
+    def move(self, source: int, destination: int) -> TrackRef:
+        """
+        Moves a track to another position in the queue.
+
+        Args:
+            source (int): Current index of the track.
+            destination (int): Index the track should have afterwards.
+
+        Returns:
+            TrackRef: The moved track.
+
+        Raises:
+            IndexError: No track exists at the source index.
+        """
+        track = self._items.pop(source)
+        self._items.insert(destination, track)
+        return track
+
+    def remove_range(self, start: int, stop: int) -> int:
+        """
+        Removes the tracks from `start` up to, but not including, `stop`.
+
+        Returns:
+            int: The number of tracks removed.
+        """
+        length = len(self._items)
+        del self._items[start:stop]
+        return length - len(self._items)
+
+    def dedupe_needed(self, current: Optional[wavelink.Playable] = None) -> bool:
+        """
+        Whether `dedupe` would remove anything, checked in O(1).
+        """
+        return self._items.has_duplicates or (current is not None and current in self._items)
+
+    def dedupe(self, current: Optional[wavelink.Playable] = None) -> int:
+        """
+        Removes repeated tracks, keeping the first occurrence of each.
+
+        Args:
+            current (Optional[wavelink.Playable]): The playing track, its copies are removed as well.
+
+        Returns:
+            int: The number of tracks removed.
+        """
+        if not self.dedupe_needed(current):
+            return 0
+        return self._items.dedupe((current.identifier,) if current else ())
+
+    def shuffle(self) -> None:
+        """
+        Shuffles the upcoming tracks, the playing track is not part of the queue and keeps playing.
+        """
+        self._items.shuffle()
+
+
+class TrackHistory(TrackQueue):
+    """
+    Played tracks of a player. With a store only the `memory_limit` most recent tracks are kept in memory,
+    older ones are spilled to the store a segment at a time and read back when a page of them is shown.
+    Indices of `total`, `page` and `take` count from the oldest track including the spilled ones,
+    the queue methods only see the tracks in memory.
+    """
+
+    def __init__(self, store: Optional[HistorySegmentStore] = None) -> None:
+        super().__init__(history=False)
+        self.store = store
+        self.session = store.new_session() if store else 0
+        self.spilled = 0
+
+    @property
+    def total(self) -> int:
+        """
+        Number of tracks in the history, spilled ones included.
+        """
+        return self.spilled + len(self._items)
+
+    def put(self, item: Track | wavelink.Playlist | list[Track], /, *, atomic: bool = True) -> int:
+        added = super().put(item, atomic=atomic)
+        self._spill()
+        return added
+
+    async def put_wait(self, item: Track | wavelink.Playlist | list[Track], /, *, atomic: bool = True) -> int:
+        added = await super().put_wait(item, atomic=atomic)
+        self._spill()
+        return added
+
+    def clear(self) -> None:
+        """
+        Forgets every track, the spilled ones included.
+        """
+        super().clear()
+        if self.store and self.spilled:
+            self.store.forget(self.session)
+            self.session = self.store.new_session()
+        self.spilled = 0
+
+    async def page(self, start: int, stop: int) -> list[TrackRef]:
+        """
+        Returns the tracks from `start` up to, but not including, `stop`, oldest first.
+        """
+        spilled = self.spilled
+        start, stop = max(start, 0), min(stop, self.total)
+        # Sliced before reading the store, a spill while reading only moves tracks that are already sliced
+        tracks = self._items[max(start - spilled, 0):max(stop - spilled, 0)]
+        if start >= min(stop, spilled):
+            return tracks
+
+        size = self.store.segment_size
+        older: list[TrackRef] = []
+        for segment in range(start // size, (min(stop, spilled) - 1) // size + 1):
+            offset = segment * size
+            older.extend((await self.store.read(self.session, segment))[max(start - offset, 0):stop - offset])
+        return older + tracks
+
+    async def take(self, index: int) -> TrackRef:
+        """
+        Removes a track from the history and returns it. Spilled tracks are returned without being removed,
+        the store only ever appends to a history.
+
+        Raises:
+            IndexError: No track exists at the index.
+        """
+        if index < 0 or index >= self.total:
+            raise IndexError("history index out of range")
+        if index < self.spilled:
+            tracks = await self.page(index, index + 1)
+            if not tracks:
+                raise IndexError("history segment is missing")
+            return tracks[0]
+
+        track = self._items[index - self.spilled]
+        self.delete(index - self.spilled)
+        return track
+
+    def _spill(self) -> None:
+        if not self.store:
+            return
+        size = self.store.segment_size
+        while len(self._items) > self.store.memory_limit:
+            self.store.spill(self.session, self.spilled // size, self._items[:size])
+            del self._items[:size]
+            self.spilled += size
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections import deque
+
+from utils.metrics import metrics
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency for a while once its failures spike.
+    The breaker opens after `failure_threshold` failures within `window` seconds. While open, `allow()` is False
+    until `reset_timeout` passes, then a single trial call is let through: its success closes the breaker,
+    its failure opens it again. A trial that is never recorded, e.g. because the caller was cancelled,
+    expires after another `reset_timeout` and the next call becomes the trial.
+
+    Metrics:
+        breaker.<name>.opened: Times the breaker opened.
+        breaker.<name>.rejected: Calls short-circuited while open.
+    """
+
+    def __init__(self, name: str, failure_threshold: int = 5, window: float = 30.0, reset_timeout: float = 30.0):
+        """
+        Args:
+            name (str): Name of the protected dependency, used in logs and metrics.
+            failure_threshold (int): Failures within the window that open the breaker.
+            window (float): Seconds failures are counted over.
+            reset_timeout (float): Seconds the breaker stays open before a trial call.
+        """
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.window = window
+        self.reset_timeout = reset_timeout
+        self._failures: deque[float] = deque()
+        self._opened_at: float | None = None
+        self._trial_started: float | None = None
+
+    @property
+    def open(self) -> bool:
+        """
+        Whether calls are currently short-circuited.
+        """
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        """
+        Whether a call may go through, counted as rejected when it may not.
+        """
+        if self._opened_at is None:
+            return True
+        now = time.monotonic()
+        trial_expired = self._trial_started is not None and now - self._trial_started >= self.reset_timeout
+        if (self._trial_started is None or trial_expired) and now - self._opened_at >= self.reset_timeout:
+            self._trial_started = now
+            return True
+        metrics.increment(f"breaker.{self.name}.rejected")
+        return False
+
+    def record_success(self) -> None:
+        """
+        Records a successful call, closing the breaker after a trial call.
+        """
+        if self._opened_at is not None and self._trial_started is not None:
+            logging.info("Circuit breaker %s closed.", self.name)
+            self._opened_at = None
+            self._failures.clear()
+        self._trial_started = None
+
+    def record_failure(self) -> None:
+        """
+        Records a failed call, opening the breaker when failures spike or a trial call failed.
+        """
+        now = time.monotonic()
+        if self._opened_at is not None:
+            if self._trial_started is not None:
+                self._opened_at = now
+                self._trial_started = None
+            return
+
+        self._failures.append(now)
+        while self._failures and now - self._failures[0] > self.window:
+            self._failures.popleft()
+        if len(self._failures) >= self.failure_threshold:
+            self._opened_at = now
+            metrics.increment(f"breaker.{self.name}.opened")
+            logging.warning(
+                "Circuit breaker %s opened after %d failures in %.0f s.", self.name, len(self._failures), self.window
+            )
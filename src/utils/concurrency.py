@@ -0,0 +1,40 @@
+import asyncio
+from typing import Awaitable, Callable, TypeVar
+
+C = TypeVar("C")
+R = TypeVar("R")
+
+
+async def resolve_while_connecting(
+    resolve: Awaitable[R], connect: Awaitable[C], rollback: Callable[[], Awaitable[None]]
+) -> tuple[C, R]:
+    """
+    Runs a connection and a lookup concurrently, the connection is only kept if both succeed.
+
+    Args:
+        resolve (Awaitable[R]): The lookup, e.g. a track search.
+        connect (Awaitable[C]): The connection, e.g. joining a voice channel.
+        rollback (Callable[[], Awaitable[None]]): Undoes a partial or finished connection.
+
+    Returns:
+        tuple[C, R]: The results of the connection and the lookup.
+
+    Raises:
+        Exception: Whatever the lookup or the connection raised. A failed lookup cancels the connection,
+            a failed connection leaves the lookup result to the caller's cache.
+    """
+    connecting = asyncio.ensure_future(connect)
+    try:
+        result = await resolve
+    except BaseException:
+        connecting.cancel()
+        await asyncio.gather(connecting, return_exceptions=True)
+        await rollback()
+        raise
+
+    try:
+        connection = await connecting
+    except BaseException:
+        await rollback()
+        raise
+    return connection, result
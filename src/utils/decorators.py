@@ -1,151 +1,111 @@
 import asyncio
 import functools
-import inspect
-from typing import cast
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional, Union, cast
 from audio_player import AudioPlayer
+from storage.shared_state import shared_state
 
 import discord
 
+CONTEXT_KEY = "checks"
 
-def bot_is_in_voice_channel_check(func):
+
+@dataclass(slots=True)
+class CheckContext:
     """
-    Decorator to check whether the bot is in a voice channel.
-    Executes the decorated function only if the check passes.
+    State the checks of one invocation are evaluated against, resolved once and shared with the callback.
     """
 
-    @functools.wraps(func)
-    async def decorator(*args, **kwargs):
-        interaction = next((arg for arg in args if isinstance(arg, discord.Interaction)), None)
-        if interaction is None:
-            raise ValueError("No discord.Interaction found in arguments.")
-
-        player = cast(AudioPlayer, interaction.guild.voice_client)
-        if not player:
-            await interaction.response.send_message(
-                "The bot is not in a voice channel.", delete_after=3, ephemeral=True
-            )
-            return
+    owner: Any
+    interaction: discord.Interaction
+    player: Optional[AudioPlayer]
+    user_channel: Optional[discord.abc.Connectable]
 
-        await func(*args, **kwargs)
 
-    return decorator
+Check = Callable[[CheckContext], Union[Optional[str], Awaitable[Optional[str]]]]
 
 
-def user_is_in_voice_channel_check(func):
+def user_in_voice_channel(context: CheckContext) -> Optional[str]:
     """
-    Decorator to check whether the user is in a voice channel.
-    Executes the decorated function only if the check passes.
+    The user is in a voice channel.
     """
+    if context.user_channel is None:
+        return "You must be in a voice channel to control the bot."
+    return None
 
-    @functools.wraps(func)
-    async def decorator(*args, **kwargs):
-        interaction = next((arg for arg in args if isinstance(arg, discord.Interaction)), None)
-        if interaction is None:
-            raise ValueError("No discord.Interaction found in arguments.")
-
-        if not interaction.user.voice:
-            await interaction.response.send_message(
-                "You must be in a voice channel to control the bot.", delete_after=3, ephemeral=True
-            )
-            return
-
-        await func(*args, **kwargs)
 
-    return decorator
-
-
-def user_bot_in_same_channel_check(func):
+def bot_in_voice_channel(context: CheckContext) -> Optional[str]:
     """
-    Decorator to check whether the user is in the same voice channel as the bot.
-    Executes the decorated function only if the check passes.
+    The bot is in a voice channel.
     """
+    if not context.player:
+        return "The bot is not in a voice channel."
+    return None
 
-    @functools.wraps(func)
-    async def decorator(*args, **kwargs):
-        interaction = next((arg for arg in args if isinstance(arg, discord.Interaction)), None)
-        if interaction is None:
-            raise ValueError("No discord.Interaction found in arguments.")
-
-        player = cast(AudioPlayer, interaction.guild.voice_client)
-        user_voice = interaction.user.voice
-
-        if not (player and user_voice and player.channel.id == user_voice.channel.id):
-            await interaction.response.send_message(
-                "You must be in the same voice channel as the bot to control it.", delete_after=3, ephemeral=True
-            )
-            return
-
-        await func(*args, **kwargs)
 
-    return decorator
-
-
-def is_playing_check(func):
+def same_voice_channel(context: CheckContext) -> Optional[str]:
     """
-    Decorator to check whether the bot is currently playing audio.
-    Executes the decorated function only if the check passes.
+    The user is in the same voice channel as the bot.
     """
+    player = context.player
+    if not (player and context.user_channel and player.channel.id == context.user_channel.id):
+        return "You must be in the same voice channel as the bot to control it."
+    return None
 
-    @functools.wraps(func)
-    async def decorator(*args, **kwargs):
-        interaction = next((arg for arg in args if isinstance(arg, discord.Interaction)), None)
-        if interaction is None:
-            raise ValueError("No discord.Interaction found in arguments.")
 
-        player = cast(AudioPlayer, interaction.guild.voice_client)
-        if not player or not player.playing:
-            await interaction.response.send_message("Nothing is playing right now.", delete_after=3, ephemeral=True)
-            return
+def is_playing(context: CheckContext) -> Optional[str]:
+    """
+    The bot is currently playing audio.
+    """
+    if not context.player or not context.player.playing:
+        return "Nothing is playing right now."
+    return None
 
-        await func(*args, **kwargs)
 
-    return decorator
+async def button_cooldown(context: CheckContext) -> Optional[str]:
+    """
+    The buttons of the channel are not on cooldown, shared by all bot processes.
+    The owner of the decorated method must have a `cooldown` property in seconds.
+    """
+    if await shared_state.hit_rate_limit(f"buttons:{context.interaction.channel_id}", 1, context.owner.cooldown):
+        return "🤠 Slow down, partner! 🤠"
+    return None
 
 
-def button_cooldown(func):
+def checks(*conditions: Check):
     """
-    Decorator to enforce cooldowns for buttons.
-    The object of the decorated method must have a `_cooldown` property.
+    Decorator running the given checks in order before a command or component callback.
+    The interaction is the first argument after `self`, the player and the user's voice channel are resolved
+    once and the first failing check answers the interaction. Checks may be coroutines. The resolved state
+    is available to the callback through `checked(interaction)`.
     """
 
-    @functools.wraps(func)
-    async def decorator(self, *args, **kwargs):
-        interaction = next((arg for arg in args if isinstance(arg, discord.Interaction)), None)
-        if interaction is None:
-            raise ValueError("No discord.Interaction found in arguments.")
+    # Coroutine checks are told apart once, not on every call
+    chain = [(condition, asyncio.iscoroutinefunction(condition)) for condition in conditions]
 
-        if not hasattr(self, "_cooldown"):
-            raise ValueError("The object does not have a `_cooldown` property.")
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(owner, interaction: discord.Interaction, *args, **kwargs):
+            voice = interaction.user.voice
+            context = CheckContext(
+                owner, interaction, cast(AudioPlayer, interaction.guild.voice_client), voice and voice.channel
+            )
+            for condition, is_coroutine in chain:
+                message = await condition(context) if is_coroutine else condition(context)
+                if message:
+                    await interaction.response.send_message(message, delete_after=3, ephemeral=True)
+                    return
 
-        bucket = self._cooldown.get_bucket(interaction.message)
-        retry = bucket.update_rate_limit()
-        if retry:
-            await interaction.response.send_message("🤠 Slow down, partner! 🤠", delete_after=3, ephemeral=True)
-            return
+            interaction.extras[CONTEXT_KEY] = context
+            await func(owner, interaction, *args, **kwargs)
 
-        await func(self, *args, **kwargs)
+        return wrapper
 
     return decorator
 
 
-def run_threadsafe(func):
+def checked(interaction: discord.Interaction) -> CheckContext:
     """
-    Decorator to run a coroutine in a thread-safe manner.
-    The decorated function will be run as a thread-safe coroutine.
+    Returns the state resolved by `checks` for this interaction.
     """
-
-    def decorator(*args, **kwargs):
-        loop = next(
-            (arg for arg in args if isinstance(arg, asyncio.AbstractEventLoop)),
-            next((kwarg for kwarg in kwargs.values() if isinstance(kwarg, asyncio.AbstractEventLoop)), None),
-        )
-        if not loop:
-            raise ValueError("No asyncio.AbstractEventLoop found in arguments.")
-
-        if not inspect.iscoroutinefunction(func):
-            raise TypeError("The decorated function must be a coroutine.")
-
-        coro = func(*args, **kwargs)
-        asyncio.run_coroutine_threadsafe(coro, loop=loop)
-
-    return decorator
+    return interaction.extras[CONTEXT_KEY]
@@ -1,27 +1,39 @@
 from __future__ import annotations
 
+import asyncio
 import base64
 import logging
 import os
 from typing import Optional
 
-import dotenv
 import requests
+from storage.shared_state import shared_state
+from utils.circuit_breaker import CircuitBreaker
+from utils.metrics import metrics
 
-# Load environment variables
-dotenv.load_dotenv()
+UPLOAD_SUCCESSFUL = "Upload successful!"
+SERVER_UNAVAILABLE = "Upload failed, the soundboard server is unavailable."
 
-SERVER_URL = f"http://{os.getenv('SERVER_IP')}:{os.getenv('SERVER_PORT')}"
-ENDPOINT = os.getenv('SERVER_ENDPOINT')
+
+def _guild_url(guild_id: int) -> str:
+    # Read at call time, the environment is loaded once by the entry point
+    return f"http://{os.getenv('SERVER_IP')}:{os.getenv('SERVER_PORT')}/{os.getenv('SERVER_ENDPOINT')}/{guild_id}"
 
 
 class Endpoints:
     """
     Handles HTTP communication with the audio server.
+    Requests run off the event loop behind a circuit breaker: while the server is down they fail fast,
+    listings fall back to the last one any bot process received for the guild.
+
+    Metrics:
+        soundboard.fallback: Listings served from the last received one.
     """
 
+    breaker = CircuitBreaker("soundboard", failure_threshold=3, window=30.0, reset_timeout=15.0)
+
     @staticmethod
-    def get_soundboard(guild_id: int) -> Optional[list[str]]:
+    async def get_soundboard(guild_id: int) -> Optional[list[str]]:
         """
         Retrieves a list of sound files from the server for the given guild ID.
 
@@ -29,20 +41,46 @@ class Endpoints:
             guild_id (int): The ID of the guild.
 
         Returns:
-            Optional[list[str]]: A list of sound file names or None if the request fails.
+            Optional[list[str]]: A list of sound file names, the last received one if the server is down,
+                or None if there is none.
         """
-        url = f"{SERVER_URL}/{ENDPOINT}/{guild_id}"
-        try:
-            response = requests.get(url=url, timeout=2)
-            if response.status_code == 200:
-                return response.json().get("files", [])
-            logging.warning("Server responded with status code: %d", response.status_code)
-        except requests.RequestException as e:
-            logging.error("Error fetching soundboard: %s", e)
-        return None
+        listing, _ = await Endpoints.get_soundboard_listing(guild_id)
+        return listing
+
+    @staticmethod
+    async def get_soundboard_listing(guild_id: int) -> tuple[Optional[list[str]], bool]:
+        """
+        Same as `get_soundboard`, also telling whether the listing came from the server.
+
+        Args:
+            guild_id (int): The ID of the guild.
+
+        Returns:
+            tuple[Optional[list[str]], bool]: The listing, and False if the server was not asked or did not answer
+                and the listing is the last received one, which may be stale.
+        """
+        if Endpoints.breaker.allow():
+            try:
+                listing = await asyncio.to_thread(_fetch_soundboard, guild_id)
+            except requests.RequestException as e:
+                logging.error("Error fetching soundboard: %s", e)
+                Endpoints.breaker.record_failure()
+            except Exception:
+                Endpoints.breaker.record_failure()  # Unexpected errors count too, a trial call must be recorded
+                raise
+            else:
+                Endpoints.breaker.record_success()
+                if listing is not None:
+                    await shared_state.put_soundboard_listing(guild_id, listing)
+                return listing, True
+
+        listing = await shared_state.soundboard_listing(guild_id)
+        if listing is not None:
+            metrics.increment("soundboard.fallback")
+        return listing, False
 
     @staticmethod
-    def upload_audio(guild_id: int, file_name: str, file_data: bytes) -> str:
+    async def upload_audio(guild_id: int, file_name: str, file_data: bytes) -> str:
         """
         Uploads audio data to the server.
 
@@ -54,20 +92,40 @@ class Endpoints:
         Returns:
             str: A message indicating the result of the upload operation.
         """
-        url = f"{SERVER_URL}/{ENDPOINT}/{guild_id}"
-        b64_code = base64.b64encode(file_data).decode('utf-8')
-        headers = {'Content-Type': 'application/json'}
-        payload = {"file_name": file_name, "file_data": b64_code}
+        if not Endpoints.breaker.allow():
+            return SERVER_UNAVAILABLE
 
         try:
-            response = requests.post(url=url, headers=headers, json=payload, timeout=2)
-            if response.status_code == 200:
-                return "Upload successful!"
-            return f"Upload failed, server responded with status code: {response.status_code}"
-        except requests.ConnectTimeout:
-            return "Upload failed, connection timed out."
-        except requests.ReadTimeout:
-            return "Upload failed, server took too long to respond."
+            status_code = await asyncio.to_thread(_upload_audio, guild_id, file_name, file_data)
         except requests.RequestException as e:
+            Endpoints.breaker.record_failure()
+            if isinstance(e, requests.ConnectTimeout):
+                return "Upload failed, connection timed out."
+            if isinstance(e, requests.ReadTimeout):
+                return "Upload failed, server took too long to respond."
             logging.error("Error during file upload: %s", e)
             return "Upload failed due to an unexpected error."
+        except Exception:
+            Endpoints.breaker.record_failure()
+            raise
+
+        Endpoints.breaker.record_success()
+        if status_code == 200:
+            await shared_state.put_soundboard_listing(guild_id, None)
+            return UPLOAD_SUCCESSFUL
+        return f"Upload failed, server responded with status code: {status_code}"
+
+
+def _fetch_soundboard(guild_id: int) -> Optional[list[str]]:
+    response = requests.get(url=_guild_url(guild_id), timeout=2)
+    if response.status_code == 200:
+        return response.json().get("files", [])
+    logging.warning("Server responded with status code: %d", response.status_code)
+    return None
+
+
+def _upload_audio(guild_id: int, file_name: str, file_data: bytes) -> int:
+    b64_code = base64.b64encode(file_data).decode('utf-8')
+    headers = {'Content-Type': 'application/json'}
+    payload = {"file_name": file_name, "file_data": b64_code}
+    return requests.post(url=_guild_url(guild_id), headers=headers, json=payload, timeout=2).status_code
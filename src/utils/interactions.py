@@ -0,0 +1,38 @@
+import logging
+from typing import Any, Optional
+
+import discord
+from utils.metrics import metrics
+
+# Discord invalidates interactions that are not acknowledged within 3 seconds of their creation
+ACK_BUDGET = 2.5
+
+
+async def acknowledge(interaction: discord.Interaction, content: Optional[str] = None, **kwargs: Any) -> None:
+    """
+    Acknowledges an interaction before any slow work is done, the work then follows off the response path.
+    Sends `content` as the response, or defers when there is none.
+    The time since Discord created the interaction is recorded as "interaction.ack".
+
+    Args:
+        interaction (discord.Interaction): The interaction to acknowledge.
+        content (Optional[str]): The initial response message.
+        **kwargs: Passed on to `send_message` or `defer`.
+    """
+    if content is None:
+        await interaction.response.defer(**kwargs)
+    else:
+        await interaction.response.send_message(content, **kwargs)
+    record_ack(interaction)
+
+
+def record_ack(interaction: discord.Interaction) -> None:
+    """
+    Records the time-to-ack of an interaction that was just acknowledged.
+    """
+    latency = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+    metrics.observe("interaction.ack", latency)
+    if latency > ACK_BUDGET:
+        metrics.increment("interaction.ack_over_budget")
+        name = interaction.command.name if interaction.command else (interaction.data or {}).get("custom_id")
+        logging.warning("Interaction %s was acknowledged after %.2f s.", name, latency)
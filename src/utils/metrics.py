@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from collections import defaultdict, deque
+
+
+class LatencyStats:
+    """
+    Count, mean and maximum of all observations, percentiles over the most recent ones.
+    """
+
+    __slots__ = ("count", "total", "max", "_recent")
+
+    def __init__(self, window: int = 500) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._recent: deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        """
+        Records a single observation.
+        """
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+        self._recent.append(value)
+
+    @property
+    def mean(self) -> float:
+        """
+        Mean of all observations.
+        """
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """
+        Percentile of the recent observations, e.g. `percentile(95)`.
+        """
+        if not self._recent:
+            return 0.0
+        ordered = sorted(self._recent)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+class Metrics:
+    """
+    In-process counters and latency statistics, keyed by dotted names like "interaction.ack".
+    """
+
+    def __init__(self) -> None:
+        self.counters: defaultdict[str, int] = defaultdict(int)
+        self.latencies: dict[str, LatencyStats] = {}
+
+    def increment(self, name: str, value: int = 1) -> None:
+        """
+        Adds to a counter.
+        """
+        self.counters[name] += value
+
+    def observe(self, name: str, seconds: float) -> None:
+        """
+        Records a latency in seconds.
+        """
+        stats = self.latencies.get(name)
+        if stats is None:
+            stats = self.latencies[name] = LatencyStats()
+        stats.observe(seconds)
+
+    def report(self) -> str:
+        """
+        Formats every counter and latency, latencies in milliseconds.
+        """
+        lines = [f"{name}: {value}" for name, value in sorted(self.counters.items())]
+        for name, stats in sorted(self.latencies.items()):
+            lines.append(
+                f"{name}: n={stats.count} mean={stats.mean * 1000:.0f} p50={stats.percentile(50) * 1000:.0f} "
+                f"p95={stats.percentile(95) * 1000:.0f} max={stats.max * 1000:.0f} ms"
+            )
+        return "\n".join(lines)
+
+
+metrics = Metrics()
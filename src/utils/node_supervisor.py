@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import random
+from typing import Optional
+
+import discord
+import wavelink
+from exceptions.wavelink_exceptions import LavalinkUnavailable
+from utils.wavelink_internals import drop_websocket, set_session_id
+
+
+class NodeSupervisor:
+    """
+    Keeps a Lavalink node connected.
+    Reconnects with jittered exponential backoff, health-checks the node on a timer
+    and lets commands wait in a bounded queue until the node is ready again.
+
+    The node should be created with `retries=0`, so every connection attempt fails fast
+    and the supervisor alone decides when to try again. Every attempt asks Lavalink to resume
+    `session_id`, wavelink forgets the session when its websocket closes.
+    """
+
+    base_delay: float = 1.0
+    max_delay: float = 60.0
+    health_check_interval: float = 30.0
+    health_check_timeout: float = 5.0
+    max_failed_health_checks: int = 3
+
+    def __init__(self, client: discord.Client, max_waiters: int = 50, wait_timeout: float = 60.0) -> None:
+        """
+        Args:
+            client (discord.Client): The bot the node belongs to.
+            max_waiters (int): How many commands may wait for the node at once. Defaults to 50.
+            wait_timeout (float): How long a command waits for the node, in seconds. Defaults to 60.
+        """
+        self.client = client
+        self.max_waiters = max_waiters
+        self.wait_timeout = wait_timeout
+        self.node: Optional[wavelink.Node] = None
+        self.session_id: Optional[str] = None
+        self._ready = asyncio.Event()
+        self._wake = asyncio.Event()
+        self._healthy = True
+        self._waiters = 0
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready(self) -> bool:
+        """
+        Whether the node is connected and passed its last health check.
+        """
+        return self.node is not None and self.node.status is wavelink.NodeStatus.CONNECTED and self._healthy
+
+    @property
+    def waiting(self) -> int:
+        """
+        Number of commands currently waiting for the node.
+        """
+        return self._waiters
+
+    def start(self, node: wavelink.Node) -> None:
+        """
+        Starts supervising the node, the first connection attempt is made immediately.
+        """
+        self.node = node
+        self._task = asyncio.create_task(self._supervise())
+
+    def close(self) -> None:
+        """
+        Stops supervising, the node itself is left as it is.
+        """
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    def node_ready(self) -> None:
+        """
+        Called when the node finished its handshake with Lavalink, releases every waiting command.
+        """
+        self._healthy = True
+        self._ready.set()
+
+    async def wait_until_ready(self, timeout: Optional[float] = None) -> None:
+        """
+        Returns once the node is ready, in the order the callers started waiting.
+
+        Args:
+            timeout (Optional[float]): Seconds to wait at most. Defaults to `wait_timeout`.
+
+        Raises:
+            LavalinkUnavailable: The wait queue is full or the node did not become ready in time.
+        """
+        if self.ready:
+            return
+        if self._waiters >= self.max_waiters:
+            raise LavalinkUnavailable("Too many requests are waiting for the Lavalink node.")
+
+        self._ready.clear()
+        self._wake.set()  # Check the node now instead of at the next health check
+        self._waiters += 1
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=timeout or self.wait_timeout)
+        except asyncio.TimeoutError as err:
+            raise LavalinkUnavailable("The Lavalink node did not become ready in time.") from err
+        finally:
+            self._waiters -= 1
+
+    def backoff(self, failures: int) -> float:
+        """
+        Delay before the next connection attempt, half of it is random so restarted bots do not retry in lockstep.
+        """
+        delay = min(self.max_delay, self.base_delay * 2 ** (failures - 1))
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def _supervise(self) -> None:
+        failures = 0
+        failed_checks = 0
+        while True:
+            status = self.node.status
+            if status is wavelink.NodeStatus.DISCONNECTED:
+                self._ready.clear()
+                await self._connect()
+                if self.node.status is wavelink.NodeStatus.DISCONNECTED:
+                    failures += 1
+                    delay = self.backoff(failures)
+                    logging.warning("Lavalink node unavailable, attempt %d, retrying in %.1f s.", failures, delay)
+                    await asyncio.sleep(delay)
+                    continue
+                failures = 0
+            elif status is wavelink.NodeStatus.CONNECTED:
+                if await self._health_check():
+                    failed_checks = 0
+                    self.node_ready()
+                else:
+                    failed_checks += 1
+                    self._healthy = False
+                    self._ready.clear()
+                    if failed_checks >= self.max_failed_health_checks:
+                        logging.warning("Lavalink node failed %d health checks, reconnecting.", failed_checks)
+                        failed_checks = 0
+                        await self._drop_websocket()
+                        continue
+            await self._sleep_until_next_check()
+
+    async def _sleep_until_next_check(self) -> None:
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=self.health_check_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wake.clear()
+
+    async def _connect(self) -> None:
+        if self.session_id and not self.node.session_id:
+            set_session_id(self.node, self.session_id)
+        try:
+            if self.node.identifier in wavelink.Pool.nodes:
+                await wavelink.Pool.reconnect()
+            else:
+                await wavelink.Pool.connect(client=self.client, nodes=[self.node])
+        except Exception as err:
+            logging.warning("Could not connect to the Lavalink server: %s", err)
+
+    async def _drop_websocket(self) -> None:
+        # The players stay attached, the next connection attempt resumes the session with Lavalink
+        self.session_id = self.node.session_id or self.session_id
+        await drop_websocket(self.node)
+
+    async def _health_check(self) -> bool:
+        try:
+            await asyncio.wait_for(self.node.fetch_stats(), timeout=self.health_check_timeout)
+        except Exception as err:
+            logging.warning("Lavalink health check failed: %s", err)
+            return False
+        return True
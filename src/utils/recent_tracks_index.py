@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import heapq
+import time
+from collections import OrderedDict
+
+MAX_ENTRIES_PER_GUILD = 200
+HALF_LIFE_SECONDS = 6 * 60 * 60
+MAX_CHOICE_LENGTH = 100
+
+
+class RecentEntry:
+    """
+    A single suggestion remembered for a guild.
+    """
+
+    __slots__ = ("title", "value", "normalized", "score", "last_used")
+
+    def __init__(self, title: str, value: str) -> None:
+        self.title = title
+        self.value = value
+        self.normalized = title.lower()
+        self.score = 0.0
+        self.last_used = 0.0
+
+    def bump(self, weight: float, now: float) -> None:
+        """
+        Decays the accumulated score to `now` and adds the weight of a new use.
+        """
+        self.score = self.frecency(now) + weight
+        self.last_used = now
+
+    def frecency(self, now: float) -> float:
+        """
+        Score combining how often and how recently the entry was used.
+        """
+        return self.score * 0.5 ** ((now - self.last_used) / HALF_LIFE_SECONDS)
+
+
+class RecentTracksIndex:
+    """
+    Bounded, per-guild index of recently played and searched tracks used to answer `/play` autocomplete
+    without querying Lavalink.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES_PER_GUILD) -> None:
+        self.max_entries = max_entries
+        self._guilds: dict[int, OrderedDict[str, RecentEntry]] = {}
+
+    def record(self, guild_id: int, title: str, value: str | None, weight: float = 1.0) -> None:
+        """
+        Remembers a track for the guild, evicting the least recently used entry once the guild is full.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            title (str): The name shown in autocomplete.
+            value (str | None): The string passed back to `/play` when the suggestion is picked.
+            weight (float): How much this use counts towards the ranking. Defaults to 1.0.
+        """
+        if not value or len(value) > MAX_CHOICE_LENGTH:
+            return
+
+        entries = self._guilds.setdefault(guild_id, OrderedDict())
+        entry = entries.get(value)
+        if entry is None:
+            entry = entries[value] = RecentEntry(title[:MAX_CHOICE_LENGTH], value)
+            if len(entries) > self.max_entries:
+                entries.popitem(last=False)
+        else:
+            entries.move_to_end(value)
+
+        entry.bump(weight, time.monotonic())
+
+    def suggest(self, guild_id: int, query: str, limit: int = 25) -> list[RecentEntry]:
+        """
+        Returns the best ranked entries whose title contains the query.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            query (str): The partially typed search phrase.
+            limit (int): The maximum number of results. Defaults to 25.
+
+        Returns:
+            list[RecentEntry]: Matching entries, highest ranked first.
+        """
+        entries = self._guilds.get(guild_id)
+        if not entries:
+            return []
+
+        now = time.monotonic()
+        query = query.lower().strip()
+        matches = (entry for entry in entries.values() if query in entry.normalized)
+        return heapq.nlargest(limit, matches, key=lambda entry: entry.frecency(now))
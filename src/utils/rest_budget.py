@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Hashable, Optional, TypeVar
+
+import discord
+from utils.metrics import metrics
+from utils.task_supervisor import TaskSupervisor
+
+T = TypeVar("T")
+
+
+class Priority(IntEnum):
+    """
+    Priority of a UI update.
+    """
+
+    LOW = 0  # Progress refreshes and page flips, only spend the budget above the reserve
+    NORMAL = 1  # Updates after a state change, spend the whole budget
+
+
+@dataclass
+class _Update:
+    call: Callable[[], Awaitable[Any]]
+    priority: Priority
+    queued_at: float
+
+
+@dataclass
+class _ChannelBudget:
+    tokens: float
+    updated: float
+    pending: dict[Hashable, _Update] = field(default_factory=dict)
+    flusher: Optional[asyncio.Task] = None
+
+
+class RestBudget:
+    """
+    Budgets the REST calls of the UI per channel, modelled on Discord's per-channel message bucket.
+    Edits are queued by key and merged, an edit always renders the latest state, so only the newest one
+    of a key is sent. Low priority edits leave a reserve for state changes, and calls made with `call`
+    are never held back, so responses keep moving while refreshes wait.
+
+    Metrics:
+        rest.calls: Calls sent.
+        rest.deferred: Edits queued because the budget was spent.
+        rest.merged: Edits replaced by a newer one of the same key.
+        rest.dropped: Low priority edits that went stale in the queue.
+        rest.over_budget: Calls sent with the budget spent, discord.py sleeps inside these.
+        rest.deferral: Time edits spent queued.
+    """
+
+    limit: int = 5  # Messages sent, edited or deleted per channel
+    per: float = 5.0  # Seconds
+    reserve: int = 2  # Budget low priority edits leave free
+    stale_after: float = 30.0  # Seconds a low priority edit may wait
+
+    def __init__(self, tasks: TaskSupervisor) -> None:
+        """
+        Args:
+            tasks (TaskSupervisor): Runs the queued edits.
+        """
+        self.tasks = tasks
+        self._channels: dict[int, _ChannelBudget] = {}
+
+    def remaining(self, channel_id: int) -> float:
+        """
+        Calls the channel can make before Discord starts rate limiting it.
+        """
+        return self._refill(channel_id).tokens
+
+    async def call(self, channel_id: int, call: Callable[[], Awaitable[T]]) -> T:
+        """
+        Sends a call right away, charging it to the channel's budget.
+        """
+        budget = self._refill(channel_id)
+        if budget.tokens < 1:
+            metrics.increment("rest.over_budget")
+        budget.tokens -= 1
+        metrics.increment("rest.calls")
+        return await call()
+
+    def submit(
+        self,
+        channel_id: int,
+        key: Hashable,
+        call: Callable[[], Awaitable[Any]],
+        priority: Priority = Priority.NORMAL,
+        guild_id: Optional[int] = None,
+    ) -> None:
+        """
+        Queues an edit, it is sent once the channel's budget allows it.
+        A queued edit of the same key is replaced, keeping the higher priority of the two.
+
+        Args:
+            channel_id (int): The channel the edit goes to.
+            key (Hashable): Identifies edits that supersede each other, e.g. the edited message.
+            call (Callable[[], Awaitable[Any]]): Sends the edit.
+            priority (Priority): Priority of the edit.
+            guild_id (Optional[int]): The guild the edit belongs to, its queue is flushed as a task of that guild.
+        """
+        budget = self._refill(channel_id)
+        queued = budget.pending.get(key)
+        if queued:
+            metrics.increment("rest.merged")
+            priority = max(priority, queued.priority)
+        elif budget.tokens < self._threshold(priority):
+            metrics.increment("rest.deferred")
+        budget.pending[key] = _Update(call, priority, queued.queued_at if queued else time.monotonic())
+
+        if not budget.flusher or budget.flusher.done():
+            # Waits for the budget most of the time, a concurrency slot would be held while it sleeps
+            budget.flusher = self.tasks.spawn(
+                self._flush(channel_id), name="rest-flush", guild_id=guild_id, bounded=False
+            )
+
+    def forget(self, channel_id: int) -> None:
+        """
+        Drops the queued edits of a channel.
+        """
+        budget = self._channels.get(channel_id)
+        if budget:
+            budget.pending.clear()
+            if budget.flusher:
+                budget.flusher.cancel()
+
+    async def _flush(self, channel_id: int) -> None:
+        budget = self._channels[channel_id]
+        while budget.pending:
+            key = max(budget.pending, key=lambda pending: budget.pending[pending].priority)
+            update = budget.pending[key]
+            now = time.monotonic()
+            if update.priority == Priority.LOW and now - update.queued_at > self.stale_after:
+                del budget.pending[key]
+                metrics.increment("rest.dropped")
+                continue
+
+            threshold = self._threshold(update.priority)
+            self._refill(channel_id)
+            if budget.tokens < threshold:
+                await asyncio.sleep((threshold - budget.tokens) * self.per / self.limit)
+                continue
+
+            del budget.pending[key]
+            budget.tokens -= 1
+            metrics.increment("rest.calls")
+            metrics.observe("rest.deferral", now - update.queued_at)
+            try:
+                await update.call()
+            except discord.HTTPException as err:
+                logging.warning("UI update in channel %s failed: %s", channel_id, err)
+
+    def _threshold(self, priority: Priority) -> int:
+        return 1 + self.reserve if priority == Priority.LOW else 1
+
+    def _refill(self, channel_id: int) -> _ChannelBudget:
+        now = time.monotonic()
+        budget = self._channels.get(channel_id)
+        if budget is None:
+            budget = self._channels[channel_id] = _ChannelBudget(tokens=self.limit, updated=now)
+            return budget
+        budget.tokens = min(self.limit, budget.tokens + (now - budget.updated) * self.limit / self.per)
+        budget.updated = now
+        return budget
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SearchCache(Generic[T]):
+    """
+    Keeps recently resolved searches for a limited time, least recently used entries are evicted first.
+    A /play retried after a failed voice connection, or a repeated search, is answered without resolving it again.
+    """
+
+    def __init__(self, ttl: float = 600, max_entries: int = 256) -> None:
+        """
+        Args:
+            ttl (float): Seconds an entry stays valid. Defaults to 10 minutes.
+            max_entries (int): Maximum number of entries. Defaults to 256.
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: OrderedDict[Hashable, tuple[float, T]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[T]:
+        """
+        Returns the cached value, None if it is missing or expired.
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: Hashable, value: T) -> None:
+        """
+        Caches a value, evicting the least recently used entry when full.
+        """
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
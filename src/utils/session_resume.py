@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import logging
+import os
+from typing import TYPE_CHECKING, Optional
+
+import wavelink
+from audio_player import AudioPlayer
+from storage.shared_state import shared_state
+
+if TYPE_CHECKING:
+    from discord_bot import DiscordBot
+
+BOT_SCOPE = 0  # State store namespace of values that belong to no guild
+SESSION_KEY = "lavalink_session"
+SUSPENDED_GUILDS_KEY = "suspended_guilds"
+SUSPENDED_PLAYER_KEY = "suspended_player"
+
+
+class SessionResumer:
+    """
+    Lets a restarted bot take over the Lavalink session of the previous process.
+    On shutdown the players are left running on Lavalink and their queues are saved, locally and in the shared
+    state so whichever process gets the guild can take the player over. The session is kept
+    by Lavalink for `resume_timeout` seconds. The next process reconnects with the saved session ID and,
+    if Lavalink resumed it, rejoins the voice channels, the current tracks play on without being loaded again.
+
+    Dispatches `player_resumed(player, snapshot)` for every player taken over.
+    """
+
+    def __init__(self, bot: DiscordBot) -> None:
+        self.bot = bot
+        self.resume_timeout = int(os.getenv("LAVALINK_RESUME_TIMEOUT", "60"))
+        self._first_session = True
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether Lavalink is asked to keep the session after the bot disconnects.
+        """
+        return self.resume_timeout > 0
+
+    async def saved_session(self) -> Optional[str]:
+        """
+        Returns the session ID of the previous process, if resuming is enabled.
+        """
+        if not self.enabled:
+            return None
+        return await self.bot.state.get(BOT_SCOPE, SESSION_KEY)
+
+    def session_ready(self, payload: wavelink.NodeReadyEventPayload) -> None:
+        """
+        Saves the session ID and, on the first session of this process, takes over the resumed players.
+        """
+        self.bot.state.set(BOT_SCOPE, SESSION_KEY, payload.session_id)
+        if not self._first_session:
+            return
+
+        self._first_session = False
+        if payload.resumed:
+            logging.info("Resumed Lavalink session %s.", payload.session_id)
+            self.bot.tasks.spawn(self._restore(payload.node), name="session-restore")
+        else:
+            self.bot.state.set(BOT_SCOPE, SUSPENDED_GUILDS_KEY, [])
+
+    def suspend(self) -> None:
+        """
+        Saves the state of every playing player and keeps it running for the next process.
+        Called on shutdown, before the voice clients are disconnected.
+        """
+        if not self.enabled:
+            return
+
+        snapshots = {}
+        audio_cog = self.bot.get_cog("AudioCog")
+        for player in self.bot.voice_clients:
+            if not isinstance(player, AudioPlayer) or not player.connected or not player.current:
+                continue
+            snapshot = player.snapshot()
+            view = audio_cog.views.get(player.guild.id) if audio_cog else None
+            if view:
+                snapshot["text_channel_id"] = view.text_channel.id
+                snapshot["message_id"] = view.message_handle.id if view.message_handle else None
+                snapshot["repost"] = view.repost
+            self.bot.state.set(player.guild.id, SUSPENDED_PLAYER_KEY, snapshot)
+            player.suspend()
+            snapshots[player.guild.id] = snapshot
+        self.bot.state.set(BOT_SCOPE, SUSPENDED_GUILDS_KEY, list(snapshots))
+        if snapshots:
+            # Awaited by the task supervisor on shutdown
+            self.bot.tasks.spawn(shared_state.save_players(snapshots), name="share-suspended-players")
+            logging.info("Suspended %d players for the next process.", len(snapshots))
+
+    async def _restore(self, node: wavelink.Node) -> None:
+        await self.bot.wait_until_ready()
+        guild_ids = await self.bot.state.get(BOT_SCOPE, SUSPENDED_GUILDS_KEY, [])
+        self.bot.state.set(BOT_SCOPE, SUSPENDED_GUILDS_KEY, [])
+        for guild_id in guild_ids:
+            try:
+                await self._restore_player(node, guild_id)
+            except Exception as err:
+                logging.warning("Could not resume the player of guild %s: %s", guild_id, err)
+
+    async def _restore_player(self, node: wavelink.Node, guild_id: int) -> None:
+        # Taking the shared snapshot keeps other processes from restoring the same player
+        shared_snapshot = await shared_state.take_player(guild_id)
+        snapshot = shared_snapshot or await self.bot.state.get(guild_id, SUSPENDED_PLAYER_KEY)
+        self.bot.state.set(guild_id, SUSPENDED_PLAYER_KEY, None)
+        info = await node.fetch_player_info(guild_id)
+        channel = self.bot.get_channel(snapshot["channel_id"]) if snapshot else None
+        if not (info and info.track and channel):
+            return
+        guild = channel.guild
+        if guild.voice_client:
+            return
+
+        # Joining hands the new voice session to the Lavalink player, which keeps its track
+        player = await channel.connect(cls=AudioPlayer, timeout=20)
+        player.resume(snapshot, info)
+        self.bot.dispatch("player_resumed", player, snapshot)
@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import heapq
+import re
+from typing import Optional
+
+SOUNDBOARD_PREFIX = "sb:"
+GRAM_SIZE = 3
+FUZZY_MATCH_RATIO = 0.5
+
+
+def normalize_name(value: str) -> str:
+    """
+    Normalizes a soundboard file name or query for matching.
+
+    Args:
+        value (str): The raw file name or search phrase.
+
+    Returns:
+        str: Lowercase text with the extension removed and separators collapsed to single spaces.
+    """
+    value = value.lower().removesuffix(".mp3")
+    return " ".join(re.split(r"[\s_\-.]+", value)).strip()
+
+
+def display_name(file_name: str) -> str:
+    """
+    Formats a soundboard file name the same way the `/soundboard` listing does.
+
+    Args:
+        file_name (str): The file name as stored on the soundboard server.
+
+    Returns:
+        str: A human-readable clip name.
+    """
+    return file_name.replace('_', ' - ', 1).replace('_', ' ').capitalize().split('.mp3')[0]
+
+
+def _trigrams(value: str) -> set[str]:
+    """
+    Splits normalized text into its set of character trigrams.
+    """
+    return {value[i:i + GRAM_SIZE] for i in range(len(value) - GRAM_SIZE + 1)}
+
+
+class _GuildSoundboard:
+    """
+    Trigram postings for a single guild's soundboard.
+    """
+
+    def __init__(self) -> None:
+        self.file_names: list[str] = []
+        self.normalized: list[str] = []
+        self.ids: dict[str, int] = {}
+        self.postings: dict[str, set[int]] = {}
+        self.word_prefixes: dict[str, set[int]] = {}
+
+    def add(self, file_name: str) -> None:
+        if file_name in self.ids:
+            return
+
+        clip_id = len(self.file_names)
+        normalized = normalize_name(file_name)
+        self.file_names.append(file_name)
+        self.normalized.append(normalized)
+        self.ids[file_name] = clip_id
+        for gram in _trigrams(normalized):
+            self.postings.setdefault(gram, set()).add(clip_id)
+        for word in normalized.split():
+            for length in range(1, GRAM_SIZE):
+                self.word_prefixes.setdefault(word[:length], set()).add(clip_id)
+
+    def candidates(self, query: str) -> tuple[list[int], bool]:
+        """
+        Returns candidate clip ids and whether they are exact substring matches.
+        """
+        if len(query) < GRAM_SIZE:
+            return list(self.word_prefixes.get(query, ())), True
+
+        grams = _trigrams(query)
+        postings = sorted((self.postings.get(gram, set()) for gram in grams), key=len)
+        if postings[0]:
+            matched = set.intersection(*postings)
+            substring_hits = [i for i in matched if query in self.normalized[i]]
+            if substring_hits:
+                return substring_hits, True
+
+        # No clip contains the whole query, fall back to ranking by shared trigrams to tolerate typos
+        scores: dict[int, int] = {}
+        for posting in postings:
+            for clip_id in posting:
+                scores[clip_id] = scores.get(clip_id, 0) + 1
+        threshold = max(1, int(len(grams) * FUZZY_MATCH_RATIO))
+        fuzzy_hits = [clip_id for clip_id, score in scores.items() if score >= threshold]
+        fuzzy_hits.sort(key=lambda clip_id: -scores[clip_id])
+        return fuzzy_hits, False
+
+    def rank(self, clip_id: int, query: str) -> tuple[int, int]:
+        """
+        Sort key preferring matches closer to the start of shorter names.
+        """
+        name = self.normalized[clip_id]
+        return name.find(query), len(name)
+
+
+class SoundboardIndex:
+    """
+    In-memory trigram index over every guild's soundboard file names.
+    Allows clips to be found by partial or misspelled names instead of their listing number.
+    """
+
+    def __init__(self) -> None:
+        self._guilds: dict[int, _GuildSoundboard] = {}
+
+    def is_loaded(self, guild_id: int) -> bool:
+        """
+        Indicates whether a listing has already been indexed for the guild.
+        """
+        return guild_id in self._guilds
+
+    def load(self, guild_id: int, file_names: list[str]) -> None:
+        """
+        Replaces the guild's index with a fresh soundboard listing.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            file_names (list[str]): Every file name currently on the guild's soundboard.
+        """
+        soundboard = _GuildSoundboard()
+        for file_name in file_names:
+            soundboard.add(file_name)
+        self._guilds[guild_id] = soundboard
+
+    def add(self, guild_id: int, file_name: str) -> None:
+        """
+        Incrementally indexes a single newly uploaded file.
+        Guilds without a loaded listing are left alone, the next full load picks the file up.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            file_name (str): The uploaded file name.
+        """
+        soundboard = self._guilds.get(guild_id)
+        if soundboard is not None:
+            soundboard.add(file_name)
+
+    def search(self, guild_id: int, query: str, limit: int = 25) -> list[str]:
+        """
+        Finds soundboard clips matching a partial name.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            query (str): The partial clip name.
+            limit (int): The maximum number of results. Defaults to 25.
+
+        Returns:
+            list[str]: Matching file names, best match first.
+        """
+        soundboard = self._guilds.get(guild_id)
+        if not soundboard:
+            return []
+
+        normalized_query = normalize_name(query)
+        if not normalized_query:
+            return soundboard.file_names[:limit]
+
+        clip_ids, exact = soundboard.candidates(normalized_query)
+        if exact:
+            clip_ids = heapq.nsmallest(limit, clip_ids, key=lambda clip_id: soundboard.rank(clip_id, normalized_query))
+        return [soundboard.file_names[clip_id] for clip_id in clip_ids[:limit]]
+
+    def resolve(self, guild_id: int, search: str) -> Optional[str]:
+        """
+        Resolves a `/play` search phrase to a soundboard file name.
+        Accepts an exact file name (as sent by autocomplete) or a partial name prefixed with `sb:`.
+
+        Args:
+            guild_id (int): The ID of the guild.
+            search (str): The phrase passed to `/play`.
+
+        Returns:
+            Optional[str]: The matching file name, or None if the phrase does not refer to the soundboard.
+        """
+        soundboard = self._guilds.get(guild_id)
+        if soundboard and search in soundboard.ids:
+            return search
+
+        if not search.lower().startswith(SOUNDBOARD_PREFIX):
+            return None
+
+        matches = self.search(guild_id, search[len(SOUNDBOARD_PREFIX):], limit=1)
+        return matches[0] if matches else None
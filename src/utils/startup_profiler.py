@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+import contextlib
+import logging
+import time
+from typing import Iterator, Optional
+
+
+class StartupProfiler:
+    """
+    Records when each startup phase began and finished, relative to the moment the profiler was created.
+    Phases may overlap, background phases are reported as soon as they finish.
+    """
+
+    def __init__(self) -> None:
+        self._origin = time.perf_counter()
+        self.phases: dict[str, tuple[float, Optional[float]]] = {}
+        self.ready_at: Optional[float] = None
+
+    def elapsed(self) -> float:
+        """
+        Seconds since the profiler was created.
+        """
+        return time.perf_counter() - self._origin
+
+    def begin(self, name: str) -> None:
+        """
+        Starts a phase that ends in a different place than it began, e.g. in an event handler.
+        """
+        self.phases[name] = (self.elapsed(), None)
+
+    def end(self, name: str) -> None:
+        """
+        Finishes a phase started by `begin`, only the first call counts.
+        """
+        start, end = self.phases.get(name, (None, None))
+        if start is not None and end is None:
+            self.phases[name] = (start, self.elapsed())
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Times the wrapped block as a startup phase.
+        A phase that raises is still recorded, so the report shows where startup stopped.
+        """
+        self.begin(name)
+        try:
+            yield
+        finally:
+            self.end(name)
+
+    def mark_ready(self) -> None:
+        """
+        Records the time-to-ready and logs the phase report, only the first call counts.
+        """
+        if self.ready_at is None:
+            self.ready_at = self.elapsed()
+            logging.info("%s", self.report())
+
+    def report(self) -> str:
+        """
+        Formats every phase with its start offset and duration, in the order the phases started.
+        """
+        lines = ["Startup phases:"]
+        for name, (start, end) in sorted(self.phases.items(), key=lambda item: item[1][0]):
+            duration = f"{(end - start) * 1000:8.1f} ms" if end is not None else "     running"
+            lines.append(f"  {name:<20} +{start * 1000:8.1f} ms {duration}")
+        if self.ready_at is not None:
+            lines.append(f"  {'time to ready':<20} +{self.ready_at * 1000:8.1f} ms")
+        return "\n".join(lines)
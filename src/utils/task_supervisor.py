@@ -0,0 +1,142 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Any, Coroutine, Optional
+
+from utils.metrics import metrics
+
+
+class TaskSupervisor:
+    """
+    Owns the bot's background tasks, like message deletions, idle disconnects and embed refreshes.
+    Tasks are registered with their guild so they can be cancelled when the bot leaves it,
+    failures are logged and counted instead of being lost with an unreferenced task.
+
+    Metrics:
+        tasks.started, tasks.failed, tasks.cancelled: Counters of finished tasks.
+        tasks.active: Number of running tasks.
+        tasks.failed.<name>: Failures by task name.
+    """
+
+    def __init__(self, max_concurrency: int = 32) -> None:
+        """
+        Args:
+            max_concurrency (int): Bounded tasks allowed to run at once, the rest wait for a slot.
+        """
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks: defaultdict[Optional[int], set[asyncio.Task]] = defaultdict(set)
+        self._unbounded: set[asyncio.Task] = set()
+        self._closed = False
+
+    def spawn(
+        self,
+        coro: Coroutine[Any, Any, Any],
+        *,
+        name: str,
+        guild_id: Optional[int] = None,
+        bounded: bool = True,
+        replace: bool = False,
+    ) -> asyncio.Task:
+        """
+        Runs a coroutine in the background.
+
+        Args:
+            coro (Coroutine): The work to run.
+            name (str): Name of the task, used in logs and metrics.
+            guild_id (Optional[int]): The guild the task belongs to, None for bot-wide tasks.
+            bounded (bool): Whether the task is finite work, it takes a concurrency slot and is awaited at shutdown.
+                Unbounded tasks, like refresh loops, are cancelled at shutdown instead. Tasks that spend most
+                of their time asleep, like timers, are spawned unbounded so they do not hold up other work.
+            replace (bool): Cancel the guild's running tasks of the same name first.
+
+        Returns:
+            asyncio.Task: The task, already registered.
+
+        Raises:
+            RuntimeError: The supervisor has been closed.
+        """
+        if self._closed:
+            coro.close()
+            raise RuntimeError("The task supervisor is closed.")
+
+        if replace:
+            for task in self._tasks.get(guild_id, ()):
+                if task.get_name() == name and task is not asyncio.current_task():
+                    task.cancel()
+
+        task = asyncio.create_task(self._run(coro, name, bounded), name=name)
+        self._tasks[guild_id].add(task)
+        if not bounded:
+            self._unbounded.add(task)
+        task.add_done_callback(lambda done: self._discard(guild_id, done, coro))
+        metrics.increment("tasks.started")
+        metrics.increment("tasks.active")
+        return task
+
+    def count(self, guild_id: Optional[int] = None) -> int:
+        """
+        Number of running tasks of a guild, or of all guilds when none is given.
+        """
+        if guild_id is None:
+            return sum(len(tasks) for tasks in self._tasks.values())
+        return len(self._tasks.get(guild_id, ()))
+
+    def cancel_guild(self, guild_id: int) -> int:
+        """
+        Cancels the running tasks of a guild, except the calling task.
+
+        Returns:
+            int: Number of cancelled tasks.
+        """
+        current = asyncio.current_task()
+        cancelled = 0
+        for task in tuple(self._tasks.get(guild_id, ())):
+            if task is not current and not task.done():
+                task.cancel()
+                cancelled += 1
+        return cancelled
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """
+        Stops accepting tasks, cancels the unbounded ones and waits for the rest.
+        Tasks still running after the deadline are cancelled.
+        """
+        self._closed = True
+        tasks = {task for tasks in self._tasks.values() for task in tasks}
+        tasks.discard(asyncio.current_task())
+        for task in tasks & self._unbounded:
+            task.cancel()
+        if not tasks:
+            return
+
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        if pending:
+            logging.warning("Cancelling %d background tasks still running at shutdown.", len(pending))
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _run(self, coro: Coroutine[Any, Any, Any], name: str, bounded: bool) -> Any:
+        try:
+            if bounded:
+                async with self._semaphore:
+                    return await coro
+            return await coro
+        except Exception:
+            metrics.increment("tasks.failed")
+            metrics.increment(f"tasks.failed.{name}")
+            logging.exception("Background task %s failed.", name)
+
+    def _discard(self, guild_id: Optional[int], task: asyncio.Task, coro: Coroutine[Any, Any, Any]) -> None:
+        coro.close()  # A task cancelled before its first step never started the coroutine
+        metrics.increment("tasks.active", -1)
+        if task.cancelled():
+            metrics.increment("tasks.cancelled")
+        self._unbounded.discard(task)
+        tasks = self._tasks.get(guild_id)
+        if tasks is not None:
+            tasks.discard(task)
+            if not tasks:
+                del self._tasks[guild_id]
@@ -0,0 +1,26 @@
+def parse_timestamp(text: str) -> int:
+    """
+    Parses a time like "83", "1:23" or "1:02:03" into milliseconds.
+
+    Raises:
+        ValueError: The text is not a valid time.
+    """
+    parts = text.strip().split(":")
+    if not 1 <= len(parts) <= 3 or not all(part.isdigit() for part in parts):
+        raise ValueError(f"Invalid timestamp: {text}")
+
+    seconds = 0
+    for part in parts:
+        seconds = seconds * 60 + int(part)
+    return seconds * 1000
+
+
+def format_timestamp(milliseconds: int) -> str:
+    """
+    Formats milliseconds as "m:ss", or "h:mm:ss" for an hour or more.
+    """
+    minutes, seconds = divmod(max(milliseconds, 0) // 1000, 60)
+    hours, minutes = divmod(minutes, 60)
+    if hours:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes}:{seconds:02d}"
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import logging
+import re
+import time
+from typing import Any, Iterator, Optional
+
+import discord
+from audio_filters import preset_names
+from utils.soundboard_index import SOUNDBOARD_PREFIX
+from utils.task_supervisor import TaskSupervisor
+
+TRACE_FORMAT = 1
+# Option types holding Discord objects: user, channel, role, mentionable and attachment
+OBJECT_OPTION_TYPES = {6, 7, 8, 9, 11}
+TIMESTAMP_PATTERN = re.compile(r"[+-]?\d+(:\d{1,2}){0,2}")
+PLAYLIST_PATTERN = re.compile(r"list=([^#&?]*)")
+VIDEO_PATTERN = re.compile(r"(?:youtu\.be/|youtube\.com/watch\?v=)([\w-]+)")
+START_TIME_PATTERN = re.compile(r"[?&]t=(\d+)")
+
+
+class TraceRecorder:
+    """
+    Records an anonymized trace of the traffic the bot handles, to be replayed by `benchmarks/replay_load.py`.
+    Slash commands, autocompletes, player components, voice state updates and track ends are buffered and
+    appended to a gzip-compressed JSON lines file off the event loop, every run starts with a header line.
+
+    Guilds, users and channels are replaced with numbers only meaningful within one run, Discord objects passed
+    as options are dropped and free text keeps only its shape: a search phrase becomes an alias that is
+    the same whenever the phrase repeats, a URL keeps its kind and start time.
+
+    Events are JSON arrays starting with their kind and milliseconds since the header:
+        ["c", t, guild, user, command, options]: Slash command.
+        ["a", t, guild, user, command, options]: Autocomplete, the focused option is named in "_focused".
+        ["i", t, guild, user, callback, values]: Player component.
+        ["v", t, guild, user, channel before, channel after]: Voice state update.
+        ["e", t, guild, reason]: Track end.
+    """
+
+    flush_every = 256
+
+    def __init__(self, tasks: TaskSupervisor, path: Optional[str] = None) -> None:
+        """
+        Args:
+            tasks (TaskSupervisor): Runs the writes in the background.
+            path (Optional[str]): File the trace is appended to, None disables recording.
+        """
+        self.tasks = tasks
+        self.path = path
+        self._started = time.monotonic()
+        self._buffer: list[Any] = [{"format": TRACE_FORMAT, "started": time.time()}]
+        self._aliases: dict[tuple[str, Any], int] = {}
+        self._lock = asyncio.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        """
+        Whether a trace is being recorded.
+        """
+        return self.path is not None
+
+    def interaction(self, interaction: discord.Interaction) -> None:
+        """
+        Records a slash command or an autocomplete.
+        """
+        if not self.enabled or interaction.type not in (
+            discord.InteractionType.application_command,
+            discord.InteractionType.autocomplete,
+        ):
+            return
+        data = interaction.data or {}
+        name, options = data.get("name", ""), data.get("options", [])
+        # Subcommands and groups nest their options, their names are part of the command
+        while options and options[0].get("type") in (1, 2):
+            name = f"{name} {options[0]['name']}"
+            options = options[0].get("options", [])
+
+        values = {}
+        for option in options:
+            if option.get("type") in OBJECT_OPTION_TYPES:
+                continue
+            values[option["name"]] = self._anonymize(name, option["name"], option.get("value"))
+            if option.get("focused"):
+                values["_focused"] = option["name"]
+        kind = "a" if interaction.type is discord.InteractionType.autocomplete else "c"
+        self._record(kind, self._alias("g", interaction.guild_id), self._alias("u", interaction.user.id), name, values)
+
+    def component(self, interaction: discord.Interaction, callback: str) -> None:
+        """
+        Records a press of a player button or a choice in one of its selects.
+        """
+        if not self.enabled:
+            return
+        values = [self._anonymize("", "value", value) for value in (interaction.data or {}).get("values", [])]
+        self._record(
+            "i", self._alias("g", interaction.guild_id), self._alias("u", interaction.user.id), callback, values
+        )
+
+    def voice_state(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState) -> None:
+        """
+        Records a user joining, leaving or moving between voice channels.
+        """
+        if not self.enabled or before.channel == after.channel:
+            return
+        self._record(
+            "v",
+            self._alias("g", member.guild.id),
+            self._alias("u", member.id),
+            self._alias("ch", before.channel.id) if before.channel else None,
+            self._alias("ch", after.channel.id) if after.channel else None,
+        )
+
+    def track_end(self, guild_id: int, reason: str) -> None:
+        """
+        Records a track that stopped playing.
+        """
+        if self.enabled:
+            self._record("e", self._alias("g", guild_id), reason)
+
+    async def close(self) -> None:
+        """
+        Writes the buffered events.
+        """
+        if self.enabled:
+            await self._flush()
+
+    def _record(self, kind: str, *fields: Any) -> None:
+        self._buffer.append([kind, int((time.monotonic() - self._started) * 1000), *fields])
+        if len(self._buffer) >= self.flush_every:
+            try:
+                self.tasks.spawn(self._flush(), name="trace-flush")
+            except RuntimeError:
+                pass  # Shutting down, close() writes the rest
+
+    async def _flush(self) -> None:
+        async with self._lock:
+            events, self._buffer = self._buffer, []
+            if events:
+                try:
+                    await asyncio.to_thread(append_trace, self.path, events)
+                except OSError as err:
+                    logging.warning("Could not write the traffic trace: %s", err)
+
+    def _alias(self, namespace: str, value: Any) -> Optional[int]:
+        if value is None:
+            return None
+        key = (namespace, value)
+        alias = self._aliases.get(key)
+        if alias is None:
+            alias = self._aliases[key] = len(self._aliases) + 1
+        return alias
+
+    def _anonymize(self, command: str, option: str, value: Any) -> Any:
+        if not isinstance(value, str):
+            return value
+        if command == "play" and option == "search":
+            return self._anonymize_search(value)
+        if value.isdigit() or TIMESTAMP_PATTERN.fullmatch(value) or value in preset_names():
+            return value
+        return f"text {self._alias('text', value)}"
+
+    def _anonymize_search(self, search: str) -> str:
+        if search.isdigit():
+            return search  # Soundboard number
+        playlist = PLAYLIST_PATTERN.search(search)
+        if playlist:
+            return f"https://www.youtube.com/playlist?list={self._alias('playlist', playlist.group(1))}"
+        video = VIDEO_PATTERN.search(search)
+        if video:
+            start_time = START_TIME_PATTERN.search(search)
+            url = f"https://www.youtube.com/watch?v={self._alias('video', video.group(1))}"
+            return f"{url}&t={start_time.group(1)}" if start_time else url
+        if search.lower().startswith(SOUNDBOARD_PREFIX):
+            clip = search[len(SOUNDBOARD_PREFIX):].strip().lower()
+            return f"{SOUNDBOARD_PREFIX}clip {self._alias('clip', clip)}"
+        return f"search {self._alias('search', search.strip().lower())}"
+
+
+def read_trace(path: str) -> Iterator[list]:
+    """
+    Reads the events of a trace in order, runs are joined one after another.
+    Event times are made relative to the start of the first run.
+    """
+    offset = last = 0
+    with gzip.open(path, "rt", encoding="utf-8") as file:
+        for line in file:
+            event = json.loads(line)
+            if isinstance(event, dict):
+                if event.get("format") != TRACE_FORMAT:
+                    raise ValueError(f"Unsupported trace format: {event.get('format')}")
+                offset = last
+                continue
+            event[1] += offset
+            last = event[1]
+            yield event
+
+
+def append_trace(path: str, events: list) -> None:
+    """
+    Appends events to a trace file, a run starts with its header.
+    Every append is a gzip member of its own, readers see the members as one stream.
+    """
+    with gzip.open(path, "at", encoding="utf-8") as file:
+        file.writelines(json.dumps(event, separators=(",", ":")) + "\n" for event in events)
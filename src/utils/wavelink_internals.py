@@ -0,0 +1,58 @@
+from __future__ import annotations
+
+import time
+from typing import Optional
+
+import wavelink
+
+# The only place that touches private attributes of wavelink nodes and players. Wavelink has no public API
+# for resuming a session or taking over a running player, so these functions depend on the internals
+# of the pinned wavelink version, tests/test_wavelink_internals.py fails when an upgrade removes any of them.
+NODE_ATTRIBUTES = ("_session_id", "_websocket", "_players", "_status")
+PLAYER_ATTRIBUTES = ("_current", "_original", "_paused", "_volume", "_filters", "_last_position", "_last_update")
+
+
+def set_session_id(node: wavelink.Node, session_id: str) -> None:
+    """
+    Makes the next connection of the node ask Lavalink to resume the given session.
+    """
+    node._session_id = session_id
+
+
+async def drop_websocket(node: wavelink.Node) -> None:
+    """
+    Closes only the websocket of a node, unlike `Node.close` which disconnects every player and
+    forgets the session. The players stay attached to the node until it reconnects.
+    """
+    players = dict(node._players)
+    if node._websocket:
+        await node._websocket.cleanup()
+    node._status = wavelink.NodeStatus.DISCONNECTED
+    node._players.update(players)
+
+
+def adopt_player_state(player: wavelink.Player, info: wavelink.PlayerResponsePayload) -> None:
+    """
+    Sets the track, pause state, volume and filters of a player to those Lavalink reports,
+    without sending anything to Lavalink.
+    """
+    player._current = player._original = info.track
+    player._paused = info.paused
+    player._volume = info.volume
+    player._filters = info.filters
+
+
+def set_position(player: wavelink.Player, position: int) -> None:
+    """
+    Sets the last known position of a player, wavelink updates the same fields on every player update.
+    """
+    player._last_position = position
+    player._last_update = time.monotonic_ns()
+
+
+def last_position(player: wavelink.Player) -> tuple[int, Optional[int]]:
+    """
+    Returns the last known position of a player in milliseconds, and when it was known in
+    `time.monotonic_ns` nanoseconds, None if it never was.
+    """
+    return player._last_position, player._last_update
@@ -3,16 +3,15 @@ from __future__ import annotations
 import asyncio
 import datetime
 from dataclasses import dataclass
-from typing import TYPE_CHECKING, cast
+from typing import TYPE_CHECKING, Iterable, Optional, cast
 
 import discord
-from discord.ext import commands
+from audio_filters import NO_FILTERS, preset_names, resolve_preset
 from audio_player import AudioPlayer
-from utils.decorators import (
-    button_cooldown,
-    is_playing_check,
-    user_bot_in_same_channel_check,
-)
+from utils.decorators import button_cooldown, checked, checks, is_playing, same_voice_channel
+from utils.interactions import acknowledge
+from utils.rest_budget import Priority
+from utils.timestamps import format_timestamp
 
 if TYPE_CHECKING:
     from main import DiscordBot
@@ -27,23 +26,42 @@ class QueueDisplay:
     MAX_PREVIEW_ITEMS = 10
 
 
+@dataclass
+class ProgressDisplay:
+    """Configuration for the progress bar"""
+
+    WIDTH = 15
+    SEEK_STEP = 10_000  # Milliseconds moved by the seek buttons
+    REFRESH_INTERVAL = 15  # Seconds between progress refreshes of a playing track
+
+
+DANCING_EMOJI = discord.PartialEmoji.from_str('<a:catvibe:858756437705883648>')
+CUSTOM_ID_PREFIX = 'player:'  # Components keep their IDs across restarts, a new process can take a message over
+PLAYER_MESSAGE_KEY = 'player_message'  # State store key of the channel and message IDs of the player
+
+
 class AudioPlayerView(discord.ui.View):
     """View class for controlling audio player through Discord UI"""
 
-    def __init__(self, bot: DiscordBot, text_channel: discord.TextChannel):
+    def __init__(
+        self,
+        bot: DiscordBot,
+        text_channel: discord.TextChannel | discord.Thread,
+        cooldown: float = 1,
+        repost: bool = True,
+    ):
         super().__init__(timeout=None)
         self.bot = bot
         self.text_channel = text_channel
-        self.message_handle: discord.Message | None = None
+        self.message_handle: discord.Message | discord.PartialMessage | None = None
+        # A player in a channel of its own is not buried by chat, it is edited instead of sent anew on track change
+        self.repost = repost
         self.queue_page = 0
-        self._cooldown = commands.CooldownMapping.from_cooldown(rate=1, per=1, type=commands.BucketType.channel)
+        self._progress_task: Optional[asyncio.Task] = None
+        self.cooldown = cooldown
         self._setup_buttons()
         self._setup_queue_select()
-
-    def __del__(self):
-        if self.message_handle:
-            coro = self.message_handle.delete()
-            asyncio.run_coroutine_threadsafe(coro, self.bot.loop)
+        self._setup_filter_select()
 
     def _setup_buttons(self):
         """Initialize button layouts and styles"""
@@ -63,6 +81,12 @@ class AudioPlayerView(discord.ui.View):
         self.next_page_button = self._create_button(
             '▶', discord.ButtonStyle.grey, self.next_page_callback, row=2, disabled=True
         )
+        self.shuffle_button = self._create_button('🔀 Shuffle', discord.ButtonStyle.grey, self.shuffle_callback, row=2)
+        self.dedupe_button = self._create_button('✂ Dedupe', discord.ButtonStyle.grey, self.dedupe_callback, row=2)
+
+        # Row 4: Seek controls
+        self.rewind_button = self._create_button('⏪ 10s', discord.ButtonStyle.grey, self.rewind_callback, row=4)
+        self.forward_button = self._create_button('10s ⏩', discord.ButtonStyle.grey, self.forward_callback, row=4)
 
     def _setup_queue_select(self):
         """Initialize queue selection dropdown"""
@@ -73,30 +97,78 @@ class AudioPlayerView(discord.ui.View):
             min_values=1,
             disabled=True,
             row=1,
+            custom_id=f'{CUSTOM_ID_PREFIX}queue_select',
         )
         self.queue_select.callback = self.queue_select_callback
         self.add_item(self.queue_select)
 
+    def _setup_filter_select(self):
+        """Initialize filter preset dropdown"""
+        self.filter_select = discord.ui.Select(
+            options=[discord.SelectOption(label=name) for name in preset_names()],
+            placeholder=f'Filter: {NO_FILTERS.name}',
+            max_values=1,
+            min_values=1,
+            disabled=True,
+            row=3,
+            custom_id=f'{CUSTOM_ID_PREFIX}filter_select',
+        )
+        self.filter_select.callback = self.filter_select_callback
+        self.add_item(self.filter_select)
+
     def _create_button(self, label: str, style: discord.ButtonStyle, callback, **kwargs) -> discord.ui.Button:
-        """Create and configure a button with the given parameters"""
-        button = discord.ui.Button(label=label, style=style, **kwargs)
+        """Create and configure a button with the given parameters, its ID is named after the callback"""
+        custom_id = CUSTOM_ID_PREFIX + callback.__name__.removesuffix('_callback')
+        button = discord.ui.Button(label=label, style=style, custom_id=custom_id, **kwargs)
         button.callback = callback
         self.add_item(button)
         return button
 
-    async def remove_view(self):
-        """Clean up resources and remove the view"""
-        await self._delete_message_handle()
+    async def remove_view(self, delete_message: bool = True):
+        """Clean up resources and remove the view, the message is kept for the next process if asked to"""
+        if self._progress_task:
+            self._progress_task.cancel()
+            self._progress_task = None
+        self.bot.rest_budget.forget(self.text_channel.id)
+        if delete_message:
+            await self.bot.rest_budget.call(self.text_channel.id, self._delete_message_handle)
         self.stop()
         self.clear_items()
 
     async def send_embed(self):
-        """Update the embed message with current player state"""
+        """Send the embed message anew with current player state, edit it when not reposted or low on REST budget"""
+        budget = self.bot.rest_budget
+        if self.message_handle and (not self.repost or budget.remaining(self.text_channel.id) < 2):
+            await self.update_embed()
+            return
+
         embed = await self._create_embed()
-        self._update_ui_state()
+        await self._update_ui_state()
+        await budget.call(self.text_channel.id, self._delete_message_handle)
+        self.message_handle = await budget.call(
+            self.text_channel.id, lambda: self.text_channel.send(embed=embed, view=self)
+        )
+        self._remember_message()
+        self._start_progress_refresh()
+
+    def reattach(self, message_id: int):
+        """Take over a player message left by an earlier process without fetching it, the next update edits it"""
+        self.message_handle = self.text_channel.get_partial_message(message_id)
+        self._start_progress_refresh()
+
+    def _remember_message(self):
+        """Store where the player message is, a later process takes it over instead of leaving it behind"""
+        handle = self.message_handle
+        self.bot.state.set(
+            self.text_channel.guild.id, PLAYER_MESSAGE_KEY, [self.text_channel.id, handle.id] if handle else None
+        )
 
-        await self._delete_message_handle()
-        self.message_handle = await self.text_channel.send(embed=embed, view=self)
+    def _start_progress_refresh(self):
+        """Start redrawing the progress bar, once per view"""
+        if not self._progress_task:
+            self._progress_task = self.bot.tasks.spawn(
+                self._refresh_progress(), name="progress-refresh", guild_id=self.text_channel.guild.id, bounded=False
+            )
 
     def _format_duration(self, milliseconds: float) -> str:
         """Format milliseconds duration into human-readable string"""
@@ -108,6 +180,17 @@ class AudioPlayerView(discord.ui.View):
             return f'⌛ {int(hours):02d} hr {int(minutes):02d} min'
         return f'⌛ {int(minutes):02d} min {int(seconds):02d} s'
 
+    def _format_progress(self, player: AudioPlayer) -> str:
+        """Format progress bar of the current track"""
+        track = player.current
+        if track.is_stream:
+            return '🔴 LIVE'
+
+        position = player.position
+        filled = min(int(ProgressDisplay.WIDTH * position / track.length), ProgressDisplay.WIDTH - 1)
+        bar = '▬' * filled + '🔘' + '▬' * (ProgressDisplay.WIDTH - filled - 1)
+        return f'{bar}\n{format_timestamp(position)} / {format_timestamp(track.length)}'
+
     def _format_queue_preview(self, player: AudioPlayer) -> tuple[str, str]:
         """Format queue preview and duration"""
         if not player.queue:
@@ -144,37 +227,52 @@ class AudioPlayerView(discord.ui.View):
         else:
             embed.add_field(name='Nothing is playing right now', value=':(', inline=True)
 
-        embed.add_field(name='', value='▁' * 15, inline=False)
+        if player.current and player.current.length:
+            embed.add_field(name='', value=self._format_progress(player), inline=False)
+        else:
+            embed.add_field(name='', value='▁' * ProgressDisplay.WIDTH, inline=False)
         embed.set_footer(text='2137', icon_url='https://media.tenor.com/mc3OyxhLazUAAAAM/doggo-doge.gif')
         return embed
 
-    def _update_ui_state(self):
+    async def _update_ui_state(self):
         """Update all UI elements based on current player state"""
         player = cast(AudioPlayer, self.text_channel.guild.voice_client)
 
         # Update button states
         self._update_playback_buttons(player)
         self._update_navigation_buttons(player)
-        self._update_queue_select(player)
+        await self._update_queue_select(player)
+        self._update_filter_select(player)
 
     def _update_playback_buttons(self, player: AudioPlayer):
         """Update state of playback control buttons"""
         self.previous_button.disabled = not len(player.queue.history) > 1
         self.pause_button.label = '▶ Resume' if player.paused else '❚❚ Pause'
         self.pause_button.disabled = not player.playing
+        seekable = bool(player.current and player.current.is_seekable)
+        self.rewind_button.disabled = not seekable
+        self.forward_button.disabled = not seekable
         self.skip_button.disabled = not player.playing
         self.stop_button.disabled = not player.playing
         self.filter_button.disabled = not player.playing
 
         # Update filter button appearance
-        dancing_emoji = discord.PartialEmoji.from_str('<a:catvibe:858756437705883648>')
         self.filter_button.label = '' if player.filters_applied else 'ඞ'
-        self.filter_button.emoji = dancing_emoji if player.filters_applied else None
+        self.filter_button.emoji = DANCING_EMOJI if player.filters_applied else None
+
+    def _update_filter_select(self, player: AudioPlayer):
+        """Update filter preset dropdown"""
+        settings = self.bot.guild_settings.get_cached(self.text_channel.guild.id)
+        current = player.filter_preset or NO_FILTERS.name
+        self.filter_select.disabled = not player.playing
+        self.filter_select.placeholder = f'Filter: {current}'
+        names = preset_names(settings.custom_filters)
+        self._fill_options(self.filter_select, ((name, name) for name in names), default=current)
 
     def _update_navigation_buttons(self, player: AudioPlayer):
         """Update state of navigation buttons"""
         queue_len = len(player.queue)
-        history_len = len(player.queue.history)
+        history_len = player.queue.history.total
 
         max_pages = max(queue_len - 1, 0) // QueueDisplay.MAX_ITEMS
         min_pages = -(max(history_len - 1, 0) // QueueDisplay.MAX_ITEMS) - 1 if history_len else 0
@@ -182,13 +280,15 @@ class AudioPlayerView(discord.ui.View):
         self.queue_page = min(max_pages, max(min_pages, self.queue_page))
         self.previous_page_button.disabled = self.queue_page <= min_pages
         self.next_page_button.disabled = self.queue_page >= max_pages
+        self.shuffle_button.disabled = queue_len < 2
+        self.dedupe_button.disabled = not player.queue.dedupe_needed(player.current)
 
-    def _update_queue_select(self, player: AudioPlayer):
+    async def _update_queue_select(self, player: AudioPlayer):
         """Update queue selection dropdown"""
         if self.queue_page >= 0:
             self._update_current_queue_select(player)
         else:
-            self._update_history_queue_select(player)
+            await self._update_history_queue_select(player)
 
     def _update_current_queue_select(self, player: AudioPlayer):
         """Update dropdown for current queue"""
@@ -196,38 +296,73 @@ class AudioPlayerView(discord.ui.View):
         end_idx = (self.queue_page + 1) * QueueDisplay.MAX_ITEMS
 
         if not player.queue:
-            self.queue_select.disabled = True
-            self.queue_select.options = [discord.SelectOption(label=QueueDisplay.PLACEHOLDER)]
-            self.queue_select.placeholder = QueueDisplay.PLACEHOLDER
+            self._clear_queue_select()
             return
 
         self.queue_select.disabled = False
-        self.queue_select.options = [
-            discord.SelectOption(label=f'{i + 1}. {track.title}', value=str(i))
-            for i, track in enumerate(player.queue[start_idx:end_idx])
-        ]
+        self._fill_options(
+            self.queue_select,
+            (
+                (f'{i + 1}. {track.title}', str(i))
+                for i, track in enumerate(player.queue[start_idx:end_idx], start_idx)
+            ),
+        )
         self.queue_select.placeholder = (
             f'Displaying: {start_idx + 1}-{min(end_idx, len(player.queue))} (current queue)'
         )
 
-    def _update_history_queue_select(self, player: AudioPlayer):
-        """Update dropdown for history queue"""
-        history = list(player.queue.history)[::-1]
+    async def _update_history_queue_select(self, player: AudioPlayer):
+        """Update dropdown for history queue, newest first, only the shown page is read from the history"""
+        history = player.queue.history
+        total = history.total
         start_idx = (-self.queue_page - 1) * QueueDisplay.MAX_ITEMS
         end_idx = -self.queue_page * QueueDisplay.MAX_ITEMS
 
-        if not history:
-            self.queue_select.disabled = True
-            self.queue_select.options = [discord.SelectOption(label=QueueDisplay.PLACEHOLDER)]
-            self.queue_select.placeholder = QueueDisplay.PLACEHOLDER
+        if not total:
+            self._clear_queue_select()
             return
 
+        page = await history.page(total - end_idx, total - start_idx)
         self.queue_select.disabled = False
-        self.queue_select.options = [
-            discord.SelectOption(label=f'{i + 1}. {track.title}', value=str(len(history) - 1 - i))
-            for i, track in enumerate(history[start_idx:end_idx])
-        ]
-        self.queue_select.placeholder = f'Displaying: {start_idx + 1}-{min(end_idx, len(history))} (history queue)'
+        self._fill_options(
+            self.queue_select,
+            (
+                (f'{i + 1}. {track.title}', str(total - 1 - i))
+                for i, track in enumerate(reversed(page), start_idx)
+            ),
+        )
+        self.queue_select.placeholder = f'Displaying: {start_idx + 1}-{min(end_idx, total)} (history queue)'
+
+    def _clear_queue_select(self):
+        """Show the empty queue placeholder"""
+        self.queue_select.disabled = True
+        self._fill_options(self.queue_select, [(QueueDisplay.PLACEHOLDER, QueueDisplay.PLACEHOLDER)])
+        self.queue_select.placeholder = QueueDisplay.PLACEHOLDER
+
+    @staticmethod
+    def _fill_options(select: discord.ui.Select, entries: Iterable[tuple[str, str]], default: Optional[str] = None):
+        """Set the labels and values of a dropdown, reusing the options of the previous render"""
+        options = select.options
+        count = 0
+        for count, (label, value) in enumerate(entries, 1):
+            if count > len(options):
+                options.append(discord.SelectOption(label=label, value=value))
+            option = options[count - 1]
+            option.label, option.value, option.default = label, value, value == default
+        del options[count:]
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """Record the pressed component in the traffic trace, every interaction is handled"""
+        if self.bot.trace.enabled:
+            item = discord.utils.get(self.children, custom_id=(interaction.data or {}).get("custom_id"))
+            if item:
+                self.bot.trace.component(interaction, getattr(item.callback, "__name__", type(item).__name__))
+        return True
+
+    async def on_error(self, interaction: discord.Interaction, error: Exception, item: discord.ui.Item):
+        """Report errors of every callback"""
+        source = getattr(item.callback, "__name__", type(item).__name__)
+        await self.bot.exception_handler.respond(interaction, error, source)
 
     async def _delete_message_handle(self):
         """Delete the message handle if it exists"""
@@ -236,87 +371,182 @@ class AudioPlayerView(discord.ui.View):
                 await self.message_handle.delete()
             except discord.NotFound:
                 pass
+            self.message_handle = None
+            self._remember_message()
 
     # Button Callbacks
-    @user_bot_in_same_channel_check
-    @button_cooldown
+    @checks(same_voice_channel, button_cooldown)
     async def previous_callback(self, interaction: discord.Interaction):
         """Play previous track"""
-        player = cast(AudioPlayer, interaction.guild.voice_client)
+        player = checked(interaction).player
+        await acknowledge(interaction)
         await player.play_previous_track()
-        await interaction.response.defer()
 
-    @user_bot_in_same_channel_check
-    @button_cooldown
+    @checks(same_voice_channel, button_cooldown)
     async def pause_callback(self, interaction: discord.Interaction):
         """Toggle pause state"""
-        player = cast(AudioPlayer, interaction.guild.voice_client)
+        player = checked(interaction).player
+        await acknowledge(interaction)
         await player.pause(not player.paused)
-        await interaction.response.defer()
-        await self._update_embed()
+        await self.update_embed()
 
-    @user_bot_in_same_channel_check
-    @is_playing_check
-    @button_cooldown
+    @checks(same_voice_channel, is_playing, button_cooldown)
     async def skip_callback(self, interaction: discord.Interaction):
         """Skip current track"""
-        player = cast(AudioPlayer, interaction.guild.voice_client)
+        player = checked(interaction).player
+        await acknowledge(interaction)
         await player.skip()
-        await interaction.response.defer()
 
-    @user_bot_in_same_channel_check
-    @is_playing_check
-    @button_cooldown
+    @checks(same_voice_channel, is_playing, button_cooldown)
     async def stop_callback(self, interaction: discord.Interaction):
         """Stop playback and clear queue"""
-        player = cast(AudioPlayer, interaction.guild.voice_client)
+        player = checked(interaction).player
+        await acknowledge(interaction)
         player.queue.clear()
         await player.skip()
         await player.disable_filters()
-        await interaction.response.defer()
 
-    @user_bot_in_same_channel_check
-    @is_playing_check
+    @checks(same_voice_channel, is_playing)
     async def filter_callback(self, interaction: discord.Interaction):
         """Toggle audio filters"""
-        player = cast(AudioPlayer, interaction.guild.voice_client)
+        player = checked(interaction).player
+        await acknowledge(interaction)
         await player.toggle_nightcore_filter()
-        await interaction.response.defer()
-        await self._update_embed()
+        await self.bot.guild_settings.update(interaction.guild_id, filter_preset=player.filter_preset)
+        await self.update_embed()
+
+    @checks(same_voice_channel, is_playing)
+    async def filter_select_callback(self, interaction: discord.Interaction):
+        """Apply selected filter preset"""
+        player = checked(interaction).player
+        settings = await self.bot.guild_settings.get(interaction.guild_id)
+        try:
+            preset = resolve_preset(self.filter_select.values[0], settings.custom_filters)
+        except KeyError:
+            await interaction.response.send_message("Unknown filter preset.", delete_after=3, ephemeral=True)
+            return
 
-    @user_bot_in_same_channel_check
+        await acknowledge(interaction)
+        await player.apply_filter_preset(preset)
+        await self.bot.guild_settings.update(interaction.guild_id, filter_preset=player.filter_preset)
+        await self.update_embed()
+
+    @checks(same_voice_channel)
     async def queue_select_callback(self, interaction: discord.Interaction):
         """Handle queue selection"""
-        player = cast(AudioPlayer, interaction.guild.voice_client)
+        player = checked(interaction).player
         index = int(self.queue_select.values[0])
+        await acknowledge(interaction)
 
         if self.queue_page >= 0:
             await player.play_track_from_queue(index)
         else:
             await player.play_track_from_history(index)
 
-        await interaction.response.defer()
-
-    @user_bot_in_same_channel_check
+    @checks(same_voice_channel, button_cooldown)
+    async def shuffle_callback(self, interaction: discord.Interaction):
+        """Shuffle upcoming tracks"""
+        player = checked(interaction).player
+        await acknowledge(interaction)
+        player.queue.shuffle()
+        await self.update_embed()
+
+    @checks(same_voice_channel, button_cooldown)
+    async def dedupe_callback(self, interaction: discord.Interaction):
+        """Remove repeated tracks from the queue"""
+        player = checked(interaction).player
+        await acknowledge(interaction)
+        removed = player.queue.dedupe(player.current)
+        if removed:
+            await self.update_embed()
+
+    @checks(same_voice_channel, is_playing, button_cooldown)
+    async def rewind_callback(self, interaction: discord.Interaction):
+        """Seek 10 seconds back"""
+        player = checked(interaction).player
+        await acknowledge(interaction)
+        await player.seek_by(-ProgressDisplay.SEEK_STEP)
+        await self.update_embed()
+
+    @checks(same_voice_channel, is_playing, button_cooldown)
+    async def forward_callback(self, interaction: discord.Interaction):
+        """Seek 10 seconds forward"""
+        player = checked(interaction).player
+        await acknowledge(interaction)
+        await player.seek_by(ProgressDisplay.SEEK_STEP)
+        await self.update_embed()
+
+    @checks(same_voice_channel)
     async def previous_page_callback(self, interaction: discord.Interaction):
         """Show previous page of queue"""
         self.queue_page -= 1
-        await interaction.response.defer()
-        await self._update_embed()
+        await acknowledge(interaction)
+        await self.update_embed(Priority.LOW)
 
-    @user_bot_in_same_channel_check
+    @checks(same_voice_channel)
     async def next_page_callback(self, interaction: discord.Interaction):
         """Show next page of queue"""
         self.queue_page += 1
-        await interaction.response.defer()
-        await self._update_embed()
+        await acknowledge(interaction)
+        await self.update_embed(Priority.LOW)
 
-    async def _update_embed(self):
-        """Update existing embed message"""
+    async def update_embed(self, priority: Priority = Priority.NORMAL):
+        """Queue an edit of the embed message, queued edits are merged into one sent within the REST budget"""
         if not self.text_channel:
             return
 
+        self.bot.rest_budget.submit(
+            self.text_channel.id, "player-embed", self._edit_embed, priority, self.text_channel.guild.id
+        )
+
+    async def _edit_embed(self):
+        """Edit the embed message with current player state"""
+        if not self.text_channel.guild.voice_client:
+            return
+
         embed = await self._create_embed()
-        self._update_ui_state()
+        await self._update_ui_state()
         if self.message_handle:
-            await self.message_handle.edit(view=self, embed=embed)
+            try:
+                await self.message_handle.edit(view=self, embed=embed)
+            except discord.NotFound:
+                # Deleted by someone, or gone while the bot was offline
+                self.message_handle = None
+                await self.send_embed()
+
+    async def _refresh_progress(self):
+        """Periodically redraw the progress bar while a track is playing"""
+        while True:
+            await asyncio.sleep(ProgressDisplay.REFRESH_INTERVAL)
+            player = cast(AudioPlayer, self.text_channel.guild.voice_client)
+            if player and player.playing and not player.paused and self.message_handle:
+                await self.update_embed(Priority.LOW)
+
+
+class PlayerControls(discord.ui.View):
+    """Persistent view registered once at startup, passes presses on player messages to the view of their guild"""
+
+    def __init__(self, bot: DiscordBot, views: dict[int, AudioPlayerView]):
+        super().__init__(timeout=None)
+        self.bot = bot
+        self.views = views
+        # Interactions are matched by component type and custom ID, a player view provides both
+        for item in AudioPlayerView(bot, None).children:
+            item.callback = self._route
+            self.add_item(item)
+
+    async def _route(self, interaction: discord.Interaction):
+        """Run the interaction through the guild's view, remove the controls of a player that is gone"""
+        view = self.views.get(interaction.guild_id)
+        custom_id = (interaction.data or {}).get('custom_id')
+        item = discord.utils.get(view.children, custom_id=custom_id) if view else None
+        if not item:
+            await interaction.response.edit_message(view=None)
+            return
+        # As if the press was on the view's own message: the item is checked and its errors reported.
+        # Selected values are already set, discord.py keeps them by custom ID for the whole interaction
+        try:
+            if await item.interaction_check(interaction) and await view.interaction_check(interaction):
+                await item.callback(interaction)
+        except Exception as error:
+            await view.on_error(interaction, error, item)
@@ -0,0 +1,66 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from cogs.admin_cog import AdminCog
+from storage.database import Database
+from storage.guild_settings_store import GuildSettingsStore
+from storage.shared_state import shared_state
+from storage.state_backend import InMemoryBackend
+
+GUILD = 1
+
+
+@pytest.fixture(autouse=True)
+def fresh_shared_state(monkeypatch):
+    # Settings are published to the shared state and read back from it before the database
+    monkeypatch.setattr(shared_state, "backend", InMemoryBackend())
+
+
+class Response:
+    def __init__(self) -> None:
+        self.messages: list[str] = []
+
+    async def send_message(self, content: str, **kwargs) -> None:
+        self.messages.append(content)
+
+
+def run_settings(tmp_path, *calls: dict) -> tuple[list[str], GuildSettingsStore]:
+    async def run():
+        database = Database(str(tmp_path / "bot.sqlite3"))
+        await database.connect()
+        store = GuildSettingsStore(database)
+        await store.start()
+        bot = SimpleNamespace(guild_settings=store, command=lambda: lambda func: func)
+        cog = AdminCog(bot)
+        response = Response()
+        interaction = SimpleNamespace(guild_id=GUILD, response=response)
+        try:
+            for options in calls:
+                await cog.settings.callback(cog, interaction, **options)
+        finally:
+            await store.close()
+            await database.close()
+        return response.messages, store
+
+    return asyncio.run(run())
+
+
+def test_embed_channel_is_set(tmp_path):
+    channel = SimpleNamespace(id=42)
+    messages, store = run_settings(tmp_path, {"embed_channel": channel})
+    assert store.get_cached(GUILD).embed_channel_id == 42
+    assert "Player channel: <#42>" in messages[-1]
+
+
+def test_embed_channel_is_reset_to_the_play_channel(tmp_path):
+    messages, store = run_settings(tmp_path, {"embed_channel": SimpleNamespace(id=42)}, {"reset_embed_channel": True})
+    assert store.get_cached(GUILD).embed_channel_id is None
+    assert "Player channel: channel of /play" in messages[-1]
+
+
+def test_settings_left_out_are_kept(tmp_path):
+    messages, store = run_settings(tmp_path, {"embed_channel": SimpleNamespace(id=42), "volume": 30}, {})
+    settings = store.get_cached(GUILD)
+    assert settings.embed_channel_id == 42
+    assert settings.volume == 30
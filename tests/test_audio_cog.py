@@ -0,0 +1,47 @@
+import asyncio
+from types import SimpleNamespace
+
+from cogs.audio_cog import AudioCog
+
+rollback_connect = AudioCog._AudioCog__rollback_connect
+
+
+class FakePlayer:
+    def __init__(self, channel: str, connected: bool = True) -> None:
+        self.channel = channel
+        self.connected = connected
+        self.disconnected = False
+
+    async def move_to(self, channel: str) -> None:
+        self.channel = channel
+
+    async def disconnect(self, force: bool = False) -> None:
+        self.disconnected = True
+
+
+def rollback(player, was_connected: bool, previous_channel):
+    guild = SimpleNamespace(id=1, voice_client=player)
+    asyncio.run(rollback_connect(None, guild, was_connected, previous_channel))
+    return player
+
+
+def test_fresh_connection_is_left():
+    player = rollback(FakePlayer("requester"), False, None)
+    assert player.disconnected
+
+
+def test_move_goes_back_to_the_previous_channel():
+    player = rollback(FakePlayer("requester"), True, "listeners")
+    assert player.channel == "listeners"
+    assert not player.disconnected
+
+
+def test_player_that_did_not_move_stays():
+    player = rollback(FakePlayer("listeners"), True, "listeners")
+    assert player.channel == "listeners"
+    assert not player.disconnected
+
+
+def test_broken_connection_is_cleaned_up():
+    player = rollback(FakePlayer("listeners", connected=False), True, "listeners")
+    assert player.disconnected
@@ -0,0 +1,28 @@
+import pytest
+from audio_filters import BUILTIN_PRESETS, NO_FILTERS, normalize_preset_name, resolve_preset
+
+CUSTOM = {"slow jam": {"speed": 0.8, "pitch": 0.9, "bass": 0.2, "rotation": 0.0}}
+
+
+def test_names_are_normalized():
+    assert normalize_preset_name("  Slow   JAM ") == "slow jam"
+
+
+@pytest.mark.parametrize("name", [None, "", "off", "OFF"])
+def test_no_filters(name):
+    assert resolve_preset(name) is NO_FILTERS
+
+
+def test_builtin_presets_ignore_case():
+    assert resolve_preset("Bass  Boost") is BUILTIN_PRESETS["bass boost"]
+
+
+def test_custom_presets_ignore_case():
+    preset = resolve_preset("Slow Jam", CUSTOM)
+    assert preset.name == "slow jam"
+    assert preset.timescale.payload["speed"] == 0.8
+
+
+def test_unknown_preset():
+    with pytest.raises(KeyError):
+        resolve_preset("missing", CUSTOM)
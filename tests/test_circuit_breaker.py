@@ -0,0 +1,112 @@
+import pytest
+from utils import circuit_breaker
+from utils.circuit_breaker import CircuitBreaker
+from utils.metrics import metrics
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(circuit_breaker.time, "monotonic", clock)
+    return clock
+
+
+def opened_breaker(clock: Clock, name: str = "test") -> CircuitBreaker:
+    breaker = CircuitBreaker(name, failure_threshold=3, window=10, reset_timeout=30)
+    for _ in range(3):
+        breaker.record_failure()
+    assert breaker.open
+    return breaker
+
+
+def test_opens_after_threshold_failures_in_window(clock):
+    breaker = CircuitBreaker("opens", failure_threshold=3, window=10, reset_timeout=30)
+    opened = metrics.counters["breaker.opens.opened"]
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert not breaker.open and breaker.allow()
+    breaker.record_failure()
+
+    assert breaker.open
+    assert not breaker.allow()
+    assert metrics.counters["breaker.opens.opened"] == opened + 1
+
+
+def test_failures_outside_window_do_not_count(clock):
+    breaker = CircuitBreaker("window", failure_threshold=3, window=10, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_failure()
+    clock.now += 11
+    breaker.record_failure()
+
+    assert not breaker.open
+
+
+def test_rejects_until_reset_timeout(clock):
+    breaker = opened_breaker(clock, "rejects")
+    rejected = metrics.counters["breaker.rejects.rejected"]
+
+    clock.now += 29
+    assert not breaker.allow()
+    assert metrics.counters["breaker.rejects.rejected"] == rejected + 1
+    clock.now += 1
+    assert breaker.allow()
+
+
+def test_successful_trial_closes(clock):
+    breaker = opened_breaker(clock)
+    clock.now += 30
+
+    assert breaker.allow()
+    assert not breaker.allow(), "only one trial call at a time"
+    breaker.record_success()
+
+    assert not breaker.open
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.open, "failures before the trial are forgotten"
+
+
+def test_failed_trial_reopens(clock):
+    breaker = opened_breaker(clock)
+    clock.now += 30
+    assert breaker.allow()
+
+    breaker.record_failure()
+
+    assert breaker.open
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+
+
+def test_unrecorded_trial_expires(clock):
+    breaker = opened_breaker(clock)
+    clock.now += 30
+    assert breaker.allow()
+
+    clock.now += 29
+    assert not breaker.allow()
+    clock.now += 1
+    assert breaker.allow()
+    breaker.record_success()
+    assert not breaker.open
+
+
+def test_success_while_closed_keeps_it_closed(clock):
+    breaker = CircuitBreaker("closed", failure_threshold=3, window=10, reset_timeout=30)
+    breaker.record_failure()
+    breaker.record_success()
+
+    assert not breaker.open
+    assert breaker.allow()
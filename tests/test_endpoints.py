@@ -0,0 +1,52 @@
+import asyncio
+
+import pytest
+import requests
+from storage.shared_state import shared_state
+from storage.state_backend import InMemoryBackend
+from utils import endpoints
+from utils.circuit_breaker import CircuitBreaker
+from utils.endpoints import Endpoints
+
+GUILD = 1
+LISTING = ["1_airhorn.mp3", "2_sad_trombone.mp3"]
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    monkeypatch.setattr(shared_state, "backend", InMemoryBackend())
+    monkeypatch.setattr(Endpoints, "breaker", CircuitBreaker("soundboard", failure_threshold=3))
+
+
+def serve(monkeypatch, *responses):
+    # Each call returns the next response, an exception is raised instead
+    replies = iter(responses)
+
+    def fetch(guild_id):
+        reply = next(replies)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+    monkeypatch.setattr(endpoints, "_fetch_soundboard", fetch)
+
+
+def test_listing_from_the_server_is_fresh(monkeypatch):
+    serve(monkeypatch, LISTING)
+    assert asyncio.run(Endpoints.get_soundboard_listing(GUILD)) == (LISTING, True)
+
+
+def test_failed_request_falls_back_to_the_last_listing(monkeypatch):
+    serve(monkeypatch, LISTING, requests.ConnectionError("refused"))
+
+    async def run():
+        await Endpoints.get_soundboard(GUILD)
+        return await Endpoints.get_soundboard_listing(GUILD)
+
+    assert asyncio.run(run()) == (LISTING, False)
+    assert not Endpoints.breaker.open, "the fallback is used before the breaker opens"
+
+
+def test_failed_request_without_a_last_listing(monkeypatch):
+    serve(monkeypatch, requests.ConnectionError("refused"))
+    assert asyncio.run(Endpoints.get_soundboard_listing(GUILD)) == (None, False)
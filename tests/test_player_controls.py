@@ -0,0 +1,75 @@
+import asyncio
+from types import SimpleNamespace
+
+from views.audio_player_view import AudioPlayerView, PlayerControls
+
+GUILD = 1
+
+
+class Response:
+    def __init__(self) -> None:
+        self.edits: list[dict] = []
+
+    async def edit_message(self, **kwargs) -> None:
+        self.edits.append(kwargs)
+
+
+class ExceptionHandler:
+    def __init__(self) -> None:
+        self.errors: list[tuple[Exception, str]] = []
+
+    async def respond(self, interaction, error: Exception, source: str) -> None:
+        self.errors.append((error, source))
+
+
+def make_bot() -> SimpleNamespace:
+    return SimpleNamespace(trace=SimpleNamespace(enabled=False), exception_handler=ExceptionHandler())
+
+
+async def press(controls: PlayerControls, custom_id: str, values: list[str] = ()) -> SimpleNamespace:
+    # Dispatched the way discord.py does for a press on a message of the persistent view
+    item = next(item for item in controls.children if item.custom_id == custom_id)
+    data = {"custom_id": custom_id, "component_type": item.type.value, "values": list(values)}
+    interaction = SimpleNamespace(guild_id=GUILD, data=data, response=Response())
+    await controls._scheduled_task(item, interaction)
+    return interaction
+
+
+def test_press_runs_the_guild_view_callback_with_the_selected_values():
+    async def run():
+        bot = make_bot()
+        view = AudioPlayerView(bot, None)
+        selected = []
+
+        async def filter_select_callback(interaction):
+            selected.append(list(view.filter_select.values))
+
+        view.filter_select.callback = filter_select_callback
+        await press(PlayerControls(bot, {GUILD: view}), view.filter_select.custom_id, ["nightcore"])
+        return selected
+
+    assert asyncio.run(run()) == [["nightcore"]]
+
+
+def test_callback_errors_go_to_the_guild_view():
+    async def run():
+        bot = make_bot()
+        view = AudioPlayerView(bot, None)
+        button = view.children[0]
+
+        async def failing_callback(interaction):
+            raise RuntimeError("boom")
+
+        button.callback = failing_callback
+        await press(PlayerControls(bot, {GUILD: view}), button.custom_id)
+        return bot.exception_handler.errors
+
+    assert [str(error) for error, _ in asyncio.run(run())] == ["boom"]
+
+
+def test_controls_of_a_missing_player_are_removed():
+    async def run():
+        controls = PlayerControls(make_bot(), {})
+        return await press(controls, controls.children[0].custom_id)
+
+    assert asyncio.run(run()).response.edits == [{"view": None}]
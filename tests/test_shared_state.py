@@ -0,0 +1,73 @@
+import asyncio
+
+from storage import shared_state as shared_state_module
+from storage.shared_state import SharedState
+from storage.state_backend import InMemoryBackend, StateBackend, StateBackendError
+from utils.metrics import metrics
+
+
+class SlowBackend(StateBackend):
+    async def execute(self, commands):
+        await asyncio.sleep(10)
+        return []
+
+
+class FailingBackend(StateBackend):
+    async def execute(self, commands):
+        raise StateBackendError("connection refused")
+
+
+async def hits(state: SharedState, bucket: str, count: int, rate: int = 3, per: float = 10) -> list[float]:
+    return [await state.hit_rate_limit(bucket, rate, per) for _ in range(count)]
+
+
+def test_calls_within_rate_are_allowed():
+    waits = asyncio.run(hits(SharedState(InMemoryBackend()), "allowed", 3))
+    assert waits == [0, 0, 0]
+
+
+def test_calls_over_rate_wait_for_the_window():
+    waits = asyncio.run(hits(SharedState(InMemoryBackend()), "over", 5))
+    assert waits[:3] == [0, 0, 0]
+    assert all(9 < wait <= 10 for wait in waits[3:])
+
+
+def test_buckets_are_counted_separately():
+    async def run():
+        state = SharedState(InMemoryBackend())
+        await hits(state, "first", 3)
+        return await state.hit_rate_limit("second", 3, 10)
+
+    assert asyncio.run(run()) == 0
+
+
+def test_window_resets():
+    async def run():
+        state = SharedState(InMemoryBackend())
+        over = await hits(state, "reset", 2, rate=1, per=0.05)
+        await asyncio.sleep(0.06)
+        return over, await state.hit_rate_limit("reset", 1, 0.05)
+
+    over, after_reset = asyncio.run(run())
+    assert over[0] == 0 and over[1] > 0
+    assert after_reset == 0
+
+
+def test_slow_backend_falls_back_to_local_counting(monkeypatch):
+    monkeypatch.setattr(shared_state_module, "RATE_LIMIT_TIMEOUT", 0.01)
+    local = metrics.counters["shared_state.local_rate_limits"]
+
+    waits = asyncio.run(hits(SharedState(SlowBackend()), "slow", 4))
+
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3] > 0
+    assert metrics.counters["shared_state.local_rate_limits"] == local + 4
+
+
+def test_failing_backend_falls_back_to_local_counting():
+    state = SharedState(FailingBackend())
+    waits = asyncio.run(hits(state, "failing", 4))
+
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3] > 0
+    assert state.breaker.open
@@ -0,0 +1,59 @@
+from utils.soundboard_index import SOUNDBOARD_PREFIX, SoundboardIndex, normalize_name
+
+GUILD = 1
+LISTING = ["1_airhorn.mp3", "2_sad_trombone.mp3", "3_Trombone-Solo.mp3", "4_bruh.mp3"]
+
+
+def loaded_index() -> SoundboardIndex:
+    index = SoundboardIndex()
+    index.load(GUILD, LISTING)
+    return index
+
+
+def test_normalize_name_drops_extension_and_separators():
+    assert normalize_name("3_Trombone-Solo.mp3") == "3 trombone solo"
+
+
+def test_search_finds_partial_names_earliest_match_first():
+    index = loaded_index()
+    assert index.search(GUILD, "trombone") == ["3_Trombone-Solo.mp3", "2_sad_trombone.mp3"]
+    assert index.search(GUILD, "air") == ["1_airhorn.mp3"]
+
+
+def test_search_tolerates_typos():
+    assert set(loaded_index().search(GUILD, "trmbone")) == {"2_sad_trombone.mp3", "3_Trombone-Solo.mp3"}
+
+
+def test_search_of_unknown_guild_is_empty():
+    assert SoundboardIndex().search(GUILD, "bruh") == []
+
+
+def test_empty_query_lists_clips():
+    assert loaded_index().search(GUILD, "", limit=2) == LISTING[:2]
+
+
+def test_load_replaces_the_listing():
+    index = loaded_index()
+    index.load(GUILD, ["5_new.mp3"])
+    assert index.search(GUILD, "bruh") == []
+    assert index.search(GUILD, "new") == ["5_new.mp3"]
+
+
+def test_add_indexes_an_upload_of_a_loaded_guild():
+    index = loaded_index()
+    index.add(GUILD, "5_drum_roll.mp3")
+    assert index.search(GUILD, "drum") == ["5_drum_roll.mp3"]
+
+
+def test_add_leaves_a_cold_guild_unloaded():
+    index = SoundboardIndex()
+    index.add(GUILD, "5_drum_roll.mp3")
+    assert not index.is_loaded(GUILD)
+    assert index.search(GUILD, "drum") == []
+
+
+def test_resolve_accepts_file_names_and_prefixed_phrases():
+    index = loaded_index()
+    assert index.resolve(GUILD, "4_bruh.mp3") == "4_bruh.mp3"
+    assert index.resolve(GUILD, f"{SOUNDBOARD_PREFIX}airhorn") == "1_airhorn.mp3"
+    assert index.resolve(GUILD, "airhorn") is None
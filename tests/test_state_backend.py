@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from storage.state_backend import RespBackend, StateBackendError
+
+
+class FakeServer:
+    """
+    Minimal Redis-protocol server answering every command with a canned reply.
+    """
+
+    def __init__(self, replies: dict[str, bytes]) -> None:
+        self.replies = replies
+        self.commands: list[list[bytes]] = []
+        self.server: asyncio.Server = None
+
+    async def __aenter__(self) -> "FakeServer":
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.server.close()
+        await self.server.wait_closed()
+
+    @property
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                count = int((await reader.readuntil(b"\r\n"))[1:-2])
+                command = []
+                for _ in range(count):
+                    length = int((await reader.readuntil(b"\r\n"))[1:-2])
+                    command.append((await reader.readexactly(length + 2))[:-2])
+                self.commands.append(command)
+                writer.write(self.replies.get(command[0].decode(), b"+OK\r\n"))
+                await writer.drain()
+        except asyncio.IncompleteReadError:
+            writer.close()
+
+
+def run_against(replies: dict[str, bytes], **options):
+    async def run():
+        async with FakeServer(replies) as server:
+            backend = RespBackend("127.0.0.1", server.port, **options)
+            try:
+                with pytest.raises(StateBackendError) as err:
+                    await backend.execute([("SET", "key", "value")])
+                return err.value, backend, [command[0] for command in server.commands]
+            finally:
+                await backend.close()
+
+    return asyncio.run(run())
+
+
+def test_failed_auth_raises_and_drops_the_connection():
+    err, backend, commands = run_against({"AUTH": b"-ERR invalid password\r\n"}, password="wrong")
+    assert "invalid password" in str(err)
+    assert backend._writer is None
+    assert commands == [b"AUTH"]
+
+
+def test_failed_select_raises_instead_of_using_db_0():
+    err, backend, commands = run_against({"SELECT": b"-ERR DB index is out of range\r\n"}, db=99)
+    assert "out of range" in str(err)
+    assert backend._writer is None
+    assert b"SET" not in commands
+
+
+def test_successful_handshake_runs_the_commands():
+    async def run():
+        async with FakeServer({}) as server:
+            backend = RespBackend("127.0.0.1", server.port, db=2, password="secret")
+            replies = await backend.execute([("SET", "key", "value")])
+            await backend.close()
+            return replies, server.commands
+
+    replies, commands = asyncio.run(run())
+    assert replies == ["OK"]
+    assert commands == [[b"AUTH", b"secret"], [b"SELECT", b"2"], [b"SET", b"key", b"value"]]
@@ -0,0 +1,101 @@
+import asyncio
+
+from storage.database import Database
+from storage.history_segment_store import HistorySegmentStore
+from track_queue import TrackHistory, TrackRef
+from utils.metrics import metrics
+
+
+def ref(number: int) -> TrackRef:
+    return TrackRef(f"enc-{number}", str(number), f"Track {number}", 1000, {"requester": number})
+
+
+def ids(tracks) -> list[int]:
+    return [int(track.identifier) for track in tracks]
+
+
+def run_with_store(tmp_path, test, memory_limit: int = 150):
+    async def run():
+        database = Database(str(tmp_path / "bot.sqlite3"))
+        await database.connect()
+        store = HistorySegmentStore(database, memory_limit=memory_limit)
+        store.flush_interval = 3600
+        await store.start()
+        try:
+            return await test(store)
+        finally:
+            await store.close()
+            await database.close()
+
+    return asyncio.run(run())
+
+
+def test_history_without_store_keeps_everything():
+    history = TrackHistory()
+    for number in range(300):
+        history.put(ref(number))
+
+    assert history.total == len(history) == 300
+    assert history.spilled == 0
+    assert ids(asyncio.run(history.page(290, 400))) == list(range(290, 300))
+
+
+def test_spilled_tracks_read_back_in_order(tmp_path):
+    async def test(store):
+        history = TrackHistory(store)
+        for number in range(1234):
+            history.put(ref(number))
+        assert history.total == 1234
+        assert len(history) <= store.memory_limit
+        assert history.spilled % store.segment_size == 0 and history.spilled > 0
+
+        unwritten = await history.page(0, 1234)
+        await store.flush()
+        store._read_cache.clear()
+        reads = metrics.counters["history.segment_reads"]
+        written = await history.page(0, 1234)
+        return unwritten, written, metrics.counters["history.segment_reads"] - reads, await history.page(95, 310)
+
+    unwritten, written, reads, middle = run_with_store(tmp_path, test)
+    assert ids(unwritten) == list(range(1234))
+    assert ids(written) == list(range(1234))
+    assert reads > 0
+    assert ids(middle) == list(range(95, 310))
+    assert written[7].user_data == {"requester": 7}
+
+
+def test_take_spilled_and_in_memory_tracks(tmp_path):
+    async def test(store):
+        history = TrackHistory(store)
+        for number in range(400):
+            history.put(ref(number))
+        await store.flush()
+
+        spilled = await history.take(5)
+        total_after_spilled = history.total
+        latest = await history.take(399)
+        return spilled, total_after_spilled, latest, history.total, ids(await history.page(0, history.total))
+
+    spilled, total_after_spilled, latest, total, remaining = run_with_store(tmp_path, test)
+    assert int(spilled.identifier) == 5
+    assert total_after_spilled == 400, "spilled tracks stay in the history"
+    assert int(latest.identifier) == 399
+    assert total == 399
+    assert remaining == list(range(399))
+
+
+def test_clear_forgets_spilled_tracks(tmp_path):
+    async def test(store):
+        history = TrackHistory(store)
+        for number in range(400):
+            history.put(ref(number))
+        old_session = history.session
+        history.clear()
+        history.put(ref(1000))
+        await store.flush()
+        return history.total, ids(await history.page(0, 10)), await store.read(old_session, 0)
+
+    total, tracks, old_segment = run_with_store(tmp_path, test)
+    assert total == 1
+    assert tracks == [1000]
+    assert old_segment == []
@@ -0,0 +1,111 @@
+import pytest
+from track_queue import TrackList, TrackQueue, TrackRef
+
+
+def ref(identifier: str) -> TrackRef:
+    return TrackRef(f"enc-{identifier}", identifier, f"Track {identifier}", 1000)
+
+
+def refs(*identifiers: str) -> list[TrackRef]:
+    return [ref(identifier) for identifier in identifiers]
+
+
+def ids(tracks) -> list[str]:
+    return [track.identifier for track in tracks]
+
+
+@pytest.fixture
+def small_blocks(monkeypatch):
+    # Spreads a handful of tracks over several blocks
+    monkeypatch.setattr(TrackList, "load", 2)
+
+
+def queue_of(*identifiers: str) -> TrackQueue:
+    queue = TrackQueue(history=False)
+    queue.put(refs(*identifiers))
+    return queue
+
+
+def test_track_list_behaves_like_a_list(small_blocks):
+    expected = [str(i) for i in range(11)]
+    tracks = TrackList(refs(*expected))
+    assert len(tracks._blocks) > 1
+
+    tracks.insert(5, ref("x"))
+    expected.insert(5, "x")
+    del tracks[2]
+    del expected[2]
+    tracks.insert_many(7, refs("y", "z"))
+    expected[7:7] = ["y", "z"]
+
+    assert ids(tracks) == expected
+    assert ids(tracks[3:9]) == expected[3:9]
+    assert [tracks[i].identifier for i in range(-len(expected), len(expected))] == expected * 2
+    assert ref("x") in tracks and ref("missing") not in tracks
+    with pytest.raises(IndexError):
+        tracks[len(expected)]
+
+
+@pytest.mark.parametrize("source, destination", [(0, 9), (9, 0), (3, 6), (6, 3), (-1, 2), (4, 4)])
+def test_move(small_blocks, source, destination):
+    identifiers = [str(i) for i in range(10)]
+    queue = queue_of(*identifiers)
+
+    moved = queue.move(source, destination)
+
+    expected = list(identifiers)
+    expected.insert(destination, expected.pop(source))
+    assert moved.identifier == identifiers[source]
+    assert ids(queue) == expected
+
+
+def test_move_from_missing_index(small_blocks):
+    queue = queue_of("a", "b")
+    with pytest.raises(IndexError):
+        queue.move(5, 0)
+    assert ids(queue) == ["a", "b"]
+
+
+@pytest.mark.parametrize("start, stop", [(0, 3), (2, 9), (5, 10), (0, 10), (4, 20), (6, 6), (8, 2)])
+def test_remove_range(small_blocks, start, stop):
+    identifiers = [str(i) for i in range(10)]
+    queue = queue_of(*identifiers)
+
+    removed = queue.remove_range(start, stop)
+
+    expected = list(identifiers)
+    del expected[start:stop]
+    assert removed == len(identifiers) - len(expected)
+    assert ids(queue) == expected
+    assert len(queue) == len(expected)
+    assert all(queue._items.count_identifier(identifier) == 1 for identifier in expected)
+
+
+def test_dedupe_keeps_first_occurrences(small_blocks):
+    queue = queue_of("a", "b", "a", "c", "b", "b", "d")
+    assert queue.dedupe_needed()
+
+    assert queue.dedupe() == 3
+    assert ids(queue) == ["a", "b", "c", "d"]
+    assert not queue.dedupe_needed()
+    assert queue.dedupe() == 0
+
+
+def test_dedupe_removes_copies_of_the_current_track(small_blocks):
+    queue = queue_of("a", "b", "c")
+    current = ref("b")
+    assert queue.dedupe_needed(current)
+
+    assert queue.dedupe(current) == 1
+    assert ids(queue) == ["a", "c"]
+    assert not queue.dedupe_needed(current)
+
+
+def test_duplicate_tracking_follows_removals(small_blocks):
+    queue = queue_of("a", "b", "a")
+    assert queue.dedupe_needed()
+
+    queue.remove_range(2, 3)
+    assert not queue.dedupe_needed()
+    queue.put(ref("b"))
+    assert queue.dedupe_needed()
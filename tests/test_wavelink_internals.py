@@ -0,0 +1,66 @@
+import asyncio
+from types import SimpleNamespace
+
+import aiohttp
+import wavelink
+from utils import wavelink_internals
+from utils.wavelink_internals import NODE_ATTRIBUTES, PLAYER_ATTRIBUTES
+
+
+def with_node(test):
+    async def run():
+        async with aiohttp.ClientSession() as session:
+            node = wavelink.Node(uri="http://localhost:2333", password="", session=session, retries=0)
+            return await test(node, wavelink.Player(nodes=[node]))
+
+    return asyncio.run(run())
+
+
+def test_private_attributes_still_exist():
+    # Fails on a wavelink upgrade that renamed what wavelink_internals relies on
+    async def test(node, player):
+        return (
+            [name for name in NODE_ATTRIBUTES if not hasattr(node, name)],
+            [name for name in PLAYER_ATTRIBUTES if not hasattr(player, name)],
+        )
+
+    assert with_node(test) == ([], [])
+
+
+def test_session_id_is_set():
+    async def test(node, player):
+        wavelink_internals.set_session_id(node, "session")
+        return node.session_id
+
+    assert with_node(test) == "session"
+
+
+def test_adopted_state_is_reported_by_the_public_api():
+    track, filters = object(), wavelink.Filters()
+
+    async def test(node, player):
+        info = SimpleNamespace(track=track, paused=True, volume=40, filters=filters)
+        wavelink_internals.adopt_player_state(player, info)
+        return player.current, player.paused, player.volume, player.filters
+
+    assert with_node(test) == (track, True, 40, filters)
+
+
+def test_position_round_trip():
+    async def test(node, player):
+        assert wavelink_internals.last_position(player) == (0, None)
+        wavelink_internals.set_position(player, 1234)
+        return wavelink_internals.last_position(player)
+
+    position, updated_at = with_node(test)
+    assert position == 1234
+    assert updated_at is not None
+
+
+def test_dropping_the_websocket_keeps_the_players():
+    async def test(node, player):
+        node._players[1] = player
+        await wavelink_internals.drop_websocket(node)
+        return node.status, list(node.players)
+
+    assert with_node(test) == (wavelink.NodeStatus.DISCONNECTED, [1])
@@ -0,0 +1,148 @@
+import asyncio
+
+import pytest
+from storage.database import Database
+from storage.state_store import StateStore
+from storage.write_behind import WriteBehindStore
+from utils.metrics import metrics
+
+
+class RecordingStore(WriteBehindStore[int]):
+    flush_interval = 3600
+
+    def __init__(self, database: Database, failures: int = 0) -> None:
+        super().__init__(database)
+        self.failures = failures
+        self.batches: list[list[int]] = []
+        self.discarded: list[int] = []
+
+    def add(self, item: int) -> None:
+        self._enqueue(item)
+
+    async def _write_batch(self, batch: list[int]) -> None:
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        self.batches.append(batch)
+
+    def _discard(self, items: list[int]) -> None:
+        self.discarded.extend(items)
+
+
+def test_store_without_write_batch_cannot_be_created(tmp_path):
+    class Incomplete(WriteBehindStore[int]):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete(Database(str(tmp_path / "bot.sqlite3")))
+
+
+def test_close_writes_buffered_items(tmp_path):
+    async def run():
+        store = RecordingStore(Database(str(tmp_path / "bot.sqlite3")))
+        await store.start()
+        store.add(1)
+        store.add(2)
+        assert store.batches == []
+        await store.close()
+        return store.batches
+
+    assert asyncio.run(run()) == [[1, 2]]
+
+
+def test_failed_batch_is_kept_for_the_next_flush(tmp_path):
+    async def run():
+        store = RecordingStore(Database(str(tmp_path / "bot.sqlite3")), failures=1)
+        await store.start()
+        store.add(1)
+        await store.flush()
+        store.add(2)
+        await store.close()
+        return store.batches
+
+    assert asyncio.run(run()) == [[1, 2]]
+
+
+def test_oldest_items_are_dropped_while_writes_fail(tmp_path):
+    async def run():
+        store = RecordingStore(Database(str(tmp_path / "bot.sqlite3")), failures=3)
+        store.max_pending = 5
+        store.max_batch_size = 1000
+        await store.start()
+        for item in range(4):
+            store.add(item)
+        await store.flush()
+        for item in range(4, 8):
+            store.add(item)
+        await store.flush()
+        await store.flush()
+        await store.close()
+        return store
+
+    dropped = metrics.counters["write_behind.dropped"]
+    store = asyncio.run(run())
+    assert store.discarded == [0, 1, 2]
+    assert store.batches == [[3, 4, 5, 6, 7]]
+    assert metrics.counters["write_behind.dropped"] == dropped + 3
+
+
+def test_full_batch_does_not_hurry_a_retry(tmp_path):
+    async def run():
+        store = RecordingStore(Database(str(tmp_path / "bot.sqlite3")), failures=5)
+        store.max_batch_size = 2
+        await store.start()
+        store.add(0)
+        store.add(1)
+        await asyncio.sleep(0.05)
+        for item in range(2, 6):
+            store.add(item)
+            await asyncio.sleep(0.01)
+        failures = store.failures
+        store.failures = 0
+        await store.close()
+        return failures, store.batches
+
+    failures, batches = asyncio.run(run())
+    assert failures == 4, "only the first full batch was tried"
+    assert batches == [[0, 1, 2, 3, 4, 5]]
+
+
+def test_full_batch_is_written_without_waiting_for_the_interval(tmp_path):
+    async def run():
+        store = RecordingStore(Database(str(tmp_path / "bot.sqlite3")))
+        store.max_batch_size = 3
+        await store.start()
+        for item in range(3):
+            store.add(item)
+        await asyncio.sleep(0.05)
+        batches = list(store.batches)
+        await store.close()
+        return batches
+
+    assert asyncio.run(run()) == [[0, 1, 2]]
+
+
+def test_state_store_values_survive_close(tmp_path):
+    path = str(tmp_path / "bot.sqlite3")
+
+    async def write():
+        database = Database(path)
+        await database.connect()
+        store = StateStore(database)
+        await store.start()
+        store.set(1, "rebukes", {"count": 3})
+        await store.close()
+        await database.close()
+
+    async def read():
+        database = Database(path)
+        await database.connect()
+        store = StateStore(database)
+        await store.start()
+        value = await store.get(1, "rebukes")
+        await store.close()
+        await database.close()
+        return value
+
+    asyncio.run(write())
+    assert asyncio.run(read()) == {"count": 3}